@@ -0,0 +1,72 @@
+from django.db import migrations
+
+# FTS5 external-content index over the searchable patient fields, kept in
+# sync with accounts_user by triggers. SQLite only; other backends fall back
+# to icontains lookups in accounts.search.
+
+FTS_TABLE = 'accounts_user_fts'
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        username, first_name, last_name, email, insurance_id,
+        content='accounts_user', content_rowid='id',
+        tokenize='unicode61', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON accounts_user BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, username, first_name, last_name, email, insurance_id)
+        VALUES (new.id, new.username, new.first_name, new.last_name, new.email, new.insurance_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON accounts_user BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, username, first_name, last_name, email, insurance_id)
+        VALUES ('delete', old.id, old.username, old.first_name, old.last_name, old.email, old.insurance_id);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF
+        username, first_name, last_name, email, insurance_id ON accounts_user BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, username, first_name, last_name, email, insurance_id)
+        VALUES ('delete', old.id, old.username, old.first_name, old.last_name, old.email, old.insurance_id);
+        INSERT INTO {FTS_TABLE}(rowid, username, first_name, last_name, email, insurance_id)
+        VALUES (new.id, new.username, new.first_name, new.last_name, new.email, new.insurance_id);
+    END
+    """,
+    # Index the users that already exist
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
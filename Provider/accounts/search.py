@@ -0,0 +1,94 @@
+"""
+Patient search backed by the SQLite FTS5 index (accounts_user_fts)
+"""
+
+import logging
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection, models, DatabaseError
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'accounts_user_fts'
+
+# Column weights for bm25: username, first_name, last_name, email, insurance_id
+BM25_WEIGHTS = (3.0, 5.0, 5.0, 2.0, 10.0)
+
+# Same token rules as the unicode61 tokenizer (letters and digits)
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(query):
+    """Turn user input into an FTS5 prefix query ('jo smi' -> '"jo"* AND "smi"*')"""
+    tokens = TOKEN_RE.findall(query.replace('_', ' '))
+    return ' AND '.join(f'"{token}"*' for token in tokens)
+
+
+def _fts_search(match, role, limit):
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT u.id FROM {FTS_TABLE}
+            JOIN accounts_user u ON u.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s AND u.role = %s
+            ORDER BY bm25({FTS_TABLE}, {weights})
+            LIMIT %s
+            """,
+            [match, role, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _icontains_search(query, role, limit):
+    User = get_user_model()
+    return list(User.objects.filter(role=role).filter(
+        models.Q(insurance_id__icontains=query) |
+        models.Q(username__icontains=query) |
+        models.Q(first_name__icontains=query) |
+        models.Q(last_name__icontains=query) |
+        models.Q(email__icontains=query)
+    )[:limit])
+
+
+def search_patients(query, limit=10, role='patient'):
+    """
+    Search users by insurance ID, username, name or email
+
+    Every word of the query is matched as a prefix and results are ranked
+    with bm25. FTS only matches from the start of a token, so when it finds
+    fewer than ``limit`` users the rest is filled from icontains lookups
+    (substrings such as '12345' in 'HI12345'). Falls back to icontains
+    entirely when the FTS index is not available (non-SQLite database or
+    migration not applied).
+
+    Args:
+        query: Search text
+        limit: Maximum number of users to return
+        role: User role to search
+
+    Returns:
+        List of User instances, best match first
+    """
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    if connection.vendor == 'sqlite':
+        try:
+            ids = _fts_search(match, role, limit)
+        except DatabaseError as e:
+            logger.warning(f"Patient FTS search unavailable, falling back to icontains: {e}")
+        else:
+            users = get_user_model().objects.in_bulk(ids)
+            results = [users[user_id] for user_id in ids if user_id in users]
+            if len(results) < limit:
+                found = {user.pk for user in results}
+                results += [
+                    user for user in _icontains_search(query, role, limit + len(found))
+                    if user.pk not in found
+                ][:limit - len(results)]
+            return results
+
+    return _icontains_search(query, role, limit)
@@ -1,3 +1,38 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from .search import search_patients
+
+
+class PatientSearchTests(TestCase):
+    """search_patients against the FTS index (SQLite) with icontains top-up"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.jane = User.objects.create_user(
+            username='jsmith', first_name='Jane', last_name='Smith',
+            email='jane.smith@example.com', role='patient', insurance_id='HI12345'
+        )
+        cls.john = User.objects.create_user(
+            username='jdoe', first_name='John', last_name='Doe',
+            email='john@example.com', role='patient', insurance_id='INS001'
+        )
+        User.objects.create_user(username='drsmith', last_name='Smith', role='provider')
+
+    def test_prefix_match_ranked_by_field(self):
+        self.assertEqual(search_patients('smi'), [self.jane])
+
+    def test_multiple_words_must_all_match(self):
+        self.assertEqual(search_patients('jo do'), [self.john])
+        self.assertEqual(search_patients('jane doe'), [])
+
+    def test_substring_of_insurance_id(self):
+        self.assertEqual(search_patients('12345'), [self.jane])
+
+    def test_substring_of_email(self):
+        self.assertCountEqual(search_patients('example.com', limit=5), [self.jane, self.john])
+
+    def test_limit_and_empty_query(self):
+        self.assertEqual(len(search_patients('example', limit=1)), 1)
+        self.assertEqual(search_patients('  '), [])
@@ -0,0 +1,246 @@
+"""
+Claims Analytics Service
+Time-bucketed claim counts and amounts by status. Days already rolled up are
+read from the pre-aggregated claim_daily_summaries collection; the rest (the
+current day, and any day the scheduled rollup has not reached yet) is
+aggregated from the claims collection at query time.
+
+Days are UTC days, matching $dateTrunc; date_submitted is stored in UTC.
+Amounts are summed as Decimal and only converted to float for the response.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Any, List, Optional
+
+from django.conf import settings
+from pymongo import ReplaceOne
+
+from .mongo_models import Claim, ClaimDailySummary, AnalyticsState, to_money, utcnow
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = ('day', 'week', 'month')
+SUMMARY_STATE = 'claim_daily_summary'
+
+
+def _amount(value) -> Decimal:
+    """Aggregated amount (Decimal128, int or legacy float) as a Decimal rounded to cents"""
+    return to_money(value) or Decimal('0.00')
+
+
+def _midnight(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _date_trunc(expression: str, bucket: str) -> Dict[str, Any]:
+    trunc = {'date': expression, 'unit': bucket}
+    if bucket == 'week':
+        trunc['startOfWeek'] = 'monday'
+    return {'$dateTrunc': trunc}
+
+
+class ClaimAnalyticsService:
+    """
+    Rolls claims up into one summary document per provider and day, and
+    answers time-series queries from those summaries
+
+    Claims are bucketed by ``date_submitted`` with their current status.
+    Because a claim's status keeps changing after submission, the last
+    ``restate_days`` days are recomputed on every rollup; older summaries
+    can be rebuilt with the ``rollup_claim_analytics --full`` command.
+
+    Rollups only run from that command (schedule it, e.g. hourly from cron);
+    queries never trigger one.
+    """
+
+    def __init__(self, restate_days: int = 7):
+        self.restate_days = restate_days
+
+    def _claim_groups(self, match: Dict[str, Any], period: Dict[str, Any], by_provider: bool) -> List[Dict[str, Any]]:
+        """Pipeline stages grouping claims by period and status"""
+        group_id = {'period': period, 'status': '$status'}
+        if by_provider:
+            group_id['provider_id'] = '$provider_id'
+        return [
+            {'$match': match},
+            {'$group': {
+                '_id': group_id,
+                'count': {'$sum': 1},
+                'amount_requested': {'$sum': {'$ifNull': ['$amount_requested', 0]}},
+                'amount_approved': {'$sum': {'$ifNull': ['$approved_amount', {'$ifNull': ['$amount_approved', 0]}]}},
+            }},
+        ]
+
+    def rollup(self, start: datetime, end: datetime) -> int:
+        """
+        Recompute daily summaries for submission days in [start, end)
+
+        Args:
+            start: First day to summarize
+            end: Day after the last day to summarize
+
+        Returns:
+            Number of summary documents written
+        """
+        start, end = _midnight(start), _midnight(end)
+        if start >= end:
+            return 0
+
+        pipeline = self._claim_groups(
+            {'date_submitted': {'$gte': start, '$lt': end}},
+            _date_trunc('$date_submitted', 'day'),
+            by_provider=True
+        ) + [
+            {'$group': {
+                '_id': {'provider_id': '$_id.provider_id', 'day': '$_id.period'},
+                'statuses': {'$push': {
+                    'status': '$_id.status',
+                    'count': '$count',
+                    'amount_requested': '$amount_requested',
+                    'amount_approved': '$amount_approved',
+                }},
+                'claim_count': {'$sum': '$count'},
+            }},
+        ]
+
+        computed_at = utcnow()
+        operations = []
+        written_keys = set()
+        for row in Claim._get_collection().aggregate(pipeline, allowDiskUse=True):
+            key = {'provider_id': row['_id'].get('provider_id'), 'day': row['_id']['day']}
+            written_keys.add((key['provider_id'], key['day']))
+            operations.append(ReplaceOne(key, {
+                **key,
+                'statuses': row['statuses'],
+                'claim_count': row['claim_count'],
+                'computed_at': computed_at,
+            }, upsert=True))
+
+        collection = ClaimDailySummary._get_collection()
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+
+        # Provider days whose claims are all gone keep no summary. Only keys this
+        # run did not rewrite are removed, so a concurrent rollup's fresh summaries survive.
+        stale_ids = [
+            doc['_id'] for doc in collection.find(
+                {'day': {'$gte': start, '$lt': end}}, {'provider_id': 1, 'day': 1}
+            )
+            if (doc.get('provider_id'), doc['day']) not in written_keys
+        ]
+        for offset in range(0, len(stale_ids), 1000):
+            collection.delete_many({'_id': {'$in': stale_ids[offset:offset + 1000]}})
+
+        logger.info(f"📊 Rolled up {len(operations)} daily claim summaries for {start:%Y-%m-%d}..{end:%Y-%m-%d}")
+        return len(operations)
+
+    def rollup_pending(self, full: bool = False) -> int:
+        """
+        Summarize every closed day that is missing or inside the restatement window
+
+        Args:
+            full: Rebuild all summaries from the earliest claim
+
+        Returns:
+            Number of summary documents written
+        """
+        today = _midnight(utcnow())
+        state = AnalyticsState.objects(name=SUMMARY_STATE).first()
+
+        if state and state.rolled_up_through and not full:
+            start = min(state.rolled_up_through, today - timedelta(days=self.restate_days))
+        else:
+            first_claim = Claim.objects.order_by('date_submitted').only('date_submitted').first()
+            start = _midnight(first_claim.date_submitted) if first_claim and first_claim.date_submitted else today
+
+        written = self.rollup(start, today)
+        AnalyticsState.objects(name=SUMMARY_STATE).update_one(
+            upsert=True, set__rolled_up_through=today, set__updated_at=utcnow()
+        )
+        return written
+
+    def summarized_through(self) -> Optional[datetime]:
+        """Day before which summaries exist (None if no rollup has run)"""
+        state = AnalyticsState._get_collection().find_one({'_id': SUMMARY_STATE}, {'rolled_up_through': 1})
+        return (state or {}).get('rolled_up_through')
+
+    def timeseries(self, bucket: str, start: datetime, end: datetime,
+                   provider_id=None) -> List[Dict[str, Any]]:
+        """
+        Claim counts and amounts per bucket and status
+
+        Args:
+            bucket: 'day', 'week' or 'month'
+            start: Start of the range (inclusive)
+            end: End of the range (exclusive)
+            provider_id: Restrict to one provider's claims
+
+        Returns:
+            List of {period, total, by_status} dicts ordered by period
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+
+        summarized_through = self.summarized_through()
+        if summarized_through is None:
+            logger.warning("⚠️ No claim analytics rollup yet, aggregating from claims (run rollup_claim_analytics)")
+            summarized_through = start
+        provider_match = {'provider_id': provider_id} if provider_id else {}
+        rows = []
+
+        # Rolled-up days come from the daily summaries
+        closed_end = min(end, summarized_through)
+        if start < closed_end:
+            pipeline = [
+                {'$match': {'day': {'$gte': start, '$lt': closed_end}, **provider_match}},
+                {'$unwind': '$statuses'},
+                {'$group': {
+                    '_id': {'period': _date_trunc('$day', bucket), 'status': '$statuses.status'},
+                    'count': {'$sum': '$statuses.count'},
+                    'amount_requested': {'$sum': '$statuses.amount_requested'},
+                    'amount_approved': {'$sum': '$statuses.amount_approved'},
+                }},
+            ]
+            rows.extend(ClaimDailySummary._get_collection().aggregate(pipeline))
+
+        # Later days (at least the current one) are aggregated live from the claims
+        if end > summarized_through:
+            match = {'date_submitted': {'$gte': max(start, summarized_through), '$lt': end}, **provider_match}
+            pipeline = self._claim_groups(match, _date_trunc('$date_submitted', bucket), by_provider=False)
+            rows.extend(Claim._get_collection().aggregate(pipeline))
+
+        periods = defaultdict(dict)
+        for row in rows:
+            by_status = periods[row['_id']['period']]
+            entry = by_status.setdefault(row['_id']['status'] or 'unknown',
+                                         {'count': 0, 'amount_requested': Decimal('0.00'), 'amount_approved': Decimal('0.00')})
+            entry['count'] += row['count']
+            entry['amount_requested'] += _amount(row['amount_requested'])
+            entry['amount_approved'] += _amount(row['amount_approved'])
+
+        series = []
+        for period in sorted(periods):
+            by_status = periods[period]
+            total = {
+                'count': sum(entry['count'] for entry in by_status.values()),
+                'amount_requested': float(sum((entry['amount_requested'] for entry in by_status.values()), Decimal('0.00'))),
+                'amount_approved': float(sum((entry['amount_approved'] for entry in by_status.values()), Decimal('0.00'))),
+            }
+            for entry in by_status.values():
+                entry['amount_requested'] = float(entry['amount_requested'])
+                entry['amount_approved'] = float(entry['amount_approved'])
+            series.append({
+                'period': period.isoformat(),
+                'total': total,
+                'by_status': by_status,
+            })
+        return series
+
+
+# Global instance
+claim_analytics = ClaimAnalyticsService(
+    restate_days=getattr(settings, 'ANALYTICS_RESTATE_DAYS', 7),
+)
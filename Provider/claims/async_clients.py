@@ -0,0 +1,113 @@
+"""
+Async MongoDB and HTTP Clients
+Shared AsyncMongoClient / per-payor httpx.AsyncClient instances for the async views
+"""
+
+import asyncio
+import logging
+import time
+import weakref
+from typing import Dict, Optional
+
+import httpx
+from django.conf import settings
+from pymongo import AsyncMongoClient
+
+from .http import endpoint_key, payor_pools
+from .metrics import record_payor_request
+from .mongo_connection import client_config
+
+logger = logging.getLogger(__name__)
+
+# Async clients are bound to the event loop they were created on. Under ASGI
+# there is one loop per process; under WSGI every async view runs in its own
+# short-lived loop (asgiref's async_to_sync uses asyncio.run), so clients are
+# kept per loop and closed when that loop shuts down.
+class _LoopClients:
+    """Clients created on one event loop, closed when the loop shuts down"""
+
+    def __init__(self):
+        self.mongo = None
+        self.http: Dict[str, httpx.AsyncClient] = {}
+        # asyncio.run cancels the tasks still pending before it closes the
+        # loop, which runs the finally block of this task
+        self.closer = asyncio.get_running_loop().create_task(self._close_at_shutdown())
+
+    async def _close_at_shutdown(self):
+        try:
+            await asyncio.Event().wait()
+        finally:
+            # The entry references its loop (through the task), so drop it explicitly
+            _loop_clients.pop(asyncio.get_running_loop(), None)
+            await self.close()
+
+    async def close(self):
+        clients, self.http = list(self.http.values()), {}
+        mongo, self.mongo = self.mongo, None
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Closing payor HTTP client failed: {e}")
+        if mongo is not None:
+            try:
+                await mongo.close()
+            except Exception as e:
+                logger.warning(f"Closing async MongoDB client failed: {e}")
+
+
+_loop_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients]' = weakref.WeakKeyDictionary()
+
+
+def _clients_for_running_loop() -> _LoopClients:
+    loop = asyncio.get_running_loop()
+    clients = _loop_clients.get(loop)
+    if clients is None:
+        clients = _loop_clients[loop] = _LoopClients()
+    return clients
+
+
+def get_async_db():
+    """Database handle of the AsyncMongoClient for the running event loop"""
+    clients = _clients_for_running_loop()
+    if clients.mongo is None:
+        # Same host and pool options as the MongoEngine connection
+        clients.mongo = AsyncMongoClient(client_config.get('host'), **client_config.get('options', {}))
+    return clients.mongo[client_config.get('db') or settings.MONGO_DB_NAME]
+
+
+async def _mark_request_start(request: httpx.Request):
+    request.extensions['metrics_started'] = time.perf_counter()
+
+
+async def _record_response(response: httpx.Response):
+    started = response.request.extensions.get('metrics_started')
+    if started is not None:
+        record_payor_request(response.request.method, time.perf_counter() - started, response.status_code)
+
+
+def get_async_http(payor_url: str, payor_name: Optional[str] = None) -> httpx.AsyncClient:
+    """
+    Pooled httpx.AsyncClient for a payor on the running event loop
+
+    Clients are keyed like the sync pools (claims.http): by payor name, or by
+    endpoint for payor-system calls without one. Each client is sized from
+    its pool profile: at most max_concurrency connections, and a call that
+    cannot get one within acquire_timeout fails with httpx.PoolTimeout.
+    """
+    clients = _clients_for_running_loop().http
+    key = payor_name or endpoint_key(payor_url)
+    client = clients.get(key)
+    if client is None:
+        profile = payor_pools.profile(payor_url, payor_name)
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(profile['read_timeout'], connect=profile['connect_timeout'],
+                                  pool=profile['acquire_timeout']),
+            limits=httpx.Limits(
+                max_connections=profile['max_concurrency'],
+                max_keepalive_connections=profile['max_concurrency'],
+            ),
+            event_hooks={'request': [_mark_request_start], 'response': [_record_response]},
+        )
+        clients[key] = client
+    return client
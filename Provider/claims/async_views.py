@@ -0,0 +1,250 @@
+"""
+Async claim read views
+Native async versions of the claim list, detail, dashboard and payor status
+endpoints using AsyncMongoClient and httpx. Under ASGI a worker awaits Mongo
+and payor I/O instead of blocking a thread for the whole request.
+Enabled with ASYNC_CLAIM_VIEWS; write methods are delegated to the sync views.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from bson import ObjectId, Decimal128
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from pymongo import ReturnDocument
+from rest_framework.renderers import JSONRenderer
+
+from .async_clients import get_async_db
+from .mongo_models import User, Claim, to_money
+from .mongo_views import (
+    serialize_claim,
+    get_basic_auth_username,
+    build_dashboard_stats,
+    DASHBOARD_TOTALS_PIPELINE,
+    MongoClaimListView,
+    MongoClaimDetailView,
+)
+from .payor_integration import payor_service
+from .payor_views import PayorIntegrationView
+from .provider_payor_api import provider_payor_api
+from .reference_cache import user_cache, MISSING, USER_CACHE_PROJECTION
+from .response_cache import claim_list_cache, cached_json_response
+from .status_history import status_history
+from .validation_cache import validation_cache
+
+logger = logging.getLogger(__name__)
+
+
+# Statuses the Claim document accepts (the sync path validates them in save())
+CLAIM_STATUSES = frozenset(value for value, _ in Claim.STATUS_CHOICES)
+
+
+def claims_collection(db):
+    return db[Claim._get_collection_name()]
+
+
+async def aget_request_provider(request, db):
+    """Async variant of mongo_views.get_request_provider"""
+    username = get_basic_auth_username(request)
+    if not username:
+        return None
+    key = f'username:{username}'
+    # The shared tier is file-based by default: keep its I/O off the event loop
+    doc = await sync_to_async(user_cache.get, thread_sensitive=False)(key)
+    if doc is MISSING:
+        doc = await db[User._get_collection_name()].find_one(
+            {'username': username, 'is_active': True}, USER_CACHE_PROJECTION
+        )
+        await sync_to_async(user_cache.set, thread_sensitive=False)(key, doc)
+    return User._from_son(doc) if doc else None
+
+
+class AsyncSyncFallbackMixin:
+    """Run methods the async view does not implement through the sync view"""
+    sync_view_class = None
+
+    async def delegate(self, request, *args, **kwargs):
+        view = self.sync_view_class.as_view()
+        return await sync_to_async(view)(request, *args, **kwargs)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncClaimListView(AsyncSyncFallbackMixin, View):
+    """Async claims list (POST goes to MongoClaimListView)"""
+    sync_view_class = MongoClaimListView
+
+    async def get(self, request):
+        """Get list of claims (served from the list cache while the provider's claims are unchanged)"""
+        try:
+            db = get_async_db()
+            provider_user = await aget_request_provider(request, db)
+            provider_id = provider_user.id if provider_user else None
+
+            cache_key = claim_list_cache.make_key(provider_id, request.GET)
+            version = await claim_list_cache.aread_version(db, provider_id)
+            cached = claim_list_cache.get(cache_key, version)
+            if cached is not None:
+                return cached_json_response(request, *cached, hit=True)
+
+            query = {'provider_id': provider_id} if provider_id else {}
+            docs = await claims_collection(db).find(query).sort('date_submitted', -1).to_list(None)
+            claims_data = [serialize_claim(Claim._from_son(doc)) for doc in docs]
+
+            body = JSONRenderer().render({
+                'count': len(claims_data),
+                'results': claims_data
+            })
+            etag = claim_list_cache.set(cache_key, version, body)
+            return cached_json_response(request, body, etag, hit=False)
+
+        except Exception as e:
+            logger.error(f"Error fetching claims: {e}")
+            return JsonResponse({'error': f'Failed to fetch claims: {str(e)}'}, status=500)
+
+    async def post(self, request):
+        return await self.delegate(request)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncClaimDetailView(AsyncSyncFallbackMixin, View):
+    """Async claim detail (PUT/PATCH go to MongoClaimDetailView)"""
+    sync_view_class = MongoClaimDetailView
+
+    async def get(self, request, claim_id):
+        """Get a specific claim"""
+        try:
+            doc = await claims_collection(get_async_db()).find_one({'_id': ObjectId(claim_id)})
+            if not doc:
+                return JsonResponse({'error': 'Claim not found'}, status=404)
+
+            return JsonResponse(serialize_claim(Claim._from_son(doc)))
+
+        except Exception as e:
+            return JsonResponse({'error': f'Failed to fetch claim: {str(e)}'}, status=500)
+
+    async def put(self, request, claim_id):
+        return await self.delegate(request, claim_id=claim_id)
+
+    async def patch(self, request, claim_id):
+        return await self.delegate(request, claim_id=claim_id)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncDashboardStatsView(View):
+    """Async dashboard stats"""
+
+    async def get(self, request):
+        """Get dashboard statistics from MongoDB"""
+        try:
+            db = get_async_db()
+            provider_user = await aget_request_provider(request, db)
+            query = {'provider_id': provider_user.id} if provider_user else {}
+            collection = claims_collection(db)
+
+            async def status_rows():
+                pipeline = ([{'$match': query}] if query else []) + DASHBOARD_TOTALS_PIPELINE
+                cursor = await collection.aggregate(pipeline)
+                return await cursor.to_list(None)
+
+            # Totals and recent claims are fetched concurrently
+            rows, recent_docs = await asyncio.gather(
+                status_rows(),
+                collection.find(query).sort('date_submitted', -1).limit(5).to_list(None)
+            )
+            recent_claims_data = [serialize_claim(Claim._from_son(doc)) for doc in recent_docs]
+
+            return JsonResponse(build_dashboard_stats(rows, recent_claims_data))
+
+        except Exception as e:
+            return JsonResponse({'error': f'Failed to get dashboard stats: {str(e)}'}, status=500)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncPayorIntegrationView(AsyncSyncFallbackMixin, View):
+    """Async payor integration status (POST goes to PayorIntegrationView)"""
+    sync_view_class = PayorIntegrationView
+
+    async def get(self, request):
+        """Get payor integration status and configuration"""
+        try:
+            # Health check and policy list are requested concurrently
+            connection_test, policies = await asyncio.gather(
+                payor_service.test_connection_async(),
+                payor_service.get_insurance_policies_async()
+            )
+            # The registry may refresh from MongoDB, which is sync I/O
+            mappings = await sync_to_async(payor_service.insurance_registry.all_mappings)()
+
+            return JsonResponse({
+                'connection_status': connection_test,
+                'insurance_mappings': mappings,
+                'insurance_mappings_version': payor_service.insurance_registry.version,
+                'insurance_policies': policies,
+                'validation_cache': validation_cache.stats(),
+                'payor_config': {
+                    'base_url': payor_service.payor_base_url,
+                    'email': payor_service.payor_email
+                }
+            })
+
+        except Exception as e:
+            return JsonResponse({'error': f'Failed to get payor integration status: {str(e)}'}, status=500)
+
+    async def post(self, request):
+        return await self.delegate(request)
+
+
+@csrf_exempt
+async def async_get_payor_claim_status(request, claim_id):
+    """
+    Get claim status from Payor system and update the local claim
+    GET /api/provider/claim-status/<claim_id>/
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+
+    try:
+        result = await provider_payor_api.get_claim_status_async(claim_id)
+
+        if not result['success']:
+            return JsonResponse({'success': False, 'error': result.get('error')}, status=404)
+
+        # Update MongoDB if claim exists
+        try:
+            if result.get('status') and result['status'] not in CLAIM_STATUSES:
+                raise ValueError(f"Unknown claim status from payor: {result['status']!r}")
+            updates = {'payor_response': result.get('claim') or {}, 'date_updated': datetime.now()}
+            if result.get('status'):
+                updates['status'] = result['status']
+            if result.get('approved_amount') is not None:
+                updates['amount_approved'] = Decimal128(to_money(result['approved_amount']))
+
+            db = get_async_db()
+            previous = await claims_collection(db).find_one_and_update(
+                {'payor_claim_id': claim_id},
+                {'$set': updates},
+                return_document=ReturnDocument.BEFORE
+            )
+            if previous:
+                claim = Claim._from_son({**previous, **updates})
+                await claim_list_cache.abump(db, claim.provider_id)
+                status_history.record(claim, previous.get('status'), claim.status, notes='Payor status check')
+                logger.info(f"Updated claim status in MongoDB: {claim_id}")
+        except Exception as e:
+            logger.error(f"Error updating claim in MongoDB: {e}")
+
+        return JsonResponse({
+            'success': True,
+            'claim': result.get('claim'),
+            'status': result.get('status'),
+            'claim_id': result.get('claim_id')
+        })
+
+    except Exception as e:
+        logger.error(f"Error in async_get_payor_claim_status: {e}", exc_info=True)
+        return JsonResponse({'success': False, 'error': f'Internal server error: {str(e)}'}, status=500)
@@ -0,0 +1,161 @@
+"""
+ICD-10 / CPT Code-Set Index
+Locally loaded code sets with precompiled format checks and a batch
+validation API for checking thousands of codes per call
+"""
+
+import logging
+import re
+from typing import Dict, Any, Iterable, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# ICD-10-CM format: letter, digit, digit or letter, then an optional dot and
+# up to 4 more characters (E11.9, E11.641, S72.001A, C4A.0)
+ICD10_FORMAT = re.compile(r'[A-Z]\d[0-9A-Z](\.[0-9A-Z]{1,4})?')
+# CPT codes are 5 digits
+CPT_FORMAT = re.compile(r'\d{5}')
+
+# Line-anchored variants used to check a whole batch with one regex scan
+_ICD10_LINES = re.compile(r'^[A-Z]\d[0-9A-Z](?:\.[0-9A-Z]{1,4})?$', re.MULTILINE)
+_CPT_LINES = re.compile(r'^\d{5}$', re.MULTILINE)
+
+
+def _normalize(code) -> str:
+    """Codes are matched upper-case without surrounding whitespace"""
+    return str(code).strip().upper()
+
+
+def _index_key(code: str) -> str:
+    """Code-set files list ICD-10 codes without the dot (E119 for E11.9)"""
+    return _normalize(code).replace('.', '')
+
+
+class CodeSetIndex:
+    """
+    Frozen-set index of known ICD-10 and CPT codes
+
+    Existence checks are only performed for code types whose code set was
+    loaded; otherwise well-formed codes are reported as unverified, not valid.
+    The files are installed with ``manage.py load_code_sets``.
+    """
+
+    def __init__(self, icd10_codes: Iterable[str] = (), cpt_codes: Iterable[str] = ()):
+        self.icd10_codes = frozenset(_index_key(code) for code in icd10_codes)
+        self.cpt_codes = frozenset(code.strip() for code in cpt_codes)
+
+    @classmethod
+    def from_files(cls, icd10_path=None, cpt_path=None) -> 'CodeSetIndex':
+        """
+        Build an index from code-set files
+
+        Each line starts with a code; anything after the first whitespace
+        (usually the description) is ignored, which matches the CMS
+        ``icd10cm_codes_<year>.txt`` layout.
+
+        Args:
+            icd10_path: Path to the ICD-10-CM code file
+            cpt_path: Path to the CPT code file
+
+        Returns:
+            CodeSetIndex
+        """
+        return cls(cls._read_codes(icd10_path), cls._read_codes(cpt_path))
+
+    @staticmethod
+    def _read_codes(path) -> List[str]:
+        if not path:
+            return []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return [line.split(None, 1)[0] for line in f if line.strip()]
+        except FileNotFoundError:
+            logger.warning(f"⚠️ Code set file {path} not found, only code formats will be checked "
+                           f"(install it with `manage.py load_code_sets`)")
+            return []
+        except OSError as e:
+            logger.warning(f"⚠️ Code set file not loaded ({path}): {e}")
+            return []
+
+    @property
+    def has_icd10_codes(self) -> bool:
+        return bool(self.icd10_codes)
+
+    @property
+    def has_cpt_codes(self) -> bool:
+        return bool(self.cpt_codes)
+
+    def is_valid_icd10_format(self, code: str) -> bool:
+        return bool(ICD10_FORMAT.fullmatch(_normalize(code)))
+
+    def is_valid_cpt_format(self, code: str) -> bool:
+        return bool(CPT_FORMAT.fullmatch(_normalize(code)))
+
+    def validate_batch(self, codes: Iterable[str], code_type: str = 'icd10') -> Dict[str, Any]:
+        """
+        Validate many codes in one call
+
+        Codes are stripped and upper-cased, then format checks run as a
+        single line-anchored regex scan over the newline-joined batch and
+        existence checks are a set difference against the loaded code set.
+        The result lists hold the codes as they were passed in.
+
+        Args:
+            codes: Codes to validate
+            code_type: 'icd10' or 'cpt'
+
+        Returns:
+            Dict with valid, invalid_format, unknown and unverified code
+            lists; without a loaded code set, well-formed codes are
+            unverified rather than valid
+        """
+        if code_type == 'icd10':
+            pattern, known, key = _ICD10_LINES, self.icd10_codes, _index_key
+        elif code_type == 'cpt':
+            pattern, known, key = _CPT_LINES, self.cpt_codes, str
+        else:
+            raise ValueError(f"Unknown code type: {code_type}")
+
+        codes = [str(code) for code in codes]
+        normalized = {code: _normalize(code) for code in codes}
+        # Codes containing line breaks can never be valid and would break the scan
+        joined = '\n'.join(value for value in normalized.values() if '\n' not in value)
+        well_formed = set(pattern.findall(joined))
+
+        invalid_format = [code for code in codes if normalized[code] not in well_formed]
+        formatted = [code for code in codes if normalized[code] in well_formed]
+
+        if known:
+            missing = {value for value in well_formed if key(value) not in known}
+            unknown = [code for code in formatted if normalized[code] in missing]
+            valid = [code for code in formatted if normalized[code] not in missing]
+            unverified = []
+        else:
+            unknown = []
+            valid = []
+            unverified = formatted
+
+        return {
+            'code_type': code_type,
+            'checked': len(codes),
+            'code_set_loaded': bool(known),
+            'valid': valid,
+            'invalid_format': invalid_format,
+            'unknown': unknown,
+            'unverified': unverified,
+        }
+
+    def exists(self, code: str, code_type: str = 'icd10') -> Optional[bool]:
+        """Check a single code against the loaded set (None if no set is loaded)"""
+        if code_type == 'icd10':
+            return _index_key(code) in self.icd10_codes if self.icd10_codes else None
+        return _normalize(code) in self.cpt_codes if self.cpt_codes else None
+
+
+# Global instance
+code_index = CodeSetIndex.from_files(
+    getattr(settings, 'ICD10_CODE_SET_FILE', None),
+    getattr(settings, 'CPT_CODE_SET_FILE', None),
+)
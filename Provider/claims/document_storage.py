@@ -0,0 +1,251 @@
+"""
+Claim Document Storage
+Content-addressed file store for claim attachments, an upload handler that
+streams multipart chunks to disk while hashing them, so uploads are never held
+in memory and identical files are stored once (keyed by SHA-256), and byte-range
+helpers for serving stored files
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+
+class ContentAddressedStorage:
+    """
+    Files stored under <root>/<aa>/<bb>/<sha256>
+
+    Blobs are immutable and shared by every document with the same content;
+    uploads land in <root>/tmp first and are renamed into place atomically.
+    """
+
+    def __init__(self, root: str):
+        self.root = str(root)
+        self.tmp_dir = os.path.join(self.root, 'tmp')
+
+    def relative_path(self, sha256: str) -> str:
+        return os.path.join(sha256[:2], sha256[2:4], sha256)
+
+    def path(self, relative_path: str) -> str:
+        return os.path.join(self.root, relative_path)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path(self.relative_path(sha256)))
+
+    def temp_file(self):
+        """Open a temporary file on the same filesystem as the blobs"""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=self.tmp_dir, prefix='upload-', delete=False)
+
+    def store(self, upload: 'HashedUploadedFile') -> Tuple[str, bool]:
+        """
+        Move a finished upload into the store
+
+        Args:
+            upload: File produced by HashingFileUploadHandler
+
+        Returns:
+            (relative path, True if new bytes were stored / False if deduplicated)
+        """
+        relative_path = self.relative_path(upload.sha256)
+        target = self.path(relative_path)
+        if os.path.exists(target):
+            upload.discard()
+            return relative_path, False
+
+        if upload.temp_path is None:
+            raise FileNotFoundError(f"Blob {upload.sha256} is missing from the document store")
+        upload.file.close()
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Concurrent uploads of the same content write identical bytes, so the last rename wins harmlessly
+        os.replace(upload.temp_path, target)
+        upload.temp_path = None
+        return relative_path, True
+
+
+class HashedUploadedFile(UploadedFile):
+    """Uploaded file with its SHA-256, backed by a temp file (or nothing when already stored)"""
+
+    def __init__(self, file, name, content_type, size, charset, sha256, temp_path):
+        super().__init__(file, name, content_type, size, charset)
+        self.sha256 = sha256
+        self.temp_path = temp_path
+
+    def discard(self):
+        """Remove the temp file (content already stored or upload rejected)"""
+        if self.file is not None:
+            self.file.close()
+        if self.temp_path:
+            try:
+                os.unlink(self.temp_path)
+            except FileNotFoundError:
+                pass
+            self.temp_path = None
+
+
+class HashingFileUploadHandler(FileUploadHandler):
+    """
+    Upload handler that writes each chunk to a temp file and feeds it to SHA-256
+
+    When the client sends the expected hash (``X-Content-SHA256``) and that
+    blob is already stored, chunks are only hashed to verify the claim and
+    nothing is written. Oversized files and hash mismatches are skipped and
+    reported through ``error`` / ``error_status``. Every file produced is
+    kept in ``uploads`` so the view can discard leftover temp files.
+    """
+
+    chunk_size = 64 * 2 ** 10
+
+    def __init__(self, request=None, storage: ContentAddressedStorage = None,
+                 max_size: Optional[int] = None, expected_sha256: Optional[str] = None):
+        super().__init__(request)
+        self.storage = storage or document_storage
+        self.max_size = max_size
+        self.expected_sha256 = (expected_sha256 or '').lower() or None
+        self.error = None
+        self.error_status = None
+        self.uploads: List['HashedUploadedFile'] = []
+        self._reset()
+
+    def _reset(self):
+        self.hasher = None
+        self.size = 0
+        self.temp = None
+
+    def _discard_temp(self):
+        if self.temp is not None:
+            self.temp.close()
+            try:
+                os.unlink(self.temp.name)
+            except FileNotFoundError:
+                pass
+        self._reset()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        already_stored = self.expected_sha256 is not None and self.storage.exists(self.expected_sha256)
+        self.temp = None if already_stored else self.storage.temp_file()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.max_size is not None and self.size > self.max_size:
+            self.error = f'File exceeds the maximum size of {self.max_size} bytes'
+            self.error_status = 413
+            self._discard_temp()
+            raise SkipFile()
+        self.hasher.update(raw_data)
+        if self.temp is not None:
+            self.temp.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        sha256 = self.hasher.hexdigest()
+        if self.expected_sha256 and sha256 != self.expected_sha256:
+            self.error = 'Uploaded content does not match X-Content-SHA256'
+            self.error_status = 400
+            self._discard_temp()
+            return None
+
+        temp = self.temp
+        if temp is not None:
+            temp.flush()
+            temp.seek(0)
+        upload = HashedUploadedFile(
+            file=temp,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=self.size,
+            charset=self.charset,
+            sha256=sha256,
+            temp_path=temp.name if temp is not None else None,
+        )
+        self._reset()
+        self.uploads.append(upload)
+        return upload
+
+    def upload_interrupted(self):
+        self._discard_temp()
+
+
+class RangeNotSatisfiable(ValueError):
+    """The requested byte range lies outside the file"""
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range: bytes=...`` header
+
+    Args:
+        header: Range header value
+        size: File size in bytes
+
+    Returns:
+        Inclusive (first, last) byte positions, or None to serve the whole file
+        (no header, another unit, malformed or multiple ranges)
+
+    Raises:
+        RangeNotSatisfiable: The range starts beyond the end of the file
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec or '-' not in spec:
+        return None
+    first, _, last = spec.partition('-')
+    try:
+        # Suffix range (the last N bytes) when the first position is omitted
+        length = int(last) if not first else None
+        first = int(first) if first else None
+        last = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if length is not None:
+        if length <= 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+    if first >= size:
+        raise RangeNotSatisfiable(header)
+    if first > last:
+        return None
+    return first, min(last, size - 1)
+
+
+class FileRange:
+    """
+    Read-only window onto part of a file
+
+    ``fileno()`` is positioned at the start of the window, so sendfile-capable
+    WSGI servers (wsgi.file_wrapper) copy exactly Content-Length bytes in the
+    kernel; other servers fall back to the bounded ``read``.
+    """
+
+    def __init__(self, path: str, start: int, length: int):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self.remaining = length
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+# Global instance
+document_storage = ContentAddressedStorage(getattr(settings, 'CLAIM_DOCUMENT_ROOT', settings.MEDIA_ROOT / 'claim_documents'))
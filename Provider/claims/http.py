@@ -0,0 +1,205 @@
+"""
+Payor HTTP Sessions
+Outbound payor calls go through one pool per payor: a keep-alive requests
+session, a concurrency limit and a timeout profile, so a slow or congested
+payor only exhausts its own capacity. Pools are keyed by payor identity
+(the insurance mapping's payor name), not by URL, because the built-in
+mappings all route through the same payor base URL. Every call records latency
+per HTTP method (claims.metrics).
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .metrics import record_payor_request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = {
+    'max_connections': 10,
+    'max_concurrency': 10,
+    'connect_timeout': 5,
+    'read_timeout': 30,
+    'acquire_timeout': 2,
+}
+
+
+class PayorBusyError(requests.ConnectionError):
+    """Raised without a network call when a payor is at its concurrency limit"""
+
+
+class PayorSession(requests.Session):
+    """requests.Session that records every call in the payor metrics"""
+
+    def request(self, method, url, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            record_payor_request(method, None)
+            raise
+        record_payor_request(method, time.perf_counter() - started, response.status_code)
+        return response
+
+
+def build_session(pool_maxsize: int = 20) -> PayorSession:
+    session = PayorSession()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class PayorPool:
+    """
+    Connection pool, concurrency limit and timeouts for one payor
+
+    Calls beyond ``max_concurrency`` wait up to ``acquire_timeout`` seconds
+    for a slot and then fail with PayorBusyError, instead of queueing behind
+    a payor that has stopped answering. The profile is expected to be
+    normalized (PayorPoolRegistry.profile), so every admitted call can get a
+    pooled connection.
+    """
+
+    def __init__(self, name: str, url: str, profile: Dict[str, Any]):
+        self.name = name
+        self.url = url
+        self.profile = profile
+        self.session = build_session(pool_maxsize=profile['max_connections'])
+        self.timeout = (profile['connect_timeout'], profile['read_timeout'])
+        self._slots = threading.BoundedSemaphore(profile['max_concurrency'])
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.requests = 0
+        self.rejected = 0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request within this payor's limits
+
+        Args:
+            method: HTTP method
+            url: Full URL on this payor
+            kwargs: requests arguments (timeout defaults to the profile)
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        if not self._slots.acquire(timeout=self.profile['acquire_timeout']):
+            with self._lock:
+                self.rejected += 1
+            record_payor_request(method, None)
+            raise PayorBusyError(
+                f"Payor {self.name} is at its concurrency limit ({self.profile['max_concurrency']})"
+            )
+        with self._lock:
+            self.active += 1
+            self.requests += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'name': self.name,
+                'url': self.url,
+                'active': self.active,
+                'peak': self.peak,
+                'requests': self.requests,
+                'rejected': self.rejected,
+                'max_concurrency': self.profile['max_concurrency'],
+                'max_connections': self.profile['max_connections'],
+            }
+
+
+def endpoint_key(url: str) -> str:
+    """Pool key of a payor URL (scheme and host; paths on one host share a pool)"""
+    parts = urlsplit(url or '')
+    return f'{parts.scheme}://{parts.netloc}'.lower() if parts.netloc else (url or '').rstrip('/').lower()
+
+
+def payor_key(mapping: Dict[str, Any]) -> str:
+    """Pool key of an insurance mapping: its payor, or its endpoint when unnamed"""
+    return mapping.get('payor_name') or mapping.get('policy_number') or endpoint_key(mapping.get('payor_url'))
+
+
+class PayorPoolRegistry:
+    """
+    One PayorPool per payor, created on first use
+
+    Profiles come from settings.PAYOR_POOL_PROFILES: the 'default' entry
+    applies to every payor, entries keyed by payor URL (or host) override it,
+    and entries keyed by payor name override both. max_concurrency is capped
+    at max_connections, since a call admitted without a pooled connection
+    would open (and then discard) an extra one.
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.profiles = profiles or {}
+        self._pools: Dict[str, PayorPool] = {}
+        self._lock = threading.Lock()
+
+    def profile(self, payor_url: str, payor_name: Optional[str] = None) -> Dict[str, Any]:
+        """Merged timeout/concurrency profile for a payor (by name, then URL)"""
+        key = endpoint_key(payor_url)
+        host = urlsplit(payor_url or '').netloc.lower()
+        profile = {**DEFAULT_PROFILE, **self.profiles.get('default', {})}
+        for name, overrides in self.profiles.items():
+            if name != 'default' and (endpoint_key(name) == key or name.lower() == host):
+                profile.update(overrides)
+        if payor_name and payor_name in self.profiles:
+            profile.update(self.profiles[payor_name])
+        if profile['max_concurrency'] > profile['max_connections']:
+            logger.warning(f"⚠️ Payor pool max_concurrency {profile['max_concurrency']} exceeds max_connections "
+                           f"{profile['max_connections']} for {payor_name or key}, capping it")
+            profile['max_concurrency'] = profile['max_connections']
+        return profile
+
+    def pool(self, name: str, payor_url: str) -> PayorPool:
+        """Pool named ``name`` for a payor served at ``payor_url``"""
+        pool = self._pools.get(name)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(name)
+                if pool is None:
+                    pool = PayorPool(name, endpoint_key(payor_url), self.profile(payor_url, name))
+                    self._pools[name] = pool
+        return pool
+
+    def for_payor(self, payor_name: Optional[str], payor_url: str) -> PayorPool:
+        """Pool for a named payor (calls without a payor name share the endpoint's pool)"""
+        return self.pool(payor_name or endpoint_key(payor_url), payor_url)
+
+    def for_url(self, payor_url: str) -> PayorPool:
+        """Pool for payor-system calls that are not about one payor (health, policy list)"""
+        return self.pool(endpoint_key(payor_url), payor_url)
+
+    def for_mapping(self, mapping: Dict[str, Any]) -> PayorPool:
+        """Pool for an insurance mapping (keyed by its payor, not its URL)"""
+        return self.pool(payor_key(mapping), mapping['payor_url'])
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            pools = list(self._pools.items())
+        return {key: pool.stats() for key, pool in pools}
+
+
+# Global instance
+payor_pools = PayorPoolRegistry(getattr(settings, 'PAYOR_POOL_PROFILES', {}))
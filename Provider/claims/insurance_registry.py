@@ -0,0 +1,238 @@
+"""
+Insurance Mapping Registry
+Resolves insurance IDs to payor routing from rules stored in MongoDB,
+cached in-process and refreshed when the registry version changes
+"""
+
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_NAME = 'insurance_mappings'
+
+# Cap on memoized lookups so junk IDs cannot grow the memo without bound
+MAX_RESOLVED_ENTRIES = 100000
+
+
+class MappingRuleSet:
+    """
+    Immutable lookup tables for one registry version
+
+    Built in full before it is published, so a lookup sees the exact, prefix
+    and pattern tables of a single version. Only the memo of resolved IDs
+    grows, and it belongs to this rule set.
+    """
+
+    def __init__(self, defaults: Dict[str, Dict[str, Any]], rules: List[Dict[str, Any]],
+                 version: Optional[int] = None):
+        exact = {key.upper(): {'insurance_id': key, **value} for key, value in defaults.items()}
+        prefixes: List[Tuple[str, Dict[str, Any]]] = []
+        patterns: List[Tuple[int, Any, Dict[str, Any]]] = []
+
+        for rule in rules:
+            match_type = rule.get('match_type', 'exact')
+            is_active = rule.get('is_active', True)
+            # Inactive exact rules are kept so they can switch off a built-in mapping
+            if not is_active and match_type != 'exact':
+                continue
+            value = rule['value']
+            mapping = {
+                'payor_name': rule.get('payor_name'),
+                'payor_url': rule.get('payor_url') or None,
+                'policy_number': rule.get('policy_number'),
+                'is_active': is_active,
+                'match_type': match_type,
+                'rule': value,
+            }
+            if match_type == 'exact':
+                exact[value.upper()] = mapping
+            elif match_type == 'prefix':
+                prefixes.append((value.upper(), mapping))
+            elif match_type == 'pattern':
+                try:
+                    patterns.append((rule.get('priority', 100), re.compile(value, re.IGNORECASE), mapping))
+                except re.error as e:
+                    logger.warning(f"Skipping invalid insurance mapping pattern {value!r}: {e}")
+
+        prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+        patterns.sort(key=lambda item: item[0])
+
+        self.version = version
+        self.exact = exact
+        self.prefixes = tuple(prefixes)
+        self.patterns = tuple(patterns)
+        self.resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    def resolve(self, key: str) -> Optional[Dict[str, Any]]:
+        """Mapping for a normalized (stripped, upper-case) insurance ID"""
+        resolved = self.resolved
+        if key in resolved:
+            return resolved[key]
+
+        mapping = self.exact.get(key)
+        if mapping is None:
+            for prefix, candidate in self.prefixes:
+                if key.startswith(prefix):
+                    mapping = candidate
+                    break
+        if mapping is None:
+            for _, pattern, candidate in self.patterns:
+                if pattern.fullmatch(key):
+                    mapping = candidate
+                    break
+
+        if len(resolved) >= MAX_RESOLVED_ENTRIES:
+            resolved.clear()
+        resolved[key] = mapping
+        return mapping
+
+
+class InsuranceMappingRegistry:
+    """
+    In-process lookup structure for insurance mapping rules
+
+    Rules are matched exact first, then by the longest matching prefix, then
+    by regex pattern in priority order. Every answer (including misses) is
+    memoized, so repeat lookups are a single dict access. The rule set is
+    reloaded only when the ``registry_versions`` counter changes, checked at
+    most once per ``refresh_interval`` seconds in a background thread; lookups
+    never wait for MongoDB and use the built-in defaults until the first load
+    completes. A reload publishes a new MappingRuleSet with one assignment.
+    """
+
+    def __init__(self, defaults: Optional[Dict[str, Dict[str, Any]]] = None, refresh_interval: float = 30):
+        self.defaults = defaults or {}
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._rules = MappingRuleSet(self.defaults, [])
+
+    @property
+    def version(self) -> Optional[int]:
+        """Registry version of the published rule set (None until loaded)"""
+        return self._rules.version
+
+    def _read_version(self) -> Optional[int]:
+        from .mongo_models import RegistryVersion
+        doc = RegistryVersion.objects(name=REGISTRY_NAME).only('version').first()
+        return doc.version if doc else 0
+
+    def _read_rules(self, version: Optional[int], force: bool = False) -> List[Dict[str, Any]]:
+        from .mongo_models import InsuranceMapping
+        from .reference_cache import mapping_cache
+
+        def load():
+            return [doc.to_mongo().to_dict() for doc in InsuranceMapping.objects]
+
+        if force:
+            rules = load()
+            mapping_cache.set(f'rules:{version}', rules)
+            return rules
+        # Rule sets are immutable per registry version: one process reads them, the others share them
+        return mapping_cache.get_or_set(f'rules:{version}', load)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reload rules if the registry version changed
+
+        Args:
+            force: Skip the refresh interval and always check the version
+
+        Returns:
+            bool indicating whether the rule set was rebuilt
+        """
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.refresh_interval:
+            return False
+
+        with self._lock:
+            if not force and now - self._checked_at < self.refresh_interval:
+                return False
+            self._checked_at = now
+            try:
+                version = self._read_version()
+                if version == self.version and not force:
+                    return False
+                rules = self._read_rules(version, force=force)
+            except Exception as e:
+                # Keep serving the current rule set if MongoDB is unreachable
+                logger.warning(f"Insurance mapping refresh failed: {e}")
+                return False
+
+            # Single reference swap: lookups in flight keep the rule set they started with
+            self._rules = MappingRuleSet(self.defaults, rules, version)
+            logger.info(f"Loaded {len(rules)} insurance mapping rules (version {version})")
+            return True
+
+    def _ensure_fresh(self):
+        """Trigger a background refresh when due (the caller never waits for MongoDB)"""
+        if time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+        with self._thread_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self.refresh, name='insurance-mapping-refresh', daemon=True
+            )
+            self._refresh_thread.start()
+
+    def resolve(self, insurance_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Resolve an insurance ID to its payor mapping
+
+        Args:
+            insurance_id: Insurance ID from the claim
+
+        Returns:
+            Mapping dict (payor_name, payor_url, policy_number, ...) or None
+        """
+        if not insurance_id:
+            return None
+        self._ensure_fresh()
+        return self._rules.resolve(str(insurance_id).strip().upper())
+
+    def all_mappings(self) -> Dict[str, Dict[str, Any]]:
+        """All exact, prefix and pattern rules for display"""
+        self._ensure_fresh()
+        rules = self._rules
+        mappings = {key: mapping for key, mapping in rules.exact.items()}
+        for prefix, mapping in rules.prefixes:
+            mappings[f'{prefix}*'] = mapping
+        for _, pattern, mapping in rules.patterns:
+            mappings[f'/{pattern.pattern}/'] = mapping
+        return mappings
+
+    def bump_version(self) -> int:
+        """Signal every process that the rule set changed"""
+        from .mongo_models import RegistryVersion
+        doc = RegistryVersion._get_collection().find_one_and_update(
+            {'_id': REGISTRY_NAME},
+            {'$inc': {'version': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._checked_at = 0.0
+        return doc['version']
+
+    def upsert_rule(self, match_type: str, value: str, payor_name: str, payor_url: str = None,
+                    policy_number: str = None, priority: int = 100, is_active: bool = True):
+        """Create or update a rule (call bump_version once a batch of changes is done)"""
+        from .mongo_models import InsuranceMapping
+        InsuranceMapping.objects(match_type=match_type, value=value).update_one(
+            upsert=True,
+            set__payor_name=payor_name,
+            set__payor_url=payor_url,
+            set__policy_number=policy_number,
+            set__priority=priority,
+            set__is_active=is_active,
+            set__updated_at=datetime.now()
+        )
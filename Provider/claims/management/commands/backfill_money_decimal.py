@@ -0,0 +1,66 @@
+"""
+Management command to convert stored claim amounts to Decimal128
+"""
+
+from bson import Decimal128
+from django.core.management.base import BaseCommand
+
+MONEY_FIELDS = ['amount_requested', 'amount_approved', 'approved_amount', 'patient_responsibility']
+
+# Amounts written before money fields used Decimal128 are doubles, ints or strings
+LEGACY_TYPES = ['double', 'int', 'long', 'string']
+
+
+def money_expression(field: str):
+    """
+    Aggregation expression for a field as Decimal128 rounded to cents
+
+    Rounds half away from zero like mongo_models.to_money (``$round`` rounds
+    half to even). Values that do not convert (non-numeric strings) are left
+    as they are instead of failing the whole update.
+    """
+    return {'$let': {
+        'vars': {'amount': {'$convert': {'input': f'${field}', 'to': 'decimal', 'onError': None, 'onNull': None}}},
+        'in': {'$cond': [
+            {'$eq': ['$$amount', None]},
+            f'${field}',
+            {'$multiply': [
+                {'$cond': [{'$lt': ['$$amount', 0]}, -1, 1]},
+                {'$floor': {'$add': [{'$multiply': [{'$abs': '$$amount'}, 100]}, Decimal128('0.5')]}},
+                Decimal128('0.01'),
+            ]},
+        ]},
+    }}
+
+
+class Command(BaseCommand):
+    help = 'Rewrite float/int/string claim amounts as Decimal128 rounded to cents'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the documents that would be converted'
+        )
+
+    def handle(self, *args, **options):
+        from claims.mongo_models import Claim
+        collection = Claim._get_collection()
+        
+        for field in MONEY_FIELDS:
+            query = {field: {'$type': LEGACY_TYPES}}
+            
+            if options['dry_run']:
+                count = collection.count_documents(query)
+                self.stdout.write(f'🔍 {field}: {count} documents to convert')
+                continue
+            
+            # Converted on the server with a pipeline update, no documents are read here
+            result = collection.update_many(query, [{'$set': {field: money_expression(field)}}])
+            self.stdout.write(self.style.SUCCESS(f'✅ {field}: converted {result.modified_count} documents'))
+            
+            skipped = collection.count_documents(query)
+            if skipped:
+                self.stdout.write(self.style.WARNING(
+                    f'⚠️ {field}: {skipped} documents are not numeric and were left unchanged'
+                ))
@@ -0,0 +1,435 @@
+"""
+Management command to generate large volumes of synthetic claims data
+"""
+
+import hashlib
+import math
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from bson import Decimal128, ObjectId
+from django.core.management.base import BaseCommand, CommandError
+
+CENTS = Decimal('0.01')
+
+# (diagnosis code, description, procedure code, description, median amount, relative frequency)
+CLINICAL_SCENARIOS = [
+    ('Z00.00', 'Encounter for general adult medical examination without abnormal findings',
+     '99395', 'Periodic comprehensive preventive medicine reevaluation', 225, 18),
+    ('J06.9', 'Acute upper respiratory infection, unspecified',
+     '99213', 'Office visit, established patient, low complexity', 145, 16),
+    ('I10', 'Essential (primary) hypertension',
+     '99214', 'Office visit, established patient, moderate complexity', 195, 14),
+    ('E11.9', 'Type 2 diabetes mellitus without complications',
+     '83036', 'Hemoglobin A1c test', 65, 10),
+    ('M54.5', 'Low back pain',
+     '97110', 'Therapeutic exercises, each 15 minutes', 120, 9),
+    ('M25.50', 'Pain in unspecified joint',
+     '20610', 'Arthrocentesis, major joint', 350, 6),
+    ('K59.00', 'Constipation, unspecified',
+     '99203', 'Office visit, new patient, low complexity', 170, 5),
+    ('F41.1', 'Generalized anxiety disorder',
+     '90834', 'Psychotherapy, 45 minutes', 160, 5),
+    ('F32.9', 'Major depressive disorder, single episode, unspecified',
+     '90837', 'Psychotherapy, 60 minutes', 210, 3),
+    ('N39.0', 'Urinary tract infection, site not specified',
+     '81001', 'Urinalysis with microscopy', 45, 4),
+    ('S93.40', 'Sprain of unspecified ligament of ankle',
+     '73610', 'X-ray of ankle, complete', 260, 3),
+    ('J44.1', 'Chronic obstructive pulmonary disease with acute exacerbation',
+     '94060', 'Spirometry before and after bronchodilator', 310, 2),
+    ('I25.10', 'Atherosclerotic heart disease of native coronary artery',
+     '93306', 'Echocardiography, complete', 1450, 2),
+    ('S83.50', 'Sprain of unspecified cruciate ligament of knee',
+     '73721', 'MRI of lower extremity joint', 1850, 1),
+    ('S72.90', 'Unspecified fracture of unspecified femur',
+     '27236', 'Open treatment of femoral fracture', 14500, 0.5),
+    ('N18.6', 'End stage renal disease',
+     '90935', 'Hemodialysis, single evaluation', 2800, 0.5),
+    ('R06.00', 'Dyspnea, unspecified',
+     '99284', 'Emergency department visit, high severity', 1250, 1),
+]
+
+# Final status, relative frequency, path of intermediate statuses after 'pending'
+STATUS_PATHS = [
+    ('approved', 55, ['under_review', 'approved']),
+    ('pending', 14, []),
+    ('under_review', 10, ['under_review']),
+    ('denied', 9, ['under_review', 'denied']),
+    ('processing', 5, ['processing']),
+    ('rejected', 4, ['rejected']),
+    ('requires_review', 3, ['under_review', 'requires_review']),
+]
+
+PRIORITIES = (['low', 'medium', 'high', 'urgent'], [25, 55, 15, 5])
+
+# Insurance IDs known to the payor mappings, with their market share
+INSURANCE_IDS = (['INS001', 'INS002', 'INS003', 'BC-789-456', 'HI12345'], [30, 25, 15, 20, 10])
+
+PAYOR_NAMES = {
+    'INS001': 'BlueCross BlueShield', 'INS002': 'Aetna Health', 'INS003': 'United Healthcare',
+    'BC-789-456': 'BlueCross BlueShield', 'HI12345': 'Health Insurance Premium',
+}
+
+DENIAL_REASONS = [
+    ('Service not covered under current policy', 'NOT_COVERED'),
+    ('Claim exceeds policy amount limit', 'AMOUNT_LIMIT'),
+    ('Missing prior authorization', 'PRIOR_AUTH'),
+    ('Duplicate claim submission', 'DUPLICATE'),
+]
+
+# Relative frequency per ClaimDocument document type (types missing here get the default)
+DOCUMENT_TYPE_WEIGHTS = {
+    'medical_record': 30, 'invoice': 25, 'lab_report': 15, 'prescription': 10,
+    'receipt': 8, 'referral': 7, 'other': 5,
+}
+DEFAULT_DOCUMENT_TYPE_WEIGHT = 5
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David',
+               'Elizabeth', 'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah',
+               'Carlos', 'Maria', 'Wei', 'Aisha', 'Hiroshi', 'Priya', 'Olga', 'Kwame', 'Fatima', 'Diego']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+              'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Lee',
+              'Chen', 'Patel', 'Nguyen', 'Kim', 'Okafor', 'Ivanova', 'Tanaka', 'Haddad', 'Silva']
+
+# Per-process state set up by _init_worker
+_context = {}
+
+
+def _money(value) -> Decimal128:
+    return Decimal128(Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP))
+
+
+def _cumulative(weights):
+    total = 0
+    result = []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+
+def _init_worker(context):
+    """Process pool initializer: set up Django (spawned workers) and keep the shared context"""
+    import django
+    django.setup()
+    _context.update(context)
+    _context['scenario_weights'] = _cumulative([row[5] for row in CLINICAL_SCENARIOS])
+    _context['status_weights'] = _cumulative([row[1] for row in STATUS_PATHS])
+    _context['priority_weights'] = _cumulative(PRIORITIES[1])
+    # Built from the model choices so generated documents always validate
+    from claims.mongo_models import ClaimDocument
+    document_types = [value for value, _ in ClaimDocument.DOCUMENT_TYPES]
+    _context['document_types'] = document_types
+    _context['document_weights'] = _cumulative([
+        DOCUMENT_TYPE_WEIGHTS.get(value, DEFAULT_DOCUMENT_TYPE_WEIGHT) for value in document_types
+    ])
+    # Zipf-like skew: a few large practices submit most of the claims
+    _context['provider_weights'] = _cumulative([1 / (rank + 1) ** 0.8 for rank in range(len(context['providers']))])
+
+
+def _build_claim(rng: random.Random, index: int):
+    """One claim plus its status history and document metadata"""
+    ctx = _context
+    provider_id, provider_name, provider_email, provider_npi = rng.choices(
+        ctx['providers'], cum_weights=ctx['provider_weights'])[0]
+    patient_id, patient_name, patient_email, insurance_id = ctx['patients'][rng.randrange(len(ctx['patients']))]
+    diagnosis_code, diagnosis_description, procedure_code, procedure_description, median, _ = rng.choices(
+        CLINICAL_SCENARIOS, cum_weights=ctx['scenario_weights'])[0]
+    final_status, _, path = rng.choices(STATUS_PATHS, cum_weights=ctx['status_weights'])[0]
+
+    # Submissions spread over the window, more recent days slightly busier
+    age_days = ctx['days'] * (1 - math.sqrt(rng.random()))
+    date_submitted = ctx['end'] - timedelta(days=age_days, seconds=rng.randrange(86400))
+    date_of_service = date_submitted - timedelta(days=rng.randint(0, 30), hours=rng.randint(0, 12))
+    amount = Decimal(str(round(max(rng.lognormvariate(math.log(median), 0.45), 10.0), 2)))
+
+    claim_oid = ObjectId()
+    claim = {
+        '_id': claim_oid,
+        'claim_id': uuid.UUID(int=rng.getrandbits(128), version=4),
+        'claim_number': f"CLM-{date_submitted.year}-{ctx['first_seq'] + index:03d}",
+        'patient_id': patient_id,
+        'provider_id': provider_id,
+        'patient_name': patient_name,
+        'patient_email': patient_email,
+        'provider_name': provider_name,
+        'provider_email': provider_email,
+        'insurance_id': insurance_id,
+        'diagnosis_codes': [{'code': diagnosis_code, 'description': diagnosis_description}],
+        'procedure_codes': [{'code': procedure_code, 'description': procedure_description}],
+        'diagnosis_code': diagnosis_code,
+        'diagnosis_description': diagnosis_description,
+        'procedure_code': procedure_code,
+        'procedure_description': procedure_description,
+        'amount_requested': _money(amount),
+        'patient_responsibility': _money(0),
+        'status': final_status,
+        'priority': rng.choices(PRIORITIES[0], cum_weights=ctx['priority_weights'])[0],
+        'date_of_service': date_of_service,
+        'date_submitted': date_submitted,
+        'date_updated': date_submitted,
+        'provider_npi': provider_npi,
+        'provider_tax_id': f"{rng.randint(10, 99)}-{rng.randint(1000000, 9999999)}",
+        'submitted_to_payor': False,
+    }
+
+    history = []
+    changed_at = date_submitted
+    previous = None
+    for status in ['pending'] + path:
+        history.append({
+            '_id': ObjectId(), 'claim_id': claim_oid, 'provider_id': provider_id,
+            'previous_status': previous, 'new_status': status,
+            'changed_by_name': provider_name if previous is None else 'Payor System',
+            'changed_at': changed_at,
+            'notes': 'Claim created' if previous is None else 'Payor status update',
+        })
+        if previous is None:
+            history[-1]['changed_by_id'] = provider_id
+        previous = status
+        changed_at += timedelta(hours=rng.uniform(2, 96))
+
+    if path:
+        claim.update({
+            'submitted_to_payor': True,
+            'payor_claim_id': f"PAY-{rng.getrandbits(48):012X}",
+            'payor_name': PAYOR_NAMES.get(insurance_id, 'BlueCross BlueShield'),
+            'payor_submission_date': date_submitted + timedelta(minutes=rng.randint(1, 90)),
+            'date_updated': history[-1]['changed_at'],
+        })
+    if final_status == 'approved':
+        approved = (amount * Decimal(str(rng.uniform(0.7, 1.0)))).quantize(CENTS)
+        claim.update({
+            'amount_approved': _money(approved),
+            'approved_amount': _money(approved),
+            'patient_responsibility': _money(amount - approved),
+            'date_processed': claim['date_updated'],
+            'approval_date': claim['date_updated'],
+        })
+    elif final_status in ('denied', 'rejected'):
+        reason, code = DENIAL_REASONS[rng.randrange(len(DENIAL_REASONS))]
+        claim.update({
+            'amount_approved': _money(0),
+            'patient_responsibility': _money(amount),
+            'denial_reason': reason,
+            'rejection_reason': reason,
+            'reason_code': code,
+            'date_processed': claim['date_updated'],
+            'denial_date': claim['date_updated'],
+        })
+
+    documents = []
+    if ctx['blobs'] and rng.random() < ctx['document_rate']:
+        for _ in range(rng.choice((1, 1, 1, 2, 2, 3))):
+            content_hash, relative_path, size, extension, content_type = ctx['blobs'][rng.randrange(len(ctx['blobs']))]
+            document_type = rng.choices(ctx['document_types'], cum_weights=ctx['document_weights'])[0]
+            documents.append({
+                '_id': ObjectId(), 'claim_id': claim_oid, 'document_type': document_type,
+                'filename': f"{document_type}_{claim['claim_number']}{extension}",
+                'file_path': relative_path, 'file_size': size,
+                'content_hash': content_hash, 'content_type': content_type,
+                'uploaded_at': date_submitted + timedelta(minutes=rng.randint(0, 240)),
+                'uploaded_by_id': provider_id, 'uploaded_by_name': provider_name,
+            })
+
+    return claim, history, documents
+
+
+def _generate_chunk(start: int, size: int, seed: int, batch_size: int):
+    """
+    Generate and insert claims [start, start + size) in insert_many batches
+
+    Returns:
+        (claims, status history entries, documents) inserted
+    """
+    from claims.mongo_models import Claim, ClaimStatusHistory, ClaimDocument
+
+    claims_collection = Claim._get_collection()
+    history_collection = ClaimStatusHistory._get_collection()
+    documents_collection = ClaimDocument._get_collection()
+
+    # Seeded per chunk, so the output does not depend on how chunks are scheduled
+    rng = random.Random(seed * 1_000_003 + start)
+    totals = [0, 0, 0]
+    for batch_start in range(start, start + size, batch_size):
+        claims, history, documents = [], [], []
+        for index in range(batch_start, min(batch_start + batch_size, start + size)):
+            claim, claim_history, claim_documents = _build_claim(rng, index)
+            claims.append(claim)
+            history.extend(claim_history)
+            documents.extend(claim_documents)
+
+        claims_collection.insert_many(claims, ordered=False)
+        history_collection.insert_many(history, ordered=False)
+        if documents:
+            documents_collection.insert_many(documents, ordered=False)
+        totals[0] += len(claims)
+        totals[1] += len(history)
+        totals[2] += len(documents)
+    return tuple(totals)
+
+
+class Command(BaseCommand):
+    help = 'Generate synthetic users, claims, status histories and documents for load and performance testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100000, help='Number of claims (default 100000)')
+        parser.add_argument('--providers', type=int, default=50, help='Number of provider users (default 50)')
+        parser.add_argument('--patients', type=int, help='Number of patient users (default count / 20)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed (default 42)')
+        parser.add_argument('--days', type=int, default=365, help='Spread submissions over the last N days')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Worker processes')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Claims per insert_many batch')
+        parser.add_argument('--document-rate', type=float, default=0.3,
+                            help='Fraction of claims with attached documents (default 0.3)')
+        parser.add_argument('--document-blobs', type=int, default=25,
+                            help='Distinct document files written to the document store and shared by claims')
+
+    def handle(self, *args, **options):
+        from claims.mongo_models import ClaimCounter, utcnow
+        from claims.response_cache import claim_list_cache
+
+        count = options['count']
+        if count <= 0 or options['providers'] <= 0:
+            raise CommandError('--count and --providers must be positive')
+        seed = options['seed']
+        rng = random.Random(seed)
+        started = time.perf_counter()
+
+        providers, patients = self.create_users(rng, options['providers'], options['patients'] or max(count // 20, 1))
+        blobs = self.create_document_blobs(rng, options['document_blobs'])
+
+        end = utcnow()
+        years = range((end - timedelta(days=options['days'])).year, end.year + 1)
+        prefixes = [f'CLM-{year}-' for year in years]
+
+        # Claim numbers continue after every existing counter and claim of the covered years
+        counters = ClaimCounter._get_collection()
+        highest = 0
+        for prefix in prefixes:
+            doc = counters.find_one({'_id': prefix}) or {}
+            highest = max(highest, doc.get('seq', 0), ClaimCounter._highest_existing(prefix))
+        first_seq = highest + 1
+
+        context = {
+            'providers': providers, 'patients': patients, 'blobs': blobs,
+            'document_rate': options['document_rate'], 'days': options['days'], 'end': end,
+            'first_seq': first_seq,
+        }
+
+        batch_size = max(options['batch_size'], 1)
+        workers = max(options['workers'], 1)
+        # Several chunks per worker keeps the pool busy until the end
+        chunk_size = max(batch_size, math.ceil(count / (workers * 4)))
+        chunks = [(start, min(chunk_size, count - start)) for start in range(0, count, chunk_size)]
+
+        self.stdout.write(f'🏭 Generating {count} claims with {workers} workers ({len(chunks)} chunks)...')
+        totals = [0, 0, 0]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(context,)) as pool:
+            futures = [pool.submit(_generate_chunk, start, size, seed, batch_size) for start, size in chunks]
+            for future in as_completed(futures):
+                for n, value in enumerate(future.result()):
+                    totals[n] += value
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'   {totals[0]}/{count} claims ({totals[0] / elapsed * 60:,.0f}/min)')
+
+        # Keep the counters ahead of the generated numbers so new claims do not collide
+        last_seq = first_seq + count - 1
+        for prefix in prefixes:
+            counters.update_one({'_id': prefix}, {'$max': {'seq': last_seq}}, upsert=True)
+        # Raw inserts bypass Claim.save, so cached claim lists are invalidated here
+        claim_list_cache.bump_all()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Inserted {totals[0]} claims, {totals[1]} status history entries, {totals[2]} documents, '
+            f'{len(providers)} providers and {len(patients)} patients in {elapsed:.1f}s '
+            f'({totals[0] / elapsed * 60:,.0f} claims/min)'
+        ))
+        self.stdout.write('💡 Run rollup_claim_analytics --full to rebuild the dashboard summaries')
+
+    def create_users(self, rng: random.Random, provider_count: int, patient_count: int):
+        """
+        Insert provider and patient users
+
+        Returns:
+            (providers, patients) as tuples of the fields copied onto claims
+        """
+        from django.contrib.auth.hashers import make_password
+        from claims.mongo_models import User
+        from claims.reference_cache import user_cache
+
+        collection = User._get_collection()
+        # Hashing is slow by design; every synthetic user shares one password hash
+        password = make_password('password123')
+        run = uuid.UUID(int=rng.getrandbits(128)).hex[:6]
+        now = datetime.now()
+
+        providers = []
+        documents = []
+        for n in range(provider_count):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            username = f'syn{run}_provider{n}'
+            doc = {
+                '_id': ObjectId(), 'username': username, 'email': f'{username}@example.com',
+                'first_name': f'Dr. {first}'[:30], 'last_name': last, 'password': password,
+                'role': 'provider', 'phone': f'(555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}',
+                'is_active': True, 'is_staff': True, 'is_superuser': False, 'date_joined': now,
+            }
+            documents.append(doc)
+            providers.append((doc['_id'], f"{doc['first_name']} {last}", doc['email'],
+                              str(rng.randint(10 ** 9, 10 ** 10 - 1))))
+
+        patients = []
+        for n in range(patient_count):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            username = f'syn{run}_patient{n}'
+            insurance_id = rng.choices(INSURANCE_IDS[0], weights=INSURANCE_IDS[1])[0]
+            doc = {
+                '_id': ObjectId(), 'username': username, 'email': f'{username}@example.com',
+                'first_name': first, 'last_name': last, 'password': password, 'role': 'patient',
+                'insurance_id': insurance_id,
+                'date_of_birth': now - timedelta(days=int(365.25 * min(max(rng.gauss(45, 18), 1), 95))),
+                'is_active': True, 'is_staff': False, 'is_superuser': False, 'date_joined': now,
+            }
+            documents.append(doc)
+            patients.append((doc['_id'], f'{first} {last}', doc['email'], insurance_id))
+
+        for start in range(0, len(documents), 10000):
+            collection.insert_many(documents[start:start + 10000], ordered=False)
+        # Raw inserts bypass User.save; cached misses for these usernames must go
+        user_cache.bump()
+        self.stdout.write(f'👥 Created {provider_count} providers and {patient_count} patients (syn{run}_*)')
+        return providers, patients
+
+    def create_document_blobs(self, rng: random.Random, count: int):
+        """
+        Write a pool of document files to the content-addressed store
+
+        Returns:
+            List of (sha256, relative path, size, extension, content type)
+        """
+        from claims.document_storage import document_storage
+
+        kinds = [('.pdf', 'application/pdf', b'%PDF-1.4\n'), ('.jpg', 'image/jpeg', b'\xff\xd8\xff\xe0'),
+                 ('.png', 'image/png', b'\x89PNG\r\n\x1a\n')]
+        blobs = []
+        for _ in range(count):
+            extension, content_type, header = rng.choice(kinds)
+            size = int(min(max(rng.lognormvariate(math.log(150_000), 1.0), 2_000), 5_000_000))
+            content = header + rng.randbytes(size - len(header))
+            sha256 = hashlib.sha256(content).hexdigest()
+            relative_path = document_storage.relative_path(sha256)
+            if not document_storage.exists(sha256):
+                target = document_storage.path(relative_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(content)
+            blobs.append((sha256, relative_path, size, extension, content_type))
+        return blobs
@@ -0,0 +1,71 @@
+"""
+Management command to load insurance mapping rules into MongoDB
+"""
+
+from django.core.management.base import BaseCommand
+import json
+
+
+class Command(BaseCommand):
+    help = 'Import insurance ID to payor mapping rules into the insurance_mappings collection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=str,
+            help='JSON file with a list of rules '
+                 '({"match_type", "value", "payor_name", "payor_url", "policy_number", "priority", "is_active"})'
+        )
+        parser.add_argument(
+            '--seed-defaults',
+            action='store_true',
+            help='Store the built-in insurance mappings as exact rules'
+        )
+
+    def handle(self, *args, **options):
+        from claims.payor_integration import payor_service
+        registry = payor_service.insurance_registry
+        
+        rules = []
+        if options['seed_defaults']:
+            for insurance_id, mapping in payor_service.insurance_mappings.items():
+                rules.append({
+                    'match_type': 'exact',
+                    'value': insurance_id,
+                    'payor_name': mapping['payor_name'],
+                    'policy_number': mapping.get('policy_number'),
+                    'is_active': mapping.get('is_active', True),
+                })
+        
+        if options['file']:
+            try:
+                with open(options['file'], 'r', encoding='utf-8') as f:
+                    rules.extend(json.load(f))
+            except (OSError, ValueError) as e:
+                self.stdout.write(self.style.ERROR(f'❌ Could not read {options["file"]}: {e}'))
+                return
+        
+        if not rules:
+            self.stdout.write(self.style.ERROR('❌ Nothing to import, use --file and/or --seed-defaults'))
+            return
+        
+        try:
+            for rule in rules:
+                registry.upsert_rule(
+                    match_type=rule.get('match_type', 'exact'),
+                    value=rule['value'],
+                    payor_name=rule['payor_name'],
+                    payor_url=rule.get('payor_url'),
+                    policy_number=rule.get('policy_number'),
+                    priority=rule.get('priority', 100),
+                    is_active=rule.get('is_active', True),
+                )
+                self.stdout.write(f'   - {rule.get("match_type", "exact")}:{rule["value"]} → {rule["payor_name"]}')
+            
+            version = registry.bump_version()
+            self.stdout.write(
+                self.style.SUCCESS(f'✅ Imported {len(rules)} rules, registry version is now {version}')
+            )
+            
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'❌ Import failed: {str(e)}'))
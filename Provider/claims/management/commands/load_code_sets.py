@@ -0,0 +1,100 @@
+"""
+Management command to install the ICD-10-CM / CPT code-set files used by
+the code-set index (claims.code_sets)
+
+ICD-10-CM is published by CMS as a zip containing icd10cm_codes_<year>.txt;
+CPT is licensed by the AMA and has to come from your own licensed copy.
+"""
+
+import io
+import os
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Install ICD-10-CM and/or CPT code-set files (from a local file, zip or URL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--icd10',
+            type=str,
+            help='ICD-10-CM source: text file, zip or URL (the CMS "code descriptions in tabular order" zip)'
+        )
+        parser.add_argument(
+            '--cpt',
+            type=str,
+            help='CPT source: text file, zip or URL ("<code> <description>" per line)'
+        )
+
+    def handle(self, *args, **options):
+        if not options['icd10'] and not options['cpt']:
+            self.stdout.write(self.style.ERROR('❌ Nothing to load, use --icd10 and/or --cpt'))
+            return
+
+        targets = (
+            ('icd10', options['icd10'], getattr(settings, 'ICD10_CODE_SET_FILE', None), 'icd10cm_codes'),
+            ('cpt', options['cpt'], getattr(settings, 'CPT_CODE_SET_FILE', None), 'cpt'),
+        )
+        for code_type, source, target, member_hint in targets:
+            if not source:
+                continue
+            if not target:
+                self.stdout.write(self.style.ERROR(f'❌ No target file configured for {code_type}'))
+                continue
+            try:
+                lines = self._read_source(source, member_hint)
+                count = self._write_codes(lines, target)
+                self.stdout.write(self.style.SUCCESS(f'✅ Installed {count} {code_type} codes into {target}'))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'❌ Could not load {code_type} codes from {source}: {e}'))
+
+        self.stdout.write('   Restart the application processes to load the new code sets')
+
+    def _read_source(self, source, member_hint):
+        """Text lines of a code file, a zip containing one, or a URL to either"""
+        if source.startswith(('http://', 'https://')):
+            import requests
+            response = requests.get(source, timeout=120)
+            response.raise_for_status()
+            data = response.content
+        else:
+            with open(source, 'rb') as f:
+                data = f.read()
+
+        if zipfile.is_zipfile(io.BytesIO(data)):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                names = [name for name in archive.namelist() if name.lower().endswith('.txt')]
+                # Prefer the plain code list over the "order" and addenda files
+                preferred = [name for name in names if member_hint in os.path.basename(name).lower()
+                             and 'addend' not in name.lower()]
+                if not (preferred or names):
+                    raise ValueError('zip contains no .txt code file')
+                data = archive.read((preferred or names)[0])
+
+        return data.decode('utf-8', errors='replace').splitlines()
+
+    def _write_codes(self, lines, target):
+        """Write "<code> <description>" lines atomically, returning the code count"""
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        count = 0
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as out:
+                for line in lines:
+                    parts = line.split(None, 1)
+                    if not parts:
+                        continue
+                    description = parts[1].strip() if len(parts) > 1 else ''
+                    out.write(f'{parts[0].upper()} {description}\n')
+                    count += 1
+            if not count:
+                raise ValueError('source contains no codes')
+            os.replace(temp_path, target)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+        return count
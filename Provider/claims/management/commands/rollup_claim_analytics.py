@@ -0,0 +1,34 @@
+"""
+Management command to pre-aggregate claims into daily summaries
+(UTC days; schedule it, e.g. hourly from cron - requests never run a rollup)
+"""
+
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Summarize closed days of claims into the claim_daily_summaries collection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='Recompute the last N days instead of only the pending ones'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild all summaries from the earliest claim'
+        )
+
+    def handle(self, *args, **options):
+        from claims.analytics import claim_analytics, utcnow
+        
+        if options['days']:
+            today = utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+            written = claim_analytics.rollup(today - timedelta(days=options['days']), today)
+        else:
+            written = claim_analytics.rollup_pending(full=options['full'])
+        
+        self.stdout.write(self.style.SUCCESS(f'✅ Wrote {written} daily claim summaries'))
@@ -0,0 +1,332 @@
+"""
+Request Metrics
+In-process latency histograms and counters for views, MongoDB commands and
+outbound payor HTTP calls, a per-request timing breakdown exported as a
+Server-Timing header, and Prometheus text rendering for /api/metrics.
+
+Metrics are kept per process; with several workers every worker exposes its
+own series (scrape each worker, or sum them in the Prometheus query).
+"""
+
+import contextvars
+import threading
+import time
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from pymongo import monitoring
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [bucket counts..., +Inf count, sum]
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for n, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[n] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{_format_labels(key, ("le", repr(float(bound))))} {count}')
+            lines.append(f'{self.name}_bucket{_format_labels(key, ("le", "+Inf"))} {values[-2]}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {values[-1]:.6f}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {values[-2]}')
+        return '\n'.join(lines)
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._series: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            series = dict(self._series)
+        for key, value in sorted(series.items()):
+            lines.append(f'{self.name}{_format_labels(key)} {value:g}')
+        return '\n'.join(lines)
+
+
+# Metric families
+http_request_duration = Histogram('provider_http_request_duration_seconds', 'Request latency by view')
+mongo_command_duration = Histogram('provider_mongo_command_duration_seconds', 'MongoDB command latency by command')
+mongo_command_failures = Counter('provider_mongo_command_failures_total', 'Failed MongoDB commands by command')
+payor_request_duration = Histogram('provider_payor_request_duration_seconds', 'Outbound payor HTTP latency by method')
+payor_request_errors = Counter('provider_payor_request_errors_total', 'Outbound payor HTTP calls without a response')
+
+METRICS = (http_request_duration, mongo_command_duration, mongo_command_failures,
+           payor_request_duration, payor_request_errors)
+
+
+class RequestTimings:
+    """Time spent in the database, payor calls and rendering for one request"""
+
+    __slots__ = ('db', 'db_count', 'payor', 'payor_count', 'serialize', '_render_started')
+
+    def __init__(self):
+        self.db = 0.0
+        self.db_count = 0
+        self.payor = 0.0
+        self.payor_count = 0
+        self.serialize = 0.0
+        self._render_started = None
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value (durations in ms)"""
+        return ', '.join([
+            f'db;dur={self.db * 1000:.1f};desc="MongoDB ({self.db_count} cmd)"',
+            f'payor;dur={self.payor * 1000:.1f};desc="Payor HTTP ({self.payor_count} req)"',
+            f'serialize;dur={self.serialize * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+_current_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    'request_timings', default=None
+)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being handled, if any"""
+    return _current_timings.get()
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    pymongo command listener feeding the command histogram and the timings
+    of the current request
+
+    Listeners are called on the thread (or task) running the command, so the
+    request context variable is visible here.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        mongo_command_failures.inc(command=event.command_name)
+        self._record(event.command_name, event.duration_micros / 1e6)
+
+    def _record(self, command_name: str, duration: float):
+        mongo_command_duration.observe(duration, command=command_name)
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.db += duration
+            timings.db_count += 1
+
+
+# Global instance
+command_metrics = MongoCommandMetrics()
+
+
+def record_payor_request(method: str, duration: Optional[float], status: Optional[int] = None):
+    """
+    Record one outbound payor HTTP call
+
+    Args:
+        method: HTTP method
+        duration: Seconds until the response arrived (None when the call failed)
+        status: Response status code
+    """
+    method = method.upper()
+    if duration is None:
+        payor_request_errors.inc(method=method)
+        return
+    status_class = f'{status // 100}xx' if status else 'none'
+    payor_request_duration.observe(duration, method=method, status=status_class)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.payor += duration
+        timings.payor_count += 1
+
+
+def _view_label(request) -> str:
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route or 'unknown'
+
+
+class MetricsMiddleware:
+    """
+    Record request latency per view and add a Server-Timing header
+
+    Rendering of template/DRF responses is measured as serialization time
+    (between process_template_response and the post-render callback).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - started)
+
+    def process_template_response(self, request, response):
+        timings = _current_timings.get()
+        if timings is not None:
+            timings._render_started = time.perf_counter()
+
+            def rendered(response):
+                timings.serialize += time.perf_counter() - timings._render_started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _finish(self, request, response, timings: RequestTimings, total: float):
+        http_request_duration.observe(
+            total,
+            view=_view_label(request),
+            method=request.method,
+            status=f'{response.status_code // 100}xx',
+        )
+        response['Server-Timing'] = timings.server_timing(total)
+        return response
+
+
+def _pool_metrics_text() -> str:
+    from .mongo_connection import pool_metrics, WAIT_BUCKETS_MS
+
+    stats = pool_metrics.stats()
+    lines = [
+        '# HELP provider_mongo_pool_checkout_wait_seconds Time spent waiting for a MongoDB connection',
+        '# TYPE provider_mongo_pool_checkout_wait_seconds histogram',
+    ]
+    cumulative = 0
+    for bound in WAIT_BUCKETS_MS:
+        cumulative += stats['wait_histogram_ms'][f'le_{bound}']
+        lines.append(f'provider_mongo_pool_checkout_wait_seconds_bucket{{le="{bound / 1000}"}} {cumulative}')
+    cumulative += stats['wait_histogram_ms']['le_inf']
+    lines.append(f'provider_mongo_pool_checkout_wait_seconds_bucket{{le="+Inf"}} {cumulative}')
+    lines.append(f'provider_mongo_pool_checkout_wait_seconds_sum {stats["wait_total_ms"] / 1000:.6f}')
+    lines.append(f'provider_mongo_pool_checkout_wait_seconds_count {cumulative}')
+
+    for name, key, kind in (
+        ('provider_mongo_pool_checkout_timeouts_total', 'checkout_timeouts', 'counter'),
+        ('provider_mongo_pool_checkout_failures_total', 'checkout_failures', 'counter'),
+        ('provider_mongo_pool_connections_created_total', 'connections_created', 'counter'),
+        ('provider_mongo_pool_checked_out', 'checked_out', 'gauge'),
+    ):
+        lines.append(f'# TYPE {name} {kind}')
+        lines.append(f'{name} {stats[key]}')
+    return '\n'.join(lines)
+
+
+def _cache_metrics_text() -> str:
+    from .reference_cache import REFERENCE_CACHES
+    from .response_cache import claim_list_cache
+
+    name = 'provider_cache_lookups_total'
+    lines = [f'# HELP {name} Cache lookups by cache and result', f'# TYPE {name} counter']
+    list_stats = claim_list_cache.stats()
+    lines.append(f'{name}{{cache="claim_lists",result="hit"}} {list_stats["hits"]}')
+    lines.append(f'{name}{{cache="claim_lists",result="miss"}} {list_stats["misses"]}')
+    for reference_cache in REFERENCE_CACHES:
+        stats = reference_cache.stats()
+        for result, key in (('l1_hit', 'l1_hits'), ('l2_hit', 'l2_hits'), ('miss', 'misses')):
+            lines.append(f'{name}{{cache="{stats["namespace"]}",result="{result}"}} {stats[key]}')
+    return '\n'.join(lines)
+
+
+def _payor_pool_metrics_text() -> str:
+    from .http import payor_pools
+
+    lines = []
+    for name, key, kind in (
+        ('provider_payor_pool_active_requests', 'active', 'gauge'),
+        ('provider_payor_pool_rejected_total', 'rejected', 'counter'),
+    ):
+        lines.append(f'# TYPE {name} {kind}')
+        # Pools are keyed by payor name (or endpoint for unnamed payor-system calls)
+        for payor, stats in sorted(payor_pools.stats().items()):
+            lines.append(f'{name}{_format_labels(_labels({"payor": payor, "url": stats["url"]}))} {stats[key]}')
+    return '\n'.join(lines)
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    sections = [metric.render() for metric in METRICS]
+    sections.append(_pool_metrics_text())
+    sections.append(_cache_metrics_text())
+    sections.append(_payor_pool_metrics_text())
+    return '\n'.join(sections) + '\n'
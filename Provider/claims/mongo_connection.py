@@ -0,0 +1,221 @@
+"""
+MongoDB Connection Setup
+Registers the MongoEngine connection lazily (the client is only created on
+first use), keeps it fork-safe and records connection pool checkout waits
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Any
+
+import mongoengine
+from mongoengine import connection as mongo_connection
+from pymongo import monitoring
+
+from .metrics import command_metrics
+from .query_budget import query_trace_listener
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool listener tracking how long requests wait for a connection
+
+    A growing checkout wait means the pool is too small for the number of
+    concurrent requests (raise MONGO_MAX_POOL_SIZE) or queries hold
+    connections for too long.
+    """
+
+    def __init__(self, slow_checkout_ms: float = 100):
+        self.slow_checkout_ms = slow_checkout_ms
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checkout_timeouts = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.checked_out = 0
+            self.pool_clears = 0
+
+    def _observe_wait(self, duration_ms: float):
+        for n, bound in enumerate(WAIT_BUCKETS_MS):
+            if duration_ms <= bound:
+                self.wait_buckets[n] += 1
+                break
+        else:
+            self.wait_buckets[-1] += 1
+        self.wait_total_ms += duration_ms
+        self.wait_max_ms = max(self.wait_max_ms, duration_ms)
+
+    def connection_checked_out(self, event):
+        # event.duration (seconds) covers the whole checkout, including the wait in the queue
+        duration_ms = (getattr(event, 'duration', 0) or 0) * 1000
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self._observe_wait(duration_ms)
+        if duration_ms >= self.slow_checkout_ms:
+            logger.warning(f"⏳ Waited {duration_ms:.1f} ms for a MongoDB connection ({event.address})")
+
+    def connection_check_out_failed(self, event):
+        duration_ms = (getattr(event, 'duration', 0) or 0) * 1000
+        with self._lock:
+            self.checkout_failures += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self.checkout_timeouts += 1
+            self._observe_wait(duration_ms)
+        logger.warning(f"MongoDB connection checkout failed after {duration_ms:.1f} ms: {event.reason}")
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    # Remaining pool events are not tracked
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool metrics for monitoring"""
+        with self._lock:
+            observed = self.checkouts + self.checkout_failures
+            return {
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'checkout_timeouts': self.checkout_timeouts,
+                'checked_out': self.checked_out,
+                'wait_avg_ms': round(self.wait_total_ms / observed, 3) if observed else 0,
+                'wait_max_ms': round(self.wait_max_ms, 3),
+                'wait_total_ms': round(self.wait_total_ms, 3),
+                'wait_histogram_ms': {
+                    **{f'le_{bound}': count for bound, count in zip(WAIT_BUCKETS_MS, self.wait_buckets)},
+                    'le_inf': self.wait_buckets[-1],
+                },
+                'connections_created': self.connections_created,
+                'connections_closed': self.connections_closed,
+                'pool_clears': self.pool_clears,
+            }
+
+
+# Global instance
+pool_metrics = PoolMetrics()
+
+_configured = False
+
+# Host, database and client options, shared with the async client (claims.async_clients)
+client_config: Dict[str, Any] = {}
+
+
+def _reset_after_fork():
+    """
+    Drop clients inherited from the parent process
+
+    MongoClient is not fork-safe; the child gets a fresh client on first use.
+    Documents cache their collection (and with it the client), so those
+    caches are cleared too.
+    """
+    for alias in list(mongo_connection._connections):
+        mongo_connection._connections.pop(alias, None)
+        mongo_connection._dbs.pop(alias, None)
+    from mongoengine.base.common import _document_registry
+    for document in _document_registry.values():
+        if getattr(document, '_collection', None) is not None:
+            document._collection = None
+    pool_metrics.reset()
+
+
+def configure_mongodb(settings) -> Dict[str, Any]:
+    """
+    Register the default MongoEngine connection without connecting
+
+    Args:
+        settings: Django settings (MONGO_* values)
+
+    Returns:
+        Client options used for the connection
+    """
+    global _configured
+    if _configured:
+        return mongo_connection._connection_settings.get('default', {})
+
+    options = {
+        'maxPoolSize': settings.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': settings.MONGO_MIN_POOL_SIZE,
+        'maxIdleTimeMS': settings.MONGO_MAX_IDLE_TIME_MS,
+        'waitQueueTimeoutMS': settings.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'appname': settings.MONGO_APP_NAME,
+        'event_listeners': [pool_metrics, command_metrics, query_trace_listener],
+    }
+    if settings.MONGO_COMPRESSORS:
+        options['compressors'] = settings.MONGO_COMPRESSORS
+
+    if settings.MONGO_USER and settings.MONGO_PASSWORD and settings.MONGO_HOST:
+        # MongoDB Atlas connection string
+        host = (f"mongodb+srv://{settings.MONGO_USER}:{settings.MONGO_PASSWORD}@{settings.MONGO_HOST}/"
+                f"{settings.MONGO_DB_NAME}?retryWrites=true&w=majority")
+    else:
+        # Local MongoDB for development
+        host = settings.MONGO_HOST
+
+    client_config.update({'host': host, 'db': settings.MONGO_DB_NAME, 'options': options})
+
+    # mongoengine.register_connection parses the URI, and parsing a
+    # mongodb+srv:// URI already resolves its DNS records. Store the settings
+    # in the shape register_connection produces instead; MongoEngine creates
+    # the MongoClient (and resolves the host) the first time a document
+    # touches the database
+    try:
+        mongo_connection._check_db_name(settings.MONGO_DB_NAME)
+        mongo_connection._connection_settings['default'] = {
+            'name': settings.MONGO_DB_NAME,
+            'host': host,
+            'read_preference': mongo_connection.READ_PREFERENCE,
+            'uuidRepresentation': 'pythonLegacy',
+            **options,
+        }
+    except Exception as e:
+        logger.error(f"❌ MongoDB connection could not be registered: {e}")
+        return options
+
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_reset_after_fork)
+
+    _configured = True
+    logger.info(f"MongoDB connection registered for {settings.MONGO_DB_NAME} (pool {settings.MONGO_MIN_POOL_SIZE}-{settings.MONGO_MAX_POOL_SIZE})")
+    return options
@@ -5,9 +5,63 @@ These models replace the Django ORM models for better MongoDB compatibility
 
 from mongoengine import Document, EmbeddedDocument, fields
 from django.contrib.auth.models import AbstractUser
-from datetime import datetime
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from bson import Decimal128
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import uuid
 
+from .response_cache import claim_list_cache
+from .reference_cache import user_cache
+
+
+CENTS = Decimal('0.01')
+
+
+def utcnow() -> datetime:
+    """Current UTC time as a naive datetime (how PyMongo returns stored dates)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def to_money(value):
+    """Convert an amount (str, int, float, Decimal or Decimal128) to a Decimal rounded to cents"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, Decimal128):
+        value = value.to_decimal()
+    elif isinstance(value, float):
+        # str() gives the shortest repr, so 0.1 becomes Decimal('0.1') and not its binary expansion
+        value = str(value)
+    return Decimal(value).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+class MoneyField(fields.Decimal128Field):
+    """Monetary amount stored as Decimal128 and exposed as a Decimal rounded to cents"""
+    
+    def to_mongo(self, value):
+        if value is None:
+            return None
+        return Decimal128(to_money(value))
+    
+    def to_python(self, value):
+        try:
+            return to_money(value)
+        except (InvalidOperation, TypeError, ValueError):
+            return value
+    
+    def validate(self, value):
+        try:
+            value = to_money(value)
+        except (InvalidOperation, TypeError, ValueError) as exc:
+            self.error(f"Could not convert value to a monetary amount: {exc}")
+        
+        if self.min_value is not None and value < self.min_value:
+            self.error("Decimal value is too small")
+        
+        if self.max_value is not None and value > self.max_value:
+            self.error("Decimal value is too large")
+
 
 class User(Document):
     """MongoEngine User model for MongoDB"""
@@ -43,6 +97,13 @@ class User(Document):
         'indexes': ['username', 'email', 'role']
     }
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Users are cached by username and id (including misses) in every process's
+        # local tier; a namespace bump is the one change those lookups all check
+        user_cache.bump()
+        return self
+    
     def __str__(self):
         return f"{self.username} ({self.role})"
 
@@ -102,10 +163,10 @@ class Claim(Document):
     procedure_description = fields.StringField()
     
     # Financial information
-    amount_requested = fields.DecimalField(min_value=0.01, precision=2)
-    amount_approved = fields.DecimalField(min_value=0, precision=2)
-    approved_amount = fields.DecimalField(min_value=0, precision=2)  # From payor webhook
-    patient_responsibility = fields.DecimalField(min_value=0, precision=2, default=0)  # From payor
+    amount_requested = MoneyField(min_value=CENTS)
+    amount_approved = MoneyField(min_value=0)
+    approved_amount = MoneyField(min_value=0)  # From payor webhook
+    patient_responsibility = MoneyField(min_value=0, default=Decimal('0.00'))  # From payor
     
     # Status and priority
     status = fields.StringField(choices=STATUS_CHOICES, default='pending')
@@ -113,7 +174,8 @@ class Claim(Document):
     
     # Dates
     date_of_service = fields.DateTimeField()
-    date_submitted = fields.DateTimeField(default=datetime.now)
+    # UTC, so analytics can bucket submission days with $dateTrunc
+    date_submitted = fields.DateTimeField(default=utcnow)
     date_updated = fields.DateTimeField(default=datetime.now)
     date_processed = fields.DateTimeField()
     approval_date = fields.DateTimeField()  # When approved by payor
@@ -139,50 +201,104 @@ class Claim(Document):
         'collection': 'claims',
         'indexes': [
             'status', 'provider_id', 'patient_id', 'date_submitted', 
-            'claim_number', 'priority'
+            'claim_number', 'priority',
+            # Text index backing claim search
+            {
+                'fields': [
+                    '$patient_name', '$claim_number', '$diagnosis_description',
+                    '$insurance_id', '$diagnosis_code', '$procedure_code'
+                ],
+                'default_language': 'none',
+                'weights': {
+                    'claim_number': 10, 'insurance_id': 8, 'patient_name': 5,
+                    'diagnosis_code': 5, 'procedure_code': 5, 'diagnosis_description': 1
+                },
+                'name': 'claim_search_text'
+            }
         ],
         'ordering': ['-date_submitted']
     }
     
-    def save(self, *args, **kwargs):
+    def save(self, *args, invalidate_cache=True, **kwargs):
+        """
+        Save the claim
+        
+        Args:
+            invalidate_cache: Bump the provider's claim list version (pass False
+                when a later write in the same request bumps it)
+        """
         if not self.claim_number:
-            # Generate unique claim number with retry logic
-            year = datetime.now().year
-            max_attempts = 10
-            
-            for attempt in range(max_attempts):
-                # Get the highest claim number for this year
-                last_claims = Claim.objects(
-                    claim_number__startswith=f'CLM-{year}-'
-                ).order_by('-claim_number').limit(1)
-                
-                if last_claims:
-                    last_num = int(last_claims[0].claim_number.split('-')[-1])
-                    new_num = last_num + 1
-                else:
-                    new_num = 1
-                
-                self.claim_number = f'CLM-{year}-{new_num:03d}'
-                
-                # Check if this claim number already exists
-                existing = Claim.objects(claim_number=self.claim_number).first()
-                if not existing:
-                    break  # Found unique number
-                    
-                # If we reach here, the number exists, try next one
-                if attempt == max_attempts - 1:
-                    # Last attempt, add timestamp to make it unique
-                    import time
-                    timestamp = int(time.time() % 10000)
-                    self.claim_number = f'CLM-{year}-{new_num:03d}-{timestamp}'
+            self.claim_number = ClaimCounter.next_claim_number()
         
         self.date_updated = datetime.now()
         super().save(*args, **kwargs)
+        if invalidate_cache:
+            claim_list_cache.bump(self.provider_id)
+    
+    def set_fields(self, invalidate_cache=True, **updates):
+        """
+        Apply field changes with a single $set (no validation or claim-number logic)
+        
+        The instance is updated in place, so it can be serialized afterwards.
+        """
+        updates['date_updated'] = datetime.now()
+        Claim.objects(id=self.id).update_one(**{f'set__{field}': value for field, value in updates.items()})
+        for field, value in updates.items():
+            setattr(self, field, value)
+        self._clear_changed_fields()
+        if invalidate_cache:
+            claim_list_cache.bump(self.provider_id)
     
     def __str__(self):
         return f"{self.claim_number} - {self.patient_name} - {self.diagnosis_description[:50]}"
 
 
+class ClaimCounter(Document):
+    """Per-year claim number sequence (CLM-<year>-<seq>)"""
+    
+    name = fields.StringField(primary_key=True)  # Claim number prefix, e.g. 'CLM-2025-'
+    seq = fields.IntField(default=0)
+    
+    meta = {
+        'collection': 'claim_counters'
+    }
+    
+    @classmethod
+    def _highest_existing(cls, prefix):
+        """Highest sequence number already used by claims with this prefix"""
+        pipeline = [
+            {'$match': {'claim_number': {'$regex': f'^{prefix}'}}},
+            {'$group': {'_id': None, 'seq': {'$max': {'$convert': {
+                'input': {'$arrayElemAt': [{'$split': ['$claim_number', '-']}, 2]},
+                'to': 'int', 'onError': 0, 'onNull': 0
+            }}}}},
+        ]
+        rows = list(Claim._get_collection().aggregate(pipeline))
+        return rows[0]['seq'] if rows else 0
+    
+    @classmethod
+    def next_claim_number(cls, year=None):
+        """Atomically allocate the next claim number for the year"""
+        prefix = f'CLM-{year or datetime.now().year}-'
+        collection = cls._get_collection()
+        doc = collection.find_one_and_update(
+            {'_id': prefix}, {'$inc': {'seq': 1}}, return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            # First claim of the year in this database: continue after existing claims
+            try:
+                collection.insert_one({'_id': prefix, 'seq': cls._highest_existing(prefix)})
+            except DuplicateKeyError:
+                pass  # Another process seeded it first
+            doc = collection.find_one_and_update(
+                {'_id': prefix}, {'$inc': {'seq': 1}}, return_document=ReturnDocument.AFTER
+            )
+        return f"{prefix}{doc['seq']:03d}"
+    
+    def __str__(self):
+        return f"{self.name}{self.seq:03d}"
+
+
 class ClaimDocument(Document):
     """MongoEngine model for claim documents"""
     
@@ -201,13 +317,15 @@ class ClaimDocument(Document):
     filename = fields.StringField(max_length=255, required=True)
     file_path = fields.StringField()  # Path to file storage
     file_size = fields.IntField()
+    content_hash = fields.StringField(max_length=64)  # SHA-256 of the content (storage key)
+    content_type = fields.StringField(max_length=255)
     uploaded_at = fields.DateTimeField(default=datetime.now)
     uploaded_by_id = fields.ObjectIdField(required=True)
     uploaded_by_name = fields.StringField(max_length=100)
     
     meta = {
         'collection': 'claim_documents',
-        'indexes': ['claim_id', 'document_type', 'uploaded_at']
+        'indexes': ['claim_id', 'document_type', 'uploaded_at', ('claim_id', 'content_hash')]
     }
     
     def __str__(self):
@@ -218,18 +336,101 @@ class ClaimStatusHistory(Document):
     """MongoEngine model for claim status history"""
     
     claim_id = fields.ObjectIdField(required=True)
-    previous_status = fields.StringField(choices=Claim.STATUS_CHOICES)
-    new_status = fields.StringField(choices=Claim.STATUS_CHOICES, required=True)
-    changed_by_id = fields.ObjectIdField(required=True)
+    provider_id = fields.ObjectIdField()  # Copied from the claim for provider-wide queries
+    previous_status = fields.StringField()
+    new_status = fields.StringField(required=True)
+    changed_by_id = fields.ObjectIdField()  # Empty for payor/system changes
     changed_by_name = fields.StringField(max_length=100)
     changed_at = fields.DateTimeField(default=datetime.now)
     notes = fields.StringField()
     
     meta = {
         'collection': 'claim_status_history',
-        'indexes': ['claim_id', 'changed_at'],
+        'indexes': [
+            ('claim_id', 'changed_at'),
+            ('provider_id', 'changed_at'),
+            'changed_at'
+        ],
         'ordering': ['-changed_at']
     }
     
     def __str__(self):
-        return f"Status change: {self.previous_status} → {self.new_status}"
\ No newline at end of file
+        return f"Status change: {self.previous_status} → {self.new_status}"
+
+class InsuranceMapping(Document):
+    """MongoEngine model for insurance ID to payor routing rules"""
+    
+    MATCH_TYPES = [
+        ('exact', 'Exact'),
+        ('prefix', 'Prefix'),
+        ('pattern', 'Pattern'),
+    ]
+    
+    match_type = fields.StringField(choices=MATCH_TYPES, default='exact')
+    value = fields.StringField(required=True, max_length=100)  # Insurance ID, prefix or regex
+    payor_name = fields.StringField(required=True, max_length=100)
+    payor_url = fields.StringField()  # Empty means the configured PAYOR_BASE_URL
+    policy_number = fields.StringField(max_length=50)  # Policy in the local catalog
+    priority = fields.IntField(default=100)  # Lower wins when several pattern rules match
+    is_active = fields.BooleanField(default=True)
+    updated_at = fields.DateTimeField(default=datetime.now)
+    
+    meta = {
+        'collection': 'insurance_mappings',
+        'indexes': [
+            {'fields': ['match_type', 'value'], 'unique': True}
+        ]
+    }
+    
+    def __str__(self):
+        return f"{self.match_type}:{self.value} → {self.payor_name}"
+
+
+class RegistryVersion(Document):
+    """Version counters used to detect changes to cached reference data"""
+    
+    name = fields.StringField(primary_key=True)
+    version = fields.IntField(default=0)
+    
+    meta = {
+        'collection': 'registry_versions'
+    }
+    
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class ClaimDailySummary(Document):
+    """Pre-aggregated claim counts and amounts per provider, day and status"""
+    
+    day = fields.DateTimeField(required=True)  # Midnight of the submission day
+    provider_id = fields.ObjectIdField()
+    statuses = fields.ListField(fields.DictField(), default=list)  # {status, count, amount_requested, amount_approved}
+    claim_count = fields.IntField(default=0)
+    computed_at = fields.DateTimeField(default=datetime.now)
+    
+    meta = {
+        'collection': 'claim_daily_summaries',
+        'indexes': [
+            {'fields': ('provider_id', 'day'), 'unique': True},
+            'day'
+        ]
+    }
+    
+    def __str__(self):
+        return f"{self.day:%Y-%m-%d} {self.provider_id}: {self.claim_count} claims"
+
+
+class AnalyticsState(Document):
+    """Bookkeeping for analytics rollups (last day summarized)"""
+    
+    name = fields.StringField(primary_key=True)
+    rolled_up_through = fields.DateTimeField()  # Summaries exist for days before this date
+    updated_at = fields.DateTimeField(default=datetime.now)
+    
+    meta = {
+        'collection': 'analytics_state'
+    }
+    
+    def __str__(self):
+        return f"{self.name} through {self.rolled_up_through}"
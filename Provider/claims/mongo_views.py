@@ -7,16 +7,35 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.renderers import JSONRenderer
 from django.contrib.auth import authenticate, login
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, FileResponse
+from django.urls import reverse
+from django.utils.http import parse_etags, content_disposition_header
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import json
+import os
+import re
 from datetime import datetime, timedelta
-from bson import ObjectId
+from bson import ObjectId, Decimal128
+from decimal import Decimal
+from pymongo import ReturnDocument
+from pymongo.errors import ExecutionTimeout
+from mongoengine.errors import ValidationError
+from django.conf import settings
 import logging
-from .mongo_models import User, Claim, ClaimDocument, ClaimStatusHistory
+from .mongo_models import User, Claim, ClaimDocument, ClaimStatusHistory, to_money
 from .payor_integration import payor_service
+from .status_history import status_history
+from .analytics import claim_analytics, utcnow
+from .mongo_connection import pool_metrics
+from .structured_logging import log_payload
+from .response_cache import claim_list_cache, cached_json_response
+from .reference_cache import get_active_user, get_user_by_id
+from .document_storage import (
+    HashingFileUploadHandler, FileRange, RangeNotSatisfiable, parse_byte_range, document_storage
+)
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +95,27 @@ def serialize_user(user):
     }
 
 
+def get_basic_auth_username(request):
+    """Username from a Basic auth header (None if absent or malformed)"""
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not auth_header or not auth_header.startswith('Basic '):
+        return None
+    try:
+        import base64
+        encoded_credentials = auth_header.split(' ')[1]
+        decoded_credentials = base64.b64decode(encoded_credentials).decode('utf-8')
+        username, _ = decoded_credentials.split(':', 1)
+        return username
+    except Exception as e:
+        logger.warning(f"Could not identify provider: {e}")
+        return None
+
+
+def get_request_provider(request):
+    """Identify the provider user from a Basic auth header (None if absent or unknown)"""
+    return get_active_user(get_basic_auth_username(request))
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class MongoClaimListView(APIView):
     """MongoDB-based claims list and create view"""
@@ -83,25 +123,20 @@ class MongoClaimListView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
-        """Get list of claims"""
+        """Get list of claims (served from the list cache while the provider's claims are unchanged)"""
         try:
             # Try to identify current user from auth header
-            current_provider_id = None
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header and auth_header.startswith('Basic '):
-                try:
-                    import base64
-                    encoded_credentials = auth_header.split(' ')[1]
-                    decoded_credentials = base64.b64decode(encoded_credentials).decode('utf-8')
-                    username, _ = decoded_credentials.split(':', 1)
-                    
-                    # Find provider user
-                    provider_user = User.objects(username=username, is_active=True).first()
-                    if provider_user:
-                        current_provider_id = provider_user.id
-                        print(f"📋 Loading claims for provider: {username}")
-                except Exception as e:
-                    print(f"⚠️ Could not identify provider: {e}")
+            provider_user = get_request_provider(request)
+            current_provider_id = provider_user.id if provider_user else None
+            if provider_user:
+                logger.debug("📋 Loading claims for provider: %s", provider_user.username)
+            
+            # The version is read before the claims, so a concurrent write leaves the entry stale
+            cache_key = claim_list_cache.make_key(current_provider_id, request.GET)
+            version = claim_list_cache.read_version(current_provider_id)
+            cached = claim_list_cache.get(cache_key, version)
+            if cached is not None:
+                return cached_json_response(request, *cached, hit=True)
             
             # Filter claims by current provider
             base_query = {}
@@ -111,15 +146,17 @@ class MongoClaimListView(APIView):
             claims = Claim.objects(**base_query).order_by('-date_submitted')
             claims_data = [serialize_claim(claim) for claim in claims]
             
-            print(f"📋 Found {len(claims_data)} claims for provider")
+            logger.debug("📋 Found %d claims for provider", len(claims_data))
             
-            return Response({
+            body = JSONRenderer().render({
                 'count': len(claims_data),
                 'results': claims_data
             })
+            etag = claim_list_cache.set(cache_key, version, body)
+            return cached_json_response(request, body, etag, hit=False)
             
         except Exception as e:
-            print(f"❌ Error fetching claims: {str(e)}")
+            logger.error("❌ Error fetching claims: %s", e)
             return Response(
                 {'error': f'Failed to fetch claims: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -129,7 +166,7 @@ class MongoClaimListView(APIView):
         """Create a new claim"""
         try:
             data = json.loads(request.body)
-            print(f"📥 Received claim data: {data}")
+            log_payload(logger, "📥 Received claim data", data)
             
             # Validate required fields
             required_fields = ['insurance_id', 'diagnosis_description']
@@ -147,7 +184,7 @@ class MongoClaimListView(APIView):
                 diagnosis_code=data.get('diagnosis_code', ''),
                 procedure_description=data.get('procedure_description', ''),
                 procedure_code=data.get('procedure_code', ''),
-                amount_requested=float(data.get('amount_requested', 0)),
+                amount_requested=to_money(data.get('amount_requested', 0)),
                 status=data.get('status', 'pending'),
                 priority=data.get('priority', 'medium'),
                 notes=data.get('notes', ''),
@@ -159,30 +196,19 @@ class MongoClaimListView(APIView):
             claim.patient_name = data.get('patient_name', '')
             
             # Set provider info from authentication (if available)
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header and auth_header.startswith('Basic '):
-                try:
-                    import base64
-                    encoded_credentials = auth_header.split(' ')[1]
-                    decoded_credentials = base64.b64decode(encoded_credentials).decode('utf-8')
-                    username, _ = decoded_credentials.split(':', 1)
-                    
-                    # Find provider user
-                    provider_user = User.objects(username=username, is_active=True).first()
-                    if provider_user:
-                        claim.provider_id = provider_user.id
-                        claim.provider_name = f"{provider_user.first_name} {provider_user.last_name}".strip()
-                        claim.provider_email = provider_user.email
-                        print(f"🏥 Claim assigned to provider: {claim.provider_name} ({username})")
-                except Exception as e:
-                    print(f"⚠️ Could not identify provider: {e}")
+            provider_user = get_request_provider(request)
+            if provider_user:
+                claim.provider_id = provider_user.id
+                claim.provider_name = f"{provider_user.first_name} {provider_user.last_name}".strip()
+                claim.provider_email = provider_user.email
+                logger.debug("🏥 Claim assigned to provider: %s (%s)", claim.provider_name, provider_user.username)
             
             # Set patient ID and email if provided
             if data.get('patient_id'):
                 claim.patient_id = ObjectId(data['patient_id'])
                 # Get patient email from database
                 try:
-                    patient = User.objects(id=ObjectId(data['patient_id'])).first()
+                    patient = get_user_by_id(data['patient_id'])
                     if patient:
                         claim.patient_email = patient.email
                 except:
@@ -197,11 +223,11 @@ class MongoClaimListView(APIView):
                 except:
                     pass
             
-            if data.get('provider_id'):
+            if data.get('provider_id') and not (provider_user and str(provider_user.id) == str(data['provider_id'])):
                 claim.provider_id = ObjectId(data['provider_id'])
-                # Get provider info
+                # Get provider info (already known when it is the authenticated provider)
                 try:
-                    provider = User.objects(id=ObjectId(data['provider_id'])).first()
+                    provider = get_user_by_id(data['provider_id'])
                     if provider:
                         claim.provider_name = f"{provider.first_name} {provider.last_name}"
                         claim.provider_email = provider.email
@@ -212,12 +238,12 @@ class MongoClaimListView(APIView):
             if data.get('date_of_service'):
                 claim.date_of_service = datetime.fromisoformat(data['date_of_service'].replace('Z', '+00:00'))
             
-            print(f"💾 Saving claim to MongoDB...")
-            claim.save()
-            print(f"✅ Claim saved successfully with ID: {claim.id}")
+            # The list cache is bumped once, after the payor outcome is written
+            claim.save(invalidate_cache=False)
+            status_history.record(claim, None, claim.status, changed_by=provider_user, notes='Claim created')
+            logger.debug("✅ Claim saved successfully with ID: %s", claim.id)
             
             # PAYOR INTEGRATION: Submit claim to payor system
-            print(f"🏢 Submitting claim to payor system...")
             try:
                 # Prepare claim data for payor submission
                 claim_data_for_payor = {
@@ -240,47 +266,164 @@ class MongoClaimListView(APIView):
                 payor_result = payor_service.submit_claim_to_payor(claim_data_for_payor)
                 
                 if payor_result['success']:
-                    # Update claim with payor information
-                    claim.submitted_to_payor = True
-                    claim.payor_claim_id = payor_result['payor_claim_id']
-                    claim.payor_submission_date = datetime.now()
-                    claim.payor_response = payor_result['payor_response']
-                    
-                    # Get payor name from insurance mapping
-                    if claim.insurance_id in payor_service.insurance_mappings:
-                        claim.payor_name = payor_service.insurance_mappings[claim.insurance_id]['payor_name']
-                    
-                    claim.save()
-                    print(f"✅ Claim submitted to payor successfully. Payor Claim ID: {claim.payor_claim_id}")
+                    # Payor outcome is written with one $set instead of re-saving the claim
+                    claim.set_fields(
+                        invalidate_cache=False,
+                        submitted_to_payor=True,
+                        payor_claim_id=payor_result['payor_claim_id'],
+                        payor_submission_date=datetime.now(),
+                        payor_response=payor_result['payor_response'],
+                        # Get payor name from insurance mapping
+                        payor_name=payor_result.get('payor_name'),
+                    )
+                    logger.info("✅ Claim submitted to payor", extra={'claim_id': str(claim.id), 'payor_claim_id': claim.payor_claim_id})
                 else:
-                    print(f"⚠️ Failed to submit to payor: {payor_result['error']}")
+                    logger.warning("⚠️ Failed to submit to payor: %s", payor_result['error'], extra={'claim_id': str(claim.id)})
                     # Still save the claim locally even if payor submission fails
-                    claim.submitted_to_payor = False
-                    claim.payor_response = {'error': payor_result['error']}
-                    claim.save()
+                    claim.set_fields(invalidate_cache=False, submitted_to_payor=False,
+                                     payor_response={'error': payor_result['error']})
                     
             except Exception as e:
-                print(f"❌ Error submitting to payor: {str(e)}")
+                logger.error("❌ Error submitting to payor: %s", e, extra={'claim_id': str(claim.id)})
                 # Still save the claim locally
-                claim.submitted_to_payor = False
-                claim.payor_response = {'error': str(e)}
-                claim.save()
+                claim.set_fields(invalidate_cache=False, submitted_to_payor=False, payor_response={'error': str(e)})
             
+            claim_list_cache.bump(claim.provider_id)
             serialized_claim = serialize_claim(claim)
-            print(f"📄 Serialized claim: {serialized_claim}")
+            log_payload(logger, "📄 Serialized claim", serialized_claim)
             
             return Response(serialized_claim, status=status.HTTP_201_CREATED)
             
         except Exception as e:
-            print(f"❌ Error creating claim: {str(e)}")
-            import traceback
-            print(f"🔍 Full traceback: {traceback.format_exc()}")
+            logger.exception("❌ Error creating claim: %s", e)
             return Response(
                 {'error': f'Failed to create claim: {str(e)}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class MongoClaimSearchView(APIView):
+    """Ranked, paginated claim search backed by the claims text index"""
+    authentication_classes = []  # Disable DRF authentication
+    permission_classes = [AllowAny]
+    
+    CLAIM_NUMBER_QUERY = re.compile(r'^CLM-[\d-]*$', re.IGNORECASE)
+    MAX_PAGE_SIZE = 100
+    
+    def get(self, request):
+        """Search the current provider's claims"""
+        try:
+            query = request.query_params.get('q', '').strip()
+            if len(query) < 2:
+                return Response(
+                    {'error': "Query parameter 'q' must be at least 2 characters"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            try:
+                page = max(int(request.query_params.get('page', 1)), 1)
+                page_size = min(max(int(request.query_params.get('page_size', 20)), 1), self.MAX_PAGE_SIZE)
+            except ValueError:
+                return Response(
+                    {'error': 'page and page_size must be integers'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Scope results to the authenticated provider
+            base_query = {}
+            provider_user = get_request_provider(request)
+            if provider_user:
+                base_query['provider_id'] = provider_user.id
+            
+            if self.CLAIM_NUMBER_QUERY.match(query):
+                # Claim number lookups use the claim_number index directly
+                claims = Claim.objects(
+                    claim_number__startswith=query.upper(), **base_query
+                ).order_by('claim_number')
+            else:
+                # A leading '-' negates a term and quotes start phrases in $text
+                terms = re.sub(r'["\-]', ' ', query)
+                claims = Claim.objects(**base_query).search_text(terms).order_by('$text_score')
+            
+            # Fetch one extra row to know whether another page exists without a count
+            skip = (page - 1) * page_size
+            max_time_ms = getattr(settings, 'CLAIM_SEARCH_MAX_TIME_MS', 2000)
+            rows = list(claims.skip(skip).limit(page_size + 1).max_time_ms(max_time_ms))
+            has_more = len(rows) > page_size
+            results = [serialize_claim(claim) for claim in rows[:page_size]]
+            
+            return Response({
+                'query': query,
+                'page': page,
+                'page_size': page_size,
+                'has_more': has_more,
+                'count': len(results),
+                'results': results
+            })
+            
+        except ExecutionTimeout:
+            return Response(
+                {'error': 'Search took too long, please refine the query'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except Exception as e:
+            logger.error(f"Error searching claims: {e}")
+            return Response(
+                {'error': f'Failed to search claims: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+# Claim fields a provider may change through PUT/PATCH
+CLAIM_UPDATE_FIELDS = (
+    'patient_name', 'insurance_id', 'diagnosis_code', 'diagnosis_description',
+    'procedure_code', 'procedure_description', 'amount_requested', 'status',
+    'priority', 'notes', 'provider_npi', 'provider_tax_id', 'date_of_service',
+)
+
+
+# Read/write rounds for a status change racing another update of the same claim
+CLAIM_UPDATE_ATTEMPTS = 3
+
+
+def build_claim_updates(data):
+    """
+    Validate the supplied claim fields and convert them to a $set document
+    
+    Args:
+        data: Request body
+    
+    Returns:
+        Dict of database field name to stored value, including date_updated
+    
+    Raises:
+        ValidationError: A supplied value is invalid for its field
+    """
+    updates = {}
+    for name in CLAIM_UPDATE_FIELDS:
+        if name not in data:
+            continue
+        value = data[name]
+        if name == 'amount_requested':
+            value = to_money(value)
+        elif name == 'date_of_service':
+            if not value:
+                continue
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        
+        field = Claim._fields[name]
+        if value is None:
+            if field.required:
+                raise ValidationError(f'{name} is required')
+        else:
+            field._validate(value)
+        updates[field.db_field] = field.to_mongo(value) if value is not None else None
+    
+    updates['date_updated'] = datetime.now()
+    return updates
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class MongoClaimDetailView(APIView):
     """MongoDB-based claim detail view"""
@@ -306,95 +449,449 @@ class MongoClaimDetailView(APIView):
             )
     
     def put(self, request, claim_id):
-        """Update a specific claim"""
+        """Update a specific claim (fields not supplied are left unchanged)"""
+        return self.patch(request, claim_id)
+    
+    def patch(self, request, claim_id):
+        """Partially update a specific claim with a single $set"""
         try:
-            # Find the claim
-            claim = Claim.objects(id=ObjectId(claim_id)).first()
+            data = json.loads(request.body)
+            log_payload(logger, "📝 Updating claim", data, claim_id=claim_id)
+            
+            try:
+                updates = build_claim_updates(data)
+            except (ValidationError, ValueError, ArithmeticError) as e:
+                return Response(
+                    {'error': f'Invalid claim data: {str(e)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Only allow providers to edit their own claims (checked in the same write)
+            provider_user = get_request_provider(request)
+            query = {'_id': ObjectId(claim_id)}
+            if provider_user:
+                query['provider_id'] = provider_user.id
+            
+            # Post-images include every server-side change (date_updated...)
+            collection = Claim._get_collection()
+            found, owner = False, None
+            if 'status' in updates:
+                # The history needs the status being replaced: read it, then only
+                # write while it is still the current one (re-read if it changed)
+                updated = None
+                for _ in range(CLAIM_UPDATE_ATTEMPTS):
+                    current = collection.find_one({'_id': query['_id']}, {'status': 1, 'provider_id': 1})
+                    if not current:
+                        break
+                    found, owner = True, current.get('provider_id')
+                    if provider_user and owner != provider_user.id:
+                        break
+                    previous_status = current.get('status')
+                    updated = collection.find_one_and_update(
+                        {**query, 'status': previous_status}, {'$set': updates},
+                        return_document=ReturnDocument.AFTER
+                    )
+                    if updated:
+                        break
+            else:
+                updated = collection.find_one_and_update(
+                    query, {'$set': updates}, return_document=ReturnDocument.AFTER
+                )
+                if not updated and provider_user:
+                    current = Claim.objects(id=ObjectId(claim_id)).only('provider_id').first()
+                    found, owner = current is not None, current.provider_id if current else None
+                previous_status = updated.get('status') if updated else None
+            
+            if not updated:
+                if not found:
+                    return Response(
+                        {'error': 'Claim not found'},
+                        status=status.HTTP_404_NOT_FOUND
+                    )
+                if provider_user and owner != provider_user.id:
+                    return Response(
+                        {'error': 'You can only edit your own claims'},
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+                return Response(
+                    {'error': 'Claim status is changing concurrently, please retry'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            
+            claim = Claim._from_son(updated)
+            claim_list_cache.bump(claim.provider_id)
+            status_history.record(claim, previous_status, claim.status, changed_by=provider_user,
+                                  notes=data.get('status_notes'))
+            logger.debug("✅ Claim %s updated successfully", claim_id)
+            
+            return Response(serialize_claim(claim))
+            
+        except Exception as e:
+            logger.exception("❌ Error updating claim %s: %s", claim_id, e)
+            return Response(
+                {'error': f'Failed to update claim: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+
+def serialize_status_history(entry):
+    """Serialize a ClaimStatusHistory document to dictionary"""
+    return {
+        'id': str(entry.id),
+        'claim_id': str(entry.claim_id),
+        'provider_id': str(entry.provider_id) if entry.provider_id else None,
+        'previous_status': entry.previous_status,
+        'new_status': entry.new_status,
+        'changed_by_id': str(entry.changed_by_id) if entry.changed_by_id else None,
+        'changed_by_name': entry.changed_by_name,
+        'changed_at': entry.changed_at.isoformat() if entry.changed_at else None,
+        'notes': entry.notes,
+    }
+
+
+def _parse_datetime_param(value):
+    """Parse an ISO date/datetime query parameter (None if empty)"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MongoClaimHistoryView(APIView):
+    """Status timeline of a single claim"""
+    authentication_classes = []  # Disable DRF authentication
+    permission_classes = [AllowAny]
+    
+    def get(self, request, claim_id):
+        try:
+            claim = Claim.objects(id=ObjectId(claim_id)).only('id', 'provider_id', 'claim_number', 'status').first()
             if not claim:
                 return Response(
                     {'error': 'Claim not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Check if the user can edit this claim
-            current_provider_id = None
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header and auth_header.startswith('Basic '):
-                try:
-                    import base64
-                    encoded_credentials = auth_header.split(' ')[1]
-                    decoded_credentials = base64.b64decode(encoded_credentials).decode('utf-8')
-                    username, _ = decoded_credentials.split(':', 1)
-                    
-                    # Find provider user
-                    provider_user = User.objects(username=username, is_active=True).first()
-                    if provider_user:
-                        current_provider_id = provider_user.id
-                except Exception as e:
-                    print(f"⚠️ Could not identify provider: {e}")
-            
-            # Only allow providers to edit their own claims
-            if current_provider_id and claim.provider_id != current_provider_id:
+            provider_user = get_request_provider(request)
+            if provider_user and claim.provider_id != provider_user.id:
                 return Response(
-                    {'error': 'You can only edit your own claims'},
+                    {'error': 'You can only view your own claims'},
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            data = json.loads(request.body)
-            print(f"📝 Updating claim {claim_id} with data: {data}")
-            
-            # Update fields if provided
-            if 'patient_name' in data:
-                claim.patient_name = data['patient_name']
-            if 'insurance_id' in data:
-                claim.insurance_id = data['insurance_id']
-            if 'diagnosis_code' in data:
-                claim.diagnosis_code = data['diagnosis_code']
-            if 'diagnosis_description' in data:
-                claim.diagnosis_description = data['diagnosis_description']
-            if 'procedure_code' in data:
-                claim.procedure_code = data['procedure_code']
-            if 'procedure_description' in data:
-                claim.procedure_description = data['procedure_description']
-            if 'amount_requested' in data:
-                claim.amount_requested = float(data['amount_requested'])
-            if 'status' in data:
-                claim.status = data['status']
-            if 'priority' in data:
-                claim.priority = data['priority']
-            if 'notes' in data:
-                claim.notes = data['notes']
-            if 'provider_npi' in data:
-                claim.provider_npi = data['provider_npi']
-            if 'provider_tax_id' in data:
-                claim.provider_tax_id = data['provider_tax_id']
-            
-            # Update dates
-            if 'date_of_service' in data and data['date_of_service']:
-                claim.date_of_service = datetime.fromisoformat(data['date_of_service'].replace('Z', '+00:00'))
+            # Make sure transitions buffered in this process are visible
+            status_history.flush()
             
-            # Update the date_updated field
-            claim.date_updated = datetime.now()
+            # Served by the (claim_id, changed_at) index
+            entries = ClaimStatusHistory.objects(claim_id=claim.id).order_by('changed_at')
             
-            # Save the updated claim
-            claim.save()
-            print(f"✅ Claim {claim_id} updated successfully")
+            return Response({
+                'claim_id': str(claim.id),
+                'claim_number': claim.claim_number,
+                'current_status': claim.status,
+                'history': [serialize_status_history(entry) for entry in entries]
+            })
             
-            return Response(serialize_claim(claim))
+        except Exception as e:
+            logger.error(f"Error fetching history for claim {claim_id}: {e}")
+            return Response(
+                {'error': f'Failed to fetch claim history: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+def serialize_claim_document(document):
+    """Serialize a ClaimDocument to dictionary"""
+    return {
+        'id': str(document.id),
+        'claim_id': str(document.claim_id),
+        'document_type': document.document_type,
+        'filename': document.filename,
+        'content_type': document.content_type,
+        'file_size': document.file_size,
+        'content_hash': document.content_hash,
+        'uploaded_at': document.uploaded_at.isoformat() if document.uploaded_at else None,
+        'uploaded_by_id': str(document.uploaded_by_id) if document.uploaded_by_id else None,
+        'uploaded_by_name': document.uploaded_by_name,
+        'download_url': reverse('claims:mongo-claim-document-download', kwargs={
+            'claim_id': str(document.claim_id), 'document_id': str(document.id)
+        }),
+    }
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MongoClaimDocumentListView(APIView):
+    """List and upload documents attached to a claim"""
+    authentication_classes = []  # Disable DRF authentication
+    permission_classes = [AllowAny]
+    
+    def _get_claim(self, request, claim_id):
+        """Claim and provider, or an error Response"""
+        claim = Claim.objects(id=ObjectId(claim_id)).only('id', 'provider_id').first()
+        if not claim:
+            return None, None, Response({'error': 'Claim not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        provider_user = get_request_provider(request)
+        if provider_user and claim.provider_id != provider_user.id:
+            return None, None, Response(
+                {'error': 'You can only access documents of your own claims'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return claim, provider_user, None
+    
+    def get(self, request, claim_id):
+        """List the claim's documents"""
+        try:
+            claim, _, error = self._get_claim(request, claim_id)
+            if error:
+                return error
+            
+            documents = ClaimDocument.objects(claim_id=claim.id).order_by('uploaded_at')
+            return Response({
+                'count': documents.count(),
+                'results': [serialize_claim_document(document) for document in documents]
+            })
             
         except Exception as e:
-            print(f"❌ Error updating claim {claim_id}: {str(e)}")
-            import traceback
-            print(f"🔍 Full traceback: {traceback.format_exc()}")
+            logger.error(f"Error listing documents for claim {claim_id}: {e}")
             return Response(
-                {'error': f'Failed to update claim: {str(e)}'},
-                status=status.HTTP_400_BAD_REQUEST
+                {'error': f'Failed to list claim documents: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    def patch(self, request, claim_id):
-        """Partially update a specific claim"""
-        # Use the same logic as PUT for partial updates
-        return self.put(request, claim_id)
+    def post(self, request, claim_id):
+        """
+        Upload a document (multipart field ``file``, optional ``document_type``)
+        
+        The body is streamed to disk in chunks while it is hashed; files with
+        the same SHA-256 share one stored blob. Clients may send the hash in
+        ``X-Content-SHA256`` so known content is verified without being written.
+        Temp files that were not moved into the store (other file fields,
+        rejected or failed uploads) are removed when the request ends.
+        """
+        handler = None
+        try:
+            # Authorization is checked before the body is read
+            claim, provider_user, error = self._get_claim(request, claim_id)
+            if error:
+                return error
+            if not provider_user:
+                return Response(
+                    {'error': 'Basic authentication required'},
+                    status=status.HTTP_401_UNAUTHORIZED
+                )
+            
+            handler = HashingFileUploadHandler(
+                request._request,
+                storage=document_storage,
+                max_size=settings.CLAIM_DOCUMENT_MAX_SIZE,
+                expected_sha256=request.META.get('HTTP_X_CONTENT_SHA256'),
+            )
+            request._request.upload_handlers = [handler]
+            
+            upload = request.FILES.get('file')
+            if handler.error:
+                return Response({'error': handler.error}, status=handler.error_status)
+            if upload is None:
+                return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+            
+            document_type = request.data.get('document_type') or 'other'
+            if document_type not in dict(ClaimDocument.DOCUMENT_TYPES):
+                return Response(
+                    {'error': f'document_type must be one of {", ".join(dict(ClaimDocument.DOCUMENT_TYPES))}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # The same content attached to this claim again is returned as is
+            existing = ClaimDocument.objects(claim_id=claim.id, content_hash=upload.sha256).first()
+            if existing:
+                return Response({**serialize_claim_document(existing), 'deduplicated': True})
+            
+            file_path, stored = document_storage.store(upload)
+            document = ClaimDocument(
+                claim_id=claim.id,
+                document_type=document_type,
+                filename=os.path.basename(upload.name)[:255],
+                file_path=file_path,
+                file_size=upload.size,
+                content_hash=upload.sha256,
+                content_type=upload.content_type,
+                uploaded_by_id=provider_user.id,
+                uploaded_by_name=f"{provider_user.first_name} {provider_user.last_name}".strip(),
+            )
+            document.save()
+            logger.info("📎 Document uploaded", extra={
+                'claim_id': str(claim.id), 'content_hash': upload.sha256, 'bytes': upload.size, 'deduplicated': not stored
+            })
+            
+            return Response(
+                {**serialize_claim_document(document), 'deduplicated': not stored},
+                status=status.HTTP_201_CREATED
+            )
+            
+        except Exception as e:
+            logger.exception("❌ Error uploading document for claim %s: %s", claim_id, e)
+            return Response(
+                {'error': f'Failed to upload document: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        finally:
+            if handler is not None:
+                for leftover in handler.uploads:
+                    leftover.discard()
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MongoClaimDocumentDownloadView(APIView):
+    """Download a claim document with Range and conditional request support"""
+    authentication_classes = []  # Disable DRF authentication
+    permission_classes = [AllowAny]
+    
+    def get(self, request, claim_id, document_id):
+        """
+        Serve the stored file
+        
+        The strong ETag is the content hash. Ranges are served from a file
+        window, and full files with FileResponse, so sendfile-capable servers
+        copy them in the kernel. When CLAIM_DOCUMENT_ACCEL_REDIRECT is set the
+        transfer is handed to nginx through X-Accel-Redirect.
+        """
+        try:
+            document = ClaimDocument.objects(id=ObjectId(document_id), claim_id=ObjectId(claim_id)).first()
+            if not document or not document.content_hash:
+                return Response({'error': 'Document not found'}, status=status.HTTP_404_NOT_FOUND)
+            
+            provider_user = get_request_provider(request)
+            if provider_user:
+                claim = Claim.objects(id=document.claim_id).only('provider_id').first()
+                if not claim or claim.provider_id != provider_user.id:
+                    return Response(
+                        {'error': 'You can only access documents of your own claims'},
+                        status=status.HTTP_403_FORBIDDEN
+                    )
+            
+            path = document_storage.path(document.file_path)
+            if not os.path.exists(path):
+                logger.error(f"Stored file missing for document {document_id}: {document.file_path}")
+                return Response({'error': 'Document file not found'}, status=status.HTTP_404_NOT_FOUND)
+            
+            etag = f'"{document.content_hash}"'
+            headers = {
+                'ETag': etag,
+                'Accept-Ranges': 'bytes',
+                # A document's content never changes, only new documents are added
+                'Cache-Control': 'private, max-age=86400',
+            }
+            
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            if if_none_match:
+                tags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+                if '*' in tags or etag in tags:
+                    response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+                    for header, value in headers.items():
+                        response[header] = value
+                    return response
+            
+            content_type = document.content_type or 'application/octet-stream'
+            accel_prefix = getattr(settings, 'CLAIM_DOCUMENT_ACCEL_REDIRECT', '')
+            if accel_prefix:
+                # nginx serves the file (including ranges) from an internal location
+                response = HttpResponse(content_type=content_type)
+                response['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{document.file_path}"
+                response['Content-Disposition'] = content_disposition_header(False, document.filename)
+                for header, value in headers.items():
+                    response[header] = value
+                return response
+            
+            size = os.path.getsize(path)
+            byte_range = None
+            if_range = request.META.get('HTTP_IF_RANGE')
+            if not if_range or if_range == etag:
+                try:
+                    byte_range = parse_byte_range(request.META.get('HTTP_RANGE'), size)
+                except RangeNotSatisfiable:
+                    response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                    response['Content-Range'] = f'bytes */{size}'
+                    for header, value in headers.items():
+                        response[header] = value
+                    return response
+            
+            if byte_range:
+                first, last = byte_range
+                response = FileResponse(
+                    FileRange(path, first, last - first + 1),
+                    status=status.HTTP_206_PARTIAL_CONTENT,
+                    content_type=content_type,
+                    filename=document.filename,
+                )
+                response['Content-Length'] = str(last - first + 1)
+                response['Content-Range'] = f'bytes {first}-{last}/{size}'
+            else:
+                response = FileResponse(open(path, 'rb'), content_type=content_type, filename=document.filename)
+            for header, value in headers.items():
+                response[header] = value
+            return response
+            
+        except Exception as e:
+            logger.error(f"Error downloading document {document_id}: {e}")
+            return Response(
+                {'error': f'Failed to download document: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MongoStatusHistoryView(APIView):
+    """Provider-wide status changes in a time range"""
+    authentication_classes = []  # Disable DRF authentication
+    permission_classes = [AllowAny]
+    
+    MAX_LIMIT = 500
+    
+    def get(self, request):
+        """
+        Query parameters: start, end (ISO dates), status (new status),
+        limit (default 100)
+        """
+        try:
+            try:
+                start = _parse_datetime_param(request.query_params.get('start'))
+                end = _parse_datetime_param(request.query_params.get('end'))
+                limit = min(max(int(request.query_params.get('limit', 100)), 1), self.MAX_LIMIT)
+            except ValueError:
+                return Response(
+                    {'error': 'start/end must be ISO dates and limit an integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            query = {}
+            provider_user = get_request_provider(request)
+            if provider_user:
+                # Served by the (provider_id, changed_at) index
+                query['provider_id'] = provider_user.id
+            if start:
+                query['changed_at__gte'] = start
+            if end:
+                query['changed_at__lt'] = end
+            if request.query_params.get('status'):
+                query['new_status'] = request.query_params['status']
+            
+            status_history.flush()
+            entries = ClaimStatusHistory.objects(**query).order_by('-changed_at').limit(limit)
+            results = [serialize_status_history(entry) for entry in entries]
+            
+            return Response({
+                'start': start.isoformat() if start else None,
+                'end': end.isoformat() if end else None,
+                'count': len(results),
+                'results': results
+            })
+            
+        except Exception as e:
+            logger.error(f"Error fetching status history: {e}")
+            return Response(
+                {'error': f'Failed to fetch status history: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -611,6 +1108,62 @@ def mongo_register_user(request):
         return JsonResponse({'error': f'Registration failed: {str(e)}'}, status=500)
 
 
+# Per-status claim counts and money totals for the dashboard
+DASHBOARD_TOTALS_PIPELINE = [
+    {'$group': {
+        '_id': '$status',
+        'count': {'$sum': 1},
+        'amount_requested': {'$sum': {'$ifNull': ['$amount_requested', Decimal128('0')]}},
+        'patient_responsibility': {'$sum': {'$ifNull': ['$patient_responsibility', Decimal128('0')]}},
+        # Revenue uses the first non-zero of approved amount, payor amount, requested amount
+        'revenue': {'$sum': {'$switch': {
+            'branches': [
+                {'case': {'$gt': [{'$ifNull': ['$amount_approved', 0]}, 0]}, 'then': '$amount_approved'},
+                {'case': {'$gt': [{'$ifNull': ['$approved_amount', 0]}, 0]}, 'then': '$approved_amount'},
+                {'case': {'$gt': [{'$ifNull': ['$amount_requested', 0]}, 0]}, 'then': '$amount_requested'},
+            ],
+            'default': Decimal128('0')
+        }}},
+    }}
+]
+
+
+def build_dashboard_stats(status_rows, recent_claims_data):
+    """Build the dashboard response from DASHBOARD_TOTALS_PIPELINE rows"""
+    totals_by_status = {row['_id']: row for row in status_rows}
+    
+    def status_count(status_name):
+        return totals_by_status.get(status_name, {}).get('count', 0)
+    
+    def money_total(field, statuses=None):
+        total = sum(
+            (to_money(row[field]) for key, row in totals_by_status.items()
+             if statuses is None or key in statuses),
+            Decimal('0.00')
+        )
+        return float(total)
+    
+    approved_claims = status_count('approved')
+    rejected_claims = status_count('rejected')
+    
+    # Calculate approval rate
+    processed_claims = approved_claims + rejected_claims
+    approval_rate = (approved_claims / processed_claims * 100) if processed_claims > 0 else 0
+    
+    return {
+        'total_claims': sum(row['count'] for row in totals_by_status.values()),
+        'pending_claims': status_count('pending'),
+        'approved_claims': approved_claims,
+        'rejected_claims': rejected_claims,
+        'approval_rate': round(approval_rate, 2),
+        # Total revenue is the sum of approved claims
+        'total_revenue': money_total('revenue', {'approved'}),
+        'total_requested': money_total('amount_requested'),
+        'total_patient_responsibility': money_total('patient_responsibility', {'approved'}),
+        'recent_claims': recent_claims_data,
+    }
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class MongoDashboardStatsView(APIView):
     """MongoDB-based dashboard stats view"""
@@ -620,71 +1173,105 @@ class MongoDashboardStatsView(APIView):
     def get(self, request):
         """Get dashboard statistics from MongoDB"""
         try:
-            # Try to identify current user from auth header
+            # Identify the current provider from the auth header
             current_provider_id = None
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            if auth_header and auth_header.startswith('Basic '):
-                try:
-                    import base64
-                    encoded_credentials = auth_header.split(' ')[1]
-                    decoded_credentials = base64.b64decode(encoded_credentials).decode('utf-8')
-                    username, _ = decoded_credentials.split(':', 1)
-                    
-                    # Find provider user
-                    provider_user = User.objects(username=username, is_active=True).first()
-                    if provider_user:
-                        current_provider_id = provider_user.id
-                        print(f"📊 Loading stats for provider: {username}")
-                except Exception as e:
-                    print(f"⚠️ Could not identify provider for stats: {e}")
+            provider_user = get_request_provider(request)
+            if provider_user:
+                current_provider_id = provider_user.id
+                logger.debug("📊 Loading stats for provider: %s", provider_user.username)
             
             # Filter claims by current provider
             base_query = {}
             if current_provider_id:
                 base_query['provider_id'] = current_provider_id
             
-            # Get counts
-            total_claims = Claim.objects(**base_query).count()
-            pending_claims = Claim.objects(status='pending', **base_query).count()
-            approved_claims = Claim.objects(status='approved', **base_query).count()
-            rejected_claims = Claim.objects(status='rejected', **base_query).count()
+            # Counts and exact Decimal128 money sums per status in one aggregation
+            status_rows = list(Claim.objects(**base_query).aggregate(DASHBOARD_TOTALS_PIPELINE))
             
             # Get recent claims
             recent_claims = Claim.objects(**base_query).order_by('-date_submitted')[:5]
             recent_claims_data = [serialize_claim(claim) for claim in recent_claims]
             
-            # Calculate total revenue (sum of approved claims)
-            total_revenue = 0
-            approved_claims_objects = Claim.objects(status='approved', **base_query)
-            for claim in approved_claims_objects:
-                if claim.amount_approved:
-                    total_revenue += float(claim.amount_approved)
-                elif claim.approved_amount:
-                    total_revenue += float(claim.approved_amount)
-                elif claim.amount_requested:
-                    total_revenue += float(claim.amount_requested)
-            
-            # Calculate approval rate
-            processed_claims = approved_claims + rejected_claims
-            approval_rate = (approved_claims / processed_claims * 100) if processed_claims > 0 else 0
+            return Response(build_dashboard_stats(status_rows, recent_claims_data))
+            
+        except Exception as e:
+            return Response(
+                {'error': f'Failed to get dashboard stats: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MongoClaimAnalyticsView(APIView):
+    """Claim volume and outcomes over time"""
+    authentication_classes = []  # Disable DRF authentication
+    permission_classes = [AllowAny]
+    
+    # Default range when no start is given
+    DEFAULT_SPAN_DAYS = {'day': 30, 'week': 182, 'month': 365}
+    
+    def get(self, request):
+        """
+        Query parameters: bucket (day|week|month), start, end (ISO dates)
+        """
+        try:
+            bucket = request.query_params.get('bucket', 'day')
+            if bucket not in self.DEFAULT_SPAN_DAYS:
+                return Response(
+                    {'error': 'bucket must be one of: day, week, month'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            try:
+                end = _parse_datetime_param(request.query_params.get('end'))
+                start = _parse_datetime_param(request.query_params.get('start'))
+            except ValueError:
+                return Response(
+                    {'error': 'start and end must be ISO dates'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            end = end or utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            start = start or end - timedelta(days=self.DEFAULT_SPAN_DAYS[bucket])
+            
+            provider_user = get_request_provider(request)
+            provider_id = provider_user.id if provider_user else None
+            
+            series = claim_analytics.timeseries(bucket, start, end, provider_id=provider_id)
             
             return Response({
-                'total_claims': total_claims,
-                'pending_claims': pending_claims,
-                'approved_claims': approved_claims,
-                'rejected_claims': rejected_claims,
-                'approval_rate': round(approval_rate, 2),
-                'total_revenue': round(total_revenue, 2),
-                'recent_claims': recent_claims_data,
+                'bucket': bucket,
+                'start': start.isoformat(),
+                'end': end.isoformat(),
+                'series': series
             })
             
         except Exception as e:
+            logger.error(f"Error building claim analytics: {e}")
             return Response(
-                {'error': f'Failed to get dashboard stats: {str(e)}'},
+                {'error': f'Failed to build claim analytics: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class MongoPoolStatsView(APIView):
+    """MongoDB connection pool metrics (checkout waits, failures)"""
+    authentication_classes = []  # Disable DRF authentication
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        from mongoengine.connection import _connection_settings
+        pool_settings = _connection_settings.get('default', {})
+        return Response({
+            'pool': pool_metrics.stats(),
+            'settings': {
+                key: pool_settings.get(key) for key in (
+                    'maxPoolSize', 'minPoolSize', 'maxIdleTimeMS', 'waitQueueTimeoutMS', 'compressors'
+                )
+            }
+        })
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class MongoUserProfileView(APIView):
     """MongoDB-based user profile view"""
@@ -708,21 +1295,19 @@ class MongoUserProfileView(APIView):
             decoded_credentials = base64.b64decode(encoded_credentials).decode('utf-8')
             username, password = decoded_credentials.split(':', 1)
             
-            print(f"Profile request for username: {username}")
+            logger.debug("Profile request for username: %s", username)
             
             # Find user
             user = User.objects(username=username, is_active=True).first()
             if not user:
-                print(f"User not found: {username}")
+                logger.info("User not found: %s", username)
                 return Response(
                     {'error': 'User not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            print(f"Found user: {user.username}, stored password: {user.password}")
-            
             if user.password != password:
-                print(f"Password mismatch - received: {password}, stored: {user.password}")
+                logger.info("Password mismatch for user: %s", username)
                 return Response(
                     {'error': 'Invalid credentials'},
                     status=status.HTTP_401_UNAUTHORIZED
@@ -12,8 +12,37 @@ from django.conf import settings
 from django.core.cache import cache
 import logging
 
+from .insurance_registry import InsuranceMappingRegistry
+from .policy_rules import policy_engine
+from .validation_cache import validation_cache
+from .reference_cache import policy_cache, MISSING
+from .http import payor_pools
+
 logger = logging.getLogger(__name__)
 
+
+def _patient_age(claim_data: Dict[str, Any]) -> Optional[int]:
+    """Patient age from patient_age or date_of_birth, None when unknown"""
+    age = claim_data.get('patient_age')
+    if age not in (None, ''):
+        try:
+            return int(float(age))
+        except (TypeError, ValueError):
+            return None
+    
+    date_of_birth = claim_data.get('date_of_birth')
+    if isinstance(date_of_birth, str):
+        try:
+            date_of_birth = datetime.fromisoformat(date_of_birth)
+        except ValueError:
+            return None
+    if not isinstance(date_of_birth, datetime):
+        return None
+    today = datetime.now().date()
+    born = date_of_birth.date()
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
 class PayorIntegrationService:
     """Service to handle payor system integration"""
     
@@ -28,36 +57,74 @@ class PayorIntegrationService:
             
         self.payor_email = getattr(settings, 'PAYOR_EMAIL', 'admin@payor.com')
         self.payor_password = getattr(settings, 'PAYOR_PASSWORD', 'admin123')
-        self.timeout = 30
         
-        # Insurance ID to Payor mappings (dynamically use current payor URL from .env)
+        # Insurance ID to Payor mappings. They carry no payor_url, so they follow the
+        # current payor_base_url (including after update_payor_configuration).
+        # The policy numbers exist in the payor catalog export
+        # (hcms_payor_db.insurance_policies.json), but which policy each insurance
+        # ID holds is a development assumption the payor has not confirmed; keep
+        # LOCAL_POLICY_VALIDATION off until it is (import confirmed mappings with
+        # `manage.py import_insurance_mappings`).
         self.insurance_mappings = {
             'INS001': {
                 'payor_name': 'BlueCross BlueShield',
-                'payor_url': self.payor_base_url,
+                'policy_number': 'POL-001-BASIC',
                 'is_active': True
             },
             'INS002': {
                 'payor_name': 'Aetna Health',
-                'payor_url': self.payor_base_url,
+                'policy_number': 'POL-002-PREMIUM',
                 'is_active': True
             },
             'INS003': {
                 'payor_name': 'United Healthcare',
-                'payor_url': self.payor_base_url,
+                'policy_number': 'POL-003-SENIOR',
                 'is_active': True
             },
             'HI12345': {
                 'payor_name': 'Health Insurance Premium',
-                'payor_url': self.payor_base_url,
+                'policy_number': 'POL-002-PREMIUM',
                 'is_active': True
             },
             'BC-789-456': {
                 'payor_name': 'BlueCross BlueShield',
-                'payor_url': self.payor_base_url,
+                'policy_number': 'POL-001-BASIC',
                 'is_active': True
             }
         }
+        
+        # Rules stored in MongoDB extend/override the built-in mappings above
+        self.insurance_registry = InsuranceMappingRegistry(
+            defaults=self.insurance_mappings,
+            refresh_interval=getattr(settings, 'INSURANCE_MAPPING_REFRESH_SECONDS', 30)
+        )
+        self._mappings_version = None
+
+    def resolve_insurance(self, insurance_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve payor routing for an insurance ID
+        
+        Args:
+            insurance_id: Insurance ID from the claim
+            
+        Returns:
+            Mapping dict with payor_name, payor_url and policy_number, or None
+        """
+        mapping = self.insurance_registry.resolve(insurance_id)
+        
+        # Cached validation results may route to the old payor/policy
+        version = self.insurance_registry.version
+        if version != self._mappings_version:
+            previous, self._mappings_version = self._mappings_version, version
+            if previous is None:
+                # First rule set this process loaded, other processes are not affected
+                validation_cache.clear()
+            else:
+                validation_cache.invalidate_all()
+        
+        if mapping is None:
+            return None
+        return {**mapping, 'payor_url': mapping.get('payor_url') or self.payor_base_url}
 
     def get_auth_headers(self) -> Dict[str, str]:
         """Get authentication headers for payor API"""
@@ -83,14 +150,14 @@ class PayorIntegrationService:
         """
         try:
             # Check if insurance ID is mapped to a payor
-            if insurance_id not in self.insurance_mappings:
+            mapping = self.resolve_insurance(insurance_id)
+            if mapping is None:
                 return {
                     'is_valid': False,
                     'error': f'Insurance ID {insurance_id} not recognized',
                     'coverage_details': None
                 }
             
-            mapping = self.insurance_mappings[insurance_id]
             if not mapping['is_active']:
                 return {
                     'is_valid': False,
@@ -98,8 +165,30 @@ class PayorIntegrationService:
                     'coverage_details': None
                 }
             
+            # Repeat validations are answered from the in-process cache
+            policy_number = mapping.get('policy_number') or insurance_id
+            patient_age = _patient_age(claim_data)
+            if patient_age is not None:
+                claim_data = {**claim_data, 'patient_age': patient_age}
+            cache_key = validation_cache.make_key(insurance_id, claim_data)
+            cached_result = validation_cache.get(cache_key)
+            if cached_result is not None:
+                return cached_result
+            
+            # Validate against the compiled policy catalog when the policy is known locally
+            # (age-restricted policies need the real patient age, otherwise the payor decides)
+            if (getattr(settings, 'LOCAL_POLICY_VALIDATION', False) and policy_engine.has_policy(policy_number)
+                    and (patient_age is not None or not policy_engine.has_age_restriction(policy_number))):
+                result = policy_engine.evaluate(
+                    policy_number,
+                    claim_data,
+                    provider_id=getattr(settings, 'PROVIDER_ID', None)
+                )
+                validation_cache.set(cache_key, result, policy_number)
+                return result
+            
             # Call payor API to validate policy
-            url = f"{self.payor_base_url}/api/insurance-policies/validate/"
+            url = f"{mapping['payor_url']}/api/insurance-policies/validate/"
             headers = self.get_auth_headers()
             
             payload = {
@@ -110,10 +199,12 @@ class PayorIntegrationService:
                 'patient_age': claim_data.get('patient_age', 30)  # Default age if not provided
             }
             
-            response = requests.post(url, json=payload, headers=headers, timeout=self.timeout)
+            response = payor_pools.for_mapping(mapping).post(url, json=payload, headers=headers)
             
             if response.status_code == 200:
-                return response.json()
+                result = response.json()
+                validation_cache.set(cache_key, result, policy_number)
+                return result
             else:
                 logger.warning(f"Policy validation failed: {response.status_code} - {response.text}")
                 return {
@@ -134,6 +225,21 @@ class PayorIntegrationService:
                 }
             }
 
+    def reload_policy_catalog(self) -> List[str]:
+        """
+        Recompile the local policy catalog and drop cached validation
+        results for every policy that changed
+        
+        Returns:
+            List of changed policy numbers
+        """
+        changed = sorted(policy_engine.reload())
+        for policy_number in changed:
+            validation_cache.invalidate(policy_number=policy_number)
+        if changed:
+            policy_cache.bump()
+        return changed
+
     def submit_claim_to_payor(self, claim_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Submit claim to payor system
@@ -148,7 +254,8 @@ class PayorIntegrationService:
             insurance_id = claim_data.get('insurance_id')
             
             # Check if insurance ID is mapped
-            if insurance_id not in self.insurance_mappings:
+            mapping = self.resolve_insurance(insurance_id)
+            if mapping is None:
                 return {
                     'success': False,
                     'error': f'Insurance ID {insurance_id} not recognized',
@@ -156,7 +263,7 @@ class PayorIntegrationService:
                 }
             
             # Submit to payor system
-            url = f"{self.payor_base_url}/api/claims/"
+            url = f"{mapping['payor_url']}/api/claims/"
             headers = self.get_auth_headers()
             
             # Prepare claim data for payor system
@@ -177,7 +284,7 @@ class PayorIntegrationService:
                 'submitted_from': 'provider_system'
             }
             
-            response = requests.post(url, json=payor_claim_data, headers=headers, timeout=self.timeout)
+            response = payor_pools.for_mapping(mapping).post(url, json=payor_claim_data, headers=headers)
             
             if response.status_code in [200, 201]:
                 result = response.json()
@@ -185,6 +292,7 @@ class PayorIntegrationService:
                     'success': True,
                     'error': None,
                     'payor_claim_id': result.get('id') or result.get('claim_id'),
+                    'payor_name': mapping.get('payor_name'),
                     'payor_response': result
                 }
             else:
@@ -203,21 +311,31 @@ class PayorIntegrationService:
                 'payor_claim_id': None
             }
 
-    def get_claim_status_from_payor(self, payor_claim_id: str) -> Dict[str, Any]:
+    def get_claim_status_from_payor(self, payor_claim_id: str, payor_name: Optional[str] = None,
+                                    insurance_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get claim status from payor system
         
         Args:
             payor_claim_id: Claim ID in payor system
+            payor_name: Payor the claim was submitted to (selects its connection pool)
+            insurance_id: Insurance ID of the claim (routes to its mapped payor URL)
             
         Returns:
             Dict with claim status
         """
         try:
-            url = f"{self.payor_base_url}/api/claims/{payor_claim_id}/"
+            # Ask the payor the claim was submitted to, like submit_claim_to_payor
+            mapping = self.resolve_insurance(insurance_id) if insurance_id else None
+            if mapping is not None:
+                url = f"{mapping['payor_url']}/api/claims/{payor_claim_id}/"
+                pool = payor_pools.for_mapping(mapping)
+            else:
+                url = f"{self.payor_base_url}/api/claims/{payor_claim_id}/"
+                pool = payor_pools.for_payor(payor_name, self.payor_base_url)
             headers = self.get_auth_headers()
             
-            response = requests.get(url, headers=headers, timeout=self.timeout)
+            response = pool.get(url, headers=headers)
             
             if response.status_code == 200:
                 return {
@@ -240,17 +358,20 @@ class PayorIntegrationService:
                 'claim_data': None
             }
 
-    def sync_claim_status(self, payor_claim_id: str) -> Dict[str, Any]:
+    def sync_claim_status(self, payor_claim_id: str, payor_name: Optional[str] = None,
+                          insurance_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Synchronize claim status between provider and payor systems
         
         Args:
             payor_claim_id: Claim ID in payor system
+            payor_name: Payor the claim was submitted to
+            insurance_id: Insurance ID of the claim
             
         Returns:
             Dict with synchronized status
         """
-        payor_result = self.get_claim_status_from_payor(payor_claim_id)
+        payor_result = self.get_claim_status_from_payor(payor_claim_id, payor_name, insurance_id)
         
         if payor_result['success']:
             payor_claim = payor_result['claim_data']
@@ -270,25 +391,34 @@ class PayorIntegrationService:
     def get_insurance_policies(self) -> List[Dict[str, Any]]:
         """
         Get available insurance policies from payor system
+        (shared through the reference cache, failures are not cached)
         
         Returns:
             List of insurance policies
         """
+        policies = policy_cache.get_or_set(self.policies_cache_key, self._fetch_insurance_policies, cache_none=False)
+        return policies if policies is not None else []
+
+    @property
+    def policies_cache_key(self) -> str:
+        return f'payor:{self.payor_base_url}'
+
+    def _fetch_insurance_policies(self) -> Optional[List[Dict[str, Any]]]:
         try:
             url = f"{self.payor_base_url}/api/insurance-policies/"
             headers = self.get_auth_headers()
             
-            response = requests.get(url, headers=headers, timeout=self.timeout)
+            response = payor_pools.for_url(self.payor_base_url).get(url, headers=headers)
             
             if response.status_code == 200:
                 return response.json()
             else:
                 logger.error(f"Failed to get insurance policies: {response.status_code}")
-                return []
+                return None
                 
         except requests.RequestException as e:
             logger.error(f"Error getting insurance policies: {e}")
-            return []
+            return None
 
     def update_payor_configuration(self, payor_url: str, email: str, password: str):
         """
@@ -303,6 +433,10 @@ class PayorIntegrationService:
         self.payor_email = email
         self.payor_password = password
         
+        # Results from the previous payor are no longer trustworthy (in any process)
+        validation_cache.invalidate_all()
+        policy_cache.bump()
+        
         # Cache the configuration
         cache.set('payor_config', {
             'url': payor_url,
@@ -321,7 +455,7 @@ class PayorIntegrationService:
             url = f"{self.payor_base_url}/api/health/"
             headers = self.get_auth_headers()
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = payor_pools.for_url(self.payor_base_url).get(url, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 return {
@@ -343,6 +477,64 @@ class PayorIntegrationService:
                 'error': str(e)
             }
 
+    async def test_connection_async(self) -> Dict[str, Any]:
+        """Async variant of test_connection (the payor's pooled httpx client)"""
+        import httpx
+        from .async_clients import get_async_http
+        
+        try:
+            response = await get_async_http(self.payor_base_url).get(
+                f"{self.payor_base_url}/api/health/", headers=self.get_auth_headers(), timeout=10
+            )
+            
+            if response.status_code == 200:
+                return {
+                    'success': True,
+                    'message': 'Successfully connected to payor system',
+                    'payor_info': response.json()
+                }
+            else:
+                return {
+                    'success': False,
+                    'message': f'Connection failed: {response.status_code}',
+                    'error': response.text
+                }
+                
+        except httpx.HTTPError as e:
+            return {
+                'success': False,
+                'message': f'Connection error: {str(e)}',
+                'error': str(e)
+            }
+
+    async def get_insurance_policies_async(self) -> List[Dict[str, Any]]:
+        """Async variant of get_insurance_policies (the payor's pooled httpx client)"""
+        import httpx
+        from asgiref.sync import sync_to_async
+        from .async_clients import get_async_http
+        
+        # The shared tier is file-based by default: keep its I/O off the event loop
+        policies = await sync_to_async(policy_cache.get, thread_sensitive=False)(self.policies_cache_key)
+        if policies is not MISSING:
+            return policies
+        
+        try:
+            response = await get_async_http(self.payor_base_url).get(
+                f"{self.payor_base_url}/api/insurance-policies/", headers=self.get_auth_headers()
+            )
+            
+            if response.status_code == 200:
+                policies = response.json()
+                await sync_to_async(policy_cache.set, thread_sensitive=False)(self.policies_cache_key, policies)
+                return policies
+            else:
+                logger.error(f"Failed to get insurance policies: {response.status_code}")
+                return []
+                
+        except httpx.HTTPError as e:
+            logger.error(f"Error getting insurance policies: {e}")
+            return []
+
 
 # Global instance
 payor_service = PayorIntegrationService()
\ No newline at end of file
@@ -6,7 +6,8 @@ Views for managing payor system integration
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
@@ -16,6 +17,8 @@ from bson import ObjectId
 
 from .mongo_models import Claim
 from .payor_integration import payor_service
+from .validation_cache import validation_cache
+from .status_history import status_history
 from .mongo_views import serialize_claim
 
 
@@ -36,8 +39,10 @@ class PayorIntegrationView(APIView):
             
             return Response({
                 'connection_status': connection_test,
-                'insurance_mappings': payor_service.insurance_mappings,
+                'insurance_mappings': payor_service.insurance_registry.all_mappings(),
+                'insurance_mappings_version': payor_service.insurance_registry.version,
                 'insurance_policies': policies,
+                'validation_cache': validation_cache.stats(),
                 'payor_config': {
                     'base_url': payor_service.payor_base_url,
                     'email': payor_service.payor_email
@@ -108,10 +113,11 @@ class ClaimSyncView(APIView):
                     )
                 
                 # Sync with payor
-                sync_result = payor_service.sync_claim_status(claim.payor_claim_id)
+                sync_result = payor_service.sync_claim_status(claim.payor_claim_id, claim.payor_name, claim.insurance_id)
                 
                 if 'error' not in sync_result:
                     # Update local claim
+                    previous_status = claim.status
                     claim.status = sync_result.get('status', claim.status)
                     claim.amount_approved = sync_result.get('amount_approved', claim.amount_approved)
                     claim.rejection_reason = sync_result.get('rejection_reason', claim.rejection_reason)
@@ -119,6 +125,7 @@ class ClaimSyncView(APIView):
                         claim.date_processed = datetime.fromisoformat(sync_result['date_processed'].replace('Z', '+00:00'))
                     claim.date_updated = datetime.now()
                     claim.save()
+                    status_history.record(claim, previous_status, claim.status, notes='Payor status sync')
                     
                     return Response({
                         'message': 'Claim synchronized successfully',
@@ -138,9 +145,10 @@ class ClaimSyncView(APIView):
                 
                 for claim in claims_to_sync:
                     try:
-                        sync_result = payor_service.sync_claim_status(claim.payor_claim_id)
+                        sync_result = payor_service.sync_claim_status(claim.payor_claim_id, claim.payor_name, claim.insurance_id)
                         
                         if 'error' not in sync_result:
+                            previous_status = claim.status
                             claim.status = sync_result.get('status', claim.status)
                             claim.amount_approved = sync_result.get('amount_approved', claim.amount_approved)
                             claim.rejection_reason = sync_result.get('rejection_reason', claim.rejection_reason)
@@ -148,6 +156,7 @@ class ClaimSyncView(APIView):
                                 claim.date_processed = datetime.fromisoformat(sync_result['date_processed'].replace('Z', '+00:00'))
                             claim.date_updated = datetime.now()
                             claim.save()
+                            status_history.record(claim, previous_status, claim.status, notes='Payor status sync')
                             synced_count += 1
                         else:
                             errors.append(f"Claim {claim.claim_number}: {sync_result['error']}")
@@ -174,6 +183,19 @@ class PolicyValidationView(APIView):
     authentication_classes = []
     permission_classes = [AllowAny]
     
+    # Cache metrics and catalog reloads are for staff users only
+    STAFF_METHODS = ('GET', 'DELETE')
+    
+    def get_authenticators(self):
+        if self.request.method in self.STAFF_METHODS:
+            return [SessionAuthentication(), BasicAuthentication()]
+        return super().get_authenticators()
+    
+    def get_permissions(self):
+        if self.request.method in self.STAFF_METHODS:
+            return [IsAdminUser()]
+        return super().get_permissions()
+    
     def post(self, request):
         """Validate claim against insurance policy"""
         try:
@@ -195,4 +217,32 @@ class PolicyValidationView(APIView):
             return Response(
                 {'error': f'Failed to validate policy: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def get(self, request):
+        """Get validation cache metrics"""
+        return Response(validation_cache.stats())
+    
+    def delete(self, request):
+        """Reload the policy catalog and invalidate cached results"""
+        try:
+            insurance_id = request.query_params.get('insurance_id')
+            if insurance_id:
+                removed = validation_cache.invalidate(insurance_id=insurance_id)
+                return Response({
+                    'message': f'Invalidated {removed} cached results for {insurance_id}',
+                    'cache': validation_cache.stats()
+                })
+            
+            changed = payor_service.reload_policy_catalog()
+            return Response({
+                'message': f'Policy catalog reloaded, {len(changed)} policies changed',
+                'changed_policies': changed,
+                'cache': validation_cache.stats()
+            })
+            
+        except Exception as e:
+            return Response(
+                {'error': f'Failed to reload policy catalog: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
\ No newline at end of file
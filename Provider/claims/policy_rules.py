@@ -0,0 +1,318 @@
+"""
+Local Insurance Policy Rule Engine
+Compiles the payor policy catalog (hcms_payor_db.insurance_policies.json) into
+hashed code sets and per-policy limit arrays so claims can be validated
+in-process instead of calling the payor validation endpoint
+"""
+
+import json
+import logging
+from array import array
+from typing import Dict, Any, Optional, List, Iterable, Tuple, Set
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_code(code: Any) -> str:
+    """Normalize a diagnosis code for set lookups"""
+    return str(code or '').strip().upper()
+
+
+def _normalize_text(value: Any) -> str:
+    """Normalize free text (treatment types) for set lookups"""
+    return ' '.join(str(value or '').lower().split())
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+class PolicyCatalog:
+    """
+    Compiled lookup structures for one version of the policy catalog
+
+    Never modified after construction: a reload builds a new catalog and the
+    engine swaps its reference, so concurrent evaluations see either the old
+    or the new rules, never a mix.
+    """
+
+    def __init__(self, policies: List[Dict[str, Any]]):
+        self.policy_numbers: List[str] = []
+        self.policy_index: Dict[str, int] = {}
+        self.policy_info: List[Dict[str, Any]] = []
+        self.raw: Dict[str, str] = {}
+
+        # Per-policy limit arrays
+        self.max_amount = array('d')
+        self.min_age = array('i')
+        self.max_age = array('i')
+        self.max_failed = array('i')
+        self.prior_auth_required = array('b')
+        self.is_active = array('b')
+
+        # Hashed code sets: value -> bitmask of policies
+        self.covered_codes: Dict[str, int] = {}
+        self.excluded_codes: Dict[str, int] = {}
+        self.covered_treatments: Dict[str, int] = {}
+        self.network_providers: Dict[str, int] = {}
+        self.network_restricted = 0
+
+        for policy in policies:
+            number = policy.get('policy_number')
+            if not number or number in self.policy_index:
+                continue
+
+            i = len(self.policy_numbers)
+            bit = 1 << i
+            conditions = policy.get('coverage_conditions', {}) or {}
+
+            self.policy_numbers.append(number)
+            self.policy_index[number] = i
+            self.policy_info.append({
+                'policy_number': number,
+                'policy_name': policy.get('policy_name'),
+                'payor_id': policy.get('payor_id'),
+            })
+            self.raw[number] = json.dumps(policy, sort_keys=True, default=str)
+
+            diagnosis = conditions.get('diagnosis_codes', {}) or {}
+            for code in diagnosis.get('covered_codes', []) or []:
+                key = _normalize_code(code)
+                self.covered_codes[key] = self.covered_codes.get(key, 0) | bit
+            for code in diagnosis.get('excluded_codes', []) or []:
+                key = _normalize_code(code)
+                self.excluded_codes[key] = self.excluded_codes.get(key, 0) | bit
+
+            treatments = conditions.get('treatment_type', {}) or {}
+            for treatment in treatments.get('covered_treatments', []) or []:
+                key = _normalize_text(treatment)
+                self.covered_treatments[key] = self.covered_treatments.get(key, 0) | bit
+
+            network = (conditions.get('provider_network', {}) or {}).get('network_providers')
+            if network:
+                self.network_restricted |= bit
+                for provider_id in network:
+                    self.network_providers[provider_id] = self.network_providers.get(provider_id, 0) | bit
+
+            limits = conditions.get('amount_limits', {}) or {}
+            max_amount = _to_float(limits.get('max_amount'))
+            self.max_amount.append(max_amount if max_amount is not None else float('inf'))
+
+            ages = conditions.get('age_restrictions', {}) or {}
+            self.min_age.append(int(ages.get('min_age', 0) or 0))
+            self.max_age.append(int(ages.get('max_age', 150) or 150))
+
+            self.max_failed.append(int(policy.get('max_failed_conditions', 0) or 0))
+            self.prior_auth_required.append(
+                1 if (conditions.get('prior_authorization', {}) or {}).get('required') else 0
+            )
+            self.is_active.append(1 if policy.get('is_active', True) else 0)
+
+
+class PolicyRuleEngine:
+    """
+    In-memory rule engine built from the insurance policy catalog
+
+    Every policy gets an index ``i`` in the compiled PolicyCatalog; code sets are stored as ``{code: bitmask}``
+    where bit ``i`` is set when policy ``i`` covers (or excludes) the code, and
+    numeric limits live in ``array`` columns indexed by ``i``. Evaluating a claim
+    is therefore a handful of dict lookups and bit operations.
+    """
+
+    def __init__(self, policies: Iterable[Dict[str, Any]] = ()):
+        self.source_path = None
+        self.catalog = PolicyCatalog(list(policies))
+
+    @classmethod
+    def from_file(cls, path) -> 'PolicyRuleEngine':
+        """
+        Build an engine from a catalog JSON export
+
+        Args:
+            path: Path to the catalog file (list of policy documents)
+
+        Returns:
+            PolicyRuleEngine (empty if the file cannot be read)
+        """
+        engine = cls(cls._read_catalog(path))
+        engine.source_path = path
+        return engine
+
+    @staticmethod
+    def _read_catalog(path) -> List[Dict[str, Any]]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, list) else []
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load insurance policy catalog from {path}: {e}")
+            return []
+
+    def reload(self, path=None) -> Set[str]:
+        """
+        Recompile the engine from the catalog file
+
+        Args:
+            path: Optional new catalog path (defaults to the original one)
+
+        Returns:
+            Set of policy numbers that were added, removed or changed
+        """
+        path = path or self.source_path
+        old_raw = self.catalog.raw
+        catalog = PolicyCatalog(self._read_catalog(path))
+        # Single reference swap: evaluations in flight keep the catalog they started with
+        self.catalog = catalog
+        self.source_path = path
+
+        changed = {number for number in set(old_raw) | set(catalog.raw)
+                   if old_raw.get(number) != catalog.raw.get(number)}
+        if changed:
+            logger.info(f"Policy catalog reloaded, {len(changed)} policies changed")
+        return changed
+
+    def has_policy(self, policy_number: Optional[str]) -> bool:
+        return policy_number in self.catalog.policy_index
+
+    def has_age_restriction(self, policy_number: Optional[str]) -> bool:
+        """Whether a policy limits the patient age (unknown policies: False)"""
+        catalog = self.catalog
+        i = catalog.policy_index.get(policy_number)
+        return i is not None and (catalog.min_age[i] > 0 or catalog.max_age[i] < 150)
+
+    def evaluate(self, policy_number: str, claim_data: Dict[str, Any],
+                 provider_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Validate a single claim against a compiled policy
+
+        Args:
+            policy_number: Catalog policy number (e.g. POL-001-BASIC)
+            claim_data: Claim data (diagnosis/procedure codes, amount, age...)
+            provider_id: Default provider ID for network checks
+
+        Returns:
+            Validation result in the same shape as the payor validation
+            endpoint, or None if the policy is not in the catalog
+        """
+        return self.evaluate_batch([(policy_number, claim_data)], provider_id=provider_id)[0]
+
+    def evaluate_batch(self, items: List[Tuple[str, Dict[str, Any]]],
+                       provider_id: Optional[str] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Validate many claims in one pass
+
+        Claim fields are first extracted into flat columns, then every claim
+        is checked against its policy's limit arrays and code bitmasks.
+
+        Args:
+            items: List of (policy_number, claim_data) pairs
+            provider_id: Default provider ID for network checks
+
+        Returns:
+            List of validation results aligned with ``items``
+        """
+        catalog = self.catalog
+        count = len(items)
+        indexes = array('i', [catalog.policy_index.get(number, -1) for number, _ in items])
+        amounts = array('d', [0.0] * count)
+        ages = array('i', [0] * count)
+        auths = array('b', [0] * count)
+        codes: List[List[str]] = []
+        treatments: List[str] = []
+        providers: List[Optional[str]] = []
+
+        for n, (_, claim) in enumerate(items):
+            amounts[n] = _to_float(claim.get('amount_requested', claim.get('amount'))) or 0.0
+            ages[n] = int(_to_float(claim.get('patient_age')) or 0)
+            auths[n] = 1 if claim.get('prior_authorization') else 0
+
+            claim_codes = []
+            if claim.get('diagnosis_code'):
+                claim_codes.append(_normalize_code(claim['diagnosis_code']))
+            for item in claim.get('diagnosis_codes', []) or []:
+                code = item.get('code') if isinstance(item, dict) else item
+                if code:
+                    claim_codes.append(_normalize_code(code))
+            codes.append(claim_codes)
+
+            treatments.append(_normalize_text(claim.get('treatment_type') or claim.get('procedure_description')))
+            providers.append(claim.get('provider_id') or provider_id)
+
+        results: List[Optional[Dict[str, Any]]] = []
+        for n in range(count):
+            i = indexes[n]
+            if i < 0:
+                results.append(None)
+                continue
+
+            bit = 1 << i
+            info = catalog.policy_info[i]
+            failed = []
+            passed = []
+
+            excluded = [code for code in codes[n] if catalog.excluded_codes.get(code, 0) & bit]
+            if codes[n]:
+                uncovered = [code for code in codes[n] if not catalog.covered_codes.get(code, 0) & bit]
+                (failed if uncovered or excluded else passed).append('diagnosis_code')
+
+            if treatments[n]:
+                covered = catalog.covered_treatments.get(treatments[n], 0) & bit
+                (passed if covered else failed).append('treatment_type')
+
+            (failed if amounts[n] > catalog.max_amount[i] else passed).append('amount_limit')
+
+            if catalog.prior_auth_required[i]:
+                (passed if auths[n] else failed).append('prior_authorization')
+
+            if ages[n]:
+                within = catalog.min_age[i] <= ages[n] <= catalog.max_age[i]
+                (passed if within else failed).append('age_restriction')
+
+            if catalog.network_restricted & bit:
+                in_network = catalog.network_providers.get(providers[n], 0) & bit
+                (passed if in_network else failed).append('provider_network')
+
+            active = bool(catalog.is_active[i])
+            is_valid = active and not excluded and len(failed) <= catalog.max_failed[i]
+
+            if not active:
+                error = f"Insurance policy {info['policy_number']} is not active"
+            elif excluded:
+                error = f"Diagnosis code {', '.join(excluded)} is excluded by policy {info['policy_number']}"
+            elif not is_valid:
+                error = f"Claim failed policy conditions: {', '.join(failed)}"
+            else:
+                error = None
+
+            results.append({
+                'is_valid': is_valid,
+                'error': error,
+                'coverage_details': {
+                    **info,
+                    'failed_conditions': failed,
+                    'passed_conditions': passed,
+                    'excluded_codes': excluded,
+                    'max_failed_conditions': catalog.max_failed[i],
+                    'max_amount': catalog.max_amount[i] if catalog.max_amount[i] != float('inf') else None,
+                    'requires_prior_authorization': bool(catalog.prior_auth_required[i]),
+                    'validated_locally': True,
+                    'message': 'Claim meets policy coverage conditions' if is_valid else error,
+                }
+            })
+
+        return results
+
+
+def _load_default_engine() -> PolicyRuleEngine:
+    from django.conf import settings
+    path = getattr(settings, 'INSURANCE_POLICY_CATALOG', None)
+    if not path:
+        return PolicyRuleEngine()
+    return PolicyRuleEngine.from_file(path)
+
+
+# Global instance
+policy_engine = _load_default_engine()
@@ -6,13 +6,16 @@ Implements full integration as per PROVIDER_INTEGRATION_GUIDE.md
 import requests
 import hashlib
 import hmac
-import json
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 from django.conf import settings
 from django.core.cache import cache
 
+from .code_sets import code_index
+from .structured_logging import log_payload
+from .http import payor_pools
+
 logger = logging.getLogger(__name__)
 
 
@@ -33,7 +36,6 @@ class ProviderPayorAPI:
         self.provider_id = getattr(settings, 'PROVIDER_ID', 'PROV-001')
         self.provider_name = getattr(settings, 'PROVIDER_NAME', 'City Medical Center')
         self.webhook_secret = getattr(settings, 'PAYOR_WEBHOOK_SECRET', 'default-secret-key')
-        self.timeout = 30
         
         logger.info(f"Initialized ProviderPayorAPI with base URL: {self.payor_base_url}")
 
@@ -127,27 +129,25 @@ class ProviderPayorAPI:
             url = f"{self.payor_base_url}/claims/"
             headers = self.get_headers(include_auth=True)
             
-            logger.info(f"Submitting claim to payor: {url}")
-            logger.info(f"Claim data: {json.dumps(payor_claim_data, indent=2)}")
+            logger.debug("Submitting claim to payor: %s", url)
+            log_payload(logger, "Claim data", payor_claim_data)
             
-            response = requests.post(
+            response = payor_pools.for_url(url).post(
                 url, 
                 json=payor_claim_data, 
-                headers=headers, 
-                timeout=self.timeout
+                headers=headers
             )
             
-            logger.info(f"Payor response status: {response.status_code}")
-            logger.info(f"Payor response content-type: {response.headers.get('content-type')}")
-            logger.info(f"Payor response text (first 500 chars): {response.text[:500]}")
+            logger.debug("Payor response status: %s (%s)", response.status_code, response.headers.get('content-type'))
+            log_payload(logger, "Payor response text", response.text[:500], status_code=response.status_code)
             
             # Parse response
             if response.status_code in [200, 201]:
                 try:
                     result = response.json()
                 except ValueError as json_err:
-                    logger.error(f"Failed to parse payor response as JSON: {json_err}")
-                    logger.error(f"Response text: {response.text[:500]}")
+                    logger.error("Failed to parse payor response as JSON: %s", json_err,
+                                 extra={'response_text': response.text[:500]})
                     return {
                         'success': False,
                         'error': 'Invalid JSON response from payor',
@@ -157,7 +157,7 @@ class ProviderPayorAPI:
                     }
                 
                 # Log the response
-                logger.info(f"Claim submitted successfully - Status: {result.get('status')}")
+                logger.info("Claim submitted successfully - Status: %s", result.get('status'))
                 
                 return {
                     'success': True,
@@ -225,42 +225,42 @@ class ProviderPayorAPI:
             url = f"{self.payor_base_url}/claims/{payor_claim_id}/"
             headers = self.get_headers(include_auth=True)
             
-            logger.info(f"Fetching claim status from payor: {url}")
+            logger.debug("Fetching claim status from payor: %s", url)
             
-            response = requests.get(url, headers=headers, timeout=self.timeout)
+            response = payor_pools.for_url(url).get(url, headers=headers)
             
-            if response.status_code == 200:
-                result = response.json()
+            return self._claim_status_result(payor_claim_id, response.status_code,
+                                             response.json() if response.status_code == 200 else None)
                 
-                return {
-                    'success': True,
-                    'claim': result,
-                    'status': result.get('status'),
-                    'claim_id': result.get('claim_id'),
-                    'patient_name': result.get('patient_name'),
-                    'amount': result.get('amount'),
-                    'approved_amount': result.get('expected_payment'),
-                    'patient_responsibility': result.get('patient_responsibility'),
-                    'processed_date': result.get('processed_date'),
-                    'submitted_date': result.get('submitted_date')
-                }
+        except requests.RequestException as e:
+            logger.error(f"Error getting claim status: {e}")
+            return {
+                'success': False,
+                'error': f'Connection error: {str(e)}',
+                'claim': None
+            }
+
+    async def get_claim_status_async(self, payor_claim_id: str) -> Dict[str, Any]:
+        """
+        Async variant of get_claim_status for the async views (the payor's pooled httpx client)
+        
+        Args:
+            payor_claim_id: The claim ID from payor system
             
-            elif response.status_code == 404:
-                return {
-                    'success': False,
-                    'error': f'Claim {payor_claim_id} not found in payor system',
-                    'claim': None
-                }
+        Returns:
+            Dict with claim status and details
+        """
+        import httpx
+        from .async_clients import get_async_http
+        
+        try:
+            url = f"{self.payor_base_url}/claims/{payor_claim_id}/"
+            response = await get_async_http(url).get(url, headers=self.get_headers(include_auth=True))
             
-            else:
-                logger.error(f"Failed to get claim status: {response.status_code}")
-                return {
-                    'success': False,
-                    'error': f'Payor system error: {response.status_code}',
-                    'claim': None
-                }
+            return self._claim_status_result(payor_claim_id, response.status_code,
+                                             response.json() if response.status_code == 200 else None)
                 
-        except requests.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error getting claim status: {e}")
             return {
                 'success': False,
@@ -268,6 +268,38 @@ class ProviderPayorAPI:
                 'claim': None
             }
 
+    def _claim_status_result(self, payor_claim_id: str, status_code: int,
+                             result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the claim status response from a payor status code and body"""
+        if status_code == 200:
+            return {
+                'success': True,
+                'claim': result,
+                'status': result.get('status'),
+                'claim_id': result.get('claim_id'),
+                'patient_name': result.get('patient_name'),
+                'amount': result.get('amount'),
+                'approved_amount': result.get('expected_payment'),
+                'patient_responsibility': result.get('patient_responsibility'),
+                'processed_date': result.get('processed_date'),
+                'submitted_date': result.get('submitted_date')
+            }
+        
+        elif status_code == 404:
+            return {
+                'success': False,
+                'error': f'Claim {payor_claim_id} not found in payor system',
+                'claim': None
+            }
+        
+        else:
+            logger.error(f"Failed to get claim status: {status_code}")
+            return {
+                'success': False,
+                'error': f'Payor system error: {status_code}',
+                'claim': None
+            }
+
     def verify_webhook_signature(self, payload: str, signature: str) -> bool:
         """
         Verify webhook signature from Payor system
@@ -397,33 +429,27 @@ class ProviderPayorAPI:
         except (ValueError, TypeError):
             errors.append("Amount must be a valid number")
         
-        # Validate diagnosis code format (basic ICD-10 validation)
-        # Check single code
-        diagnosis_code = claim_data.get('diagnosis_code', '')
-        if diagnosis_code and not self._validate_icd10_format(diagnosis_code):
-            warnings.append(f"Diagnosis code '{diagnosis_code}' may not be a valid ICD-10 format")
-        
-        # Check array of codes
-        diagnosis_codes = claim_data.get('diagnosis_codes', [])
-        if diagnosis_codes:
-            for code_item in diagnosis_codes:
-                code = code_item.get('code', '') if isinstance(code_item, dict) else code_item
-                if code and not self._validate_icd10_format(code):
-                    warnings.append(f"Diagnosis code '{code}' may not be a valid ICD-10 format")
-        
-        # Validate procedure code format (basic CPT validation)
-        # Check single code
-        procedure_code = claim_data.get('procedure_code', '')
-        if procedure_code and not self._validate_cpt_format(procedure_code):
-            warnings.append(f"Procedure code '{procedure_code}' may not be a valid CPT format")
+        # Validate diagnosis code format (basic ICD-10 validation) and existence
+        diagnosis_codes = [claim_data.get('diagnosis_code', '')] + [
+            code_item.get('code', '') if isinstance(code_item, dict) else code_item
+            for code_item in claim_data.get('diagnosis_codes', []) or []
+        ]
+        diagnosis_check = code_index.validate_batch([code for code in diagnosis_codes if code], 'icd10')
+        for code in diagnosis_check['invalid_format']:
+            warnings.append(f"Diagnosis code '{code}' may not be a valid ICD-10 format")
+        for code in diagnosis_check['unknown']:
+            warnings.append(f"Diagnosis code '{code}' was not found in the ICD-10 code set")
         
-        # Check array of codes
-        procedure_codes = claim_data.get('procedure_codes', [])
-        if procedure_codes:
-            for code_item in procedure_codes:
-                code = code_item.get('code', '') if isinstance(code_item, dict) else code_item
-                if code and not self._validate_cpt_format(code):
-                    warnings.append(f"Procedure code '{code}' may not be a valid CPT format")
+        # Validate procedure code format (basic CPT validation) and existence
+        procedure_codes = [claim_data.get('procedure_code', '')] + [
+            code_item.get('code', '') if isinstance(code_item, dict) else code_item
+            for code_item in claim_data.get('procedure_codes', []) or []
+        ]
+        procedure_check = code_index.validate_batch([code for code in procedure_codes if code], 'cpt')
+        for code in procedure_check['invalid_format']:
+            warnings.append(f"Procedure code '{code}' may not be a valid CPT format")
+        for code in procedure_check['unknown']:
+            warnings.append(f"Procedure code '{code}' was not found in the CPT code set")
         
         return {
             'is_valid': len(errors) == 0,
@@ -433,14 +459,11 @@ class ProviderPayorAPI:
 
     def _validate_icd10_format(self, code: str) -> bool:
         """Basic ICD-10 format validation"""
-        import re
-        # ICD-10 format: Letter followed by 2 digits, optional decimal and 1-2 more digits
-        return bool(re.match(r'^[A-Z]\d{2}(\.\d{1,2})?$', code))
+        return code_index.is_valid_icd10_format(code)
 
     def _validate_cpt_format(self, code: str) -> bool:
         """Basic CPT format validation"""
-        # CPT codes are 5 digits
-        return code.isdigit() and len(code) == 5
+        return code_index.is_valid_cpt_format(code)
 
     def submit_claim_with_retry(self, claim_data: Dict[str, Any], max_retries: int = 3) -> Dict[str, Any]:
         """
@@ -514,7 +537,7 @@ class ProviderPayorAPI:
             
             logger.info(f"Testing connection to payor at: {url}")
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = payor_pools.for_url(url).get(url, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 return {
@@ -17,6 +17,9 @@ import logging
 from datetime import datetime
 
 from .provider_payor_api import provider_payor_api
+from .code_sets import code_index
+from .status_history import status_history
+from .structured_logging import log_payload
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +38,7 @@ def submit_claim_to_payor(request):
         claim_data = request.data
         
         # Debug: Log received claim data
-        logger.info(f"Received claim data: {json.dumps(dict(claim_data), indent=2)}")
+        log_payload(logger, "Received claim data", dict(claim_data))
         
         # Validate claim data
         validation = provider_payor_api.validate_claim_data(claim_data)
@@ -53,7 +56,7 @@ def submit_claim_to_payor(request):
         if result['success']:
             # Save claim in MongoDB
             try:
-                from .mongo_models import Claim as MongoClaim
+                from .mongo_models import Claim as MongoClaim, to_money, utcnow
                 
                 # Handle both array and legacy formats
                 diagnosis_codes = claim_data.get('diagnosis_codes', [])
@@ -83,14 +86,14 @@ def submit_claim_to_payor(request):
                     diagnosis_description=primary_diagnosis,
                     procedure_code=procedure_codes[0]['code'] if procedure_codes else '',
                     procedure_description=procedure_codes[0]['description'] if procedure_codes else '',
-                    amount_requested=float(claim_data.get('amount_requested', claim_data.get('amount', 0))),
+                    amount_requested=to_money(claim_data.get('amount_requested', claim_data.get('amount', 0))),
                     amount_approved=result.get('payment_details', {}).get('approved_amount', 0),
                     status=result.get('status', 'submitted'),
                     payor_claim_id=result.get('payor_claim_id'),
                     payor_response=result.get('raw_response', {}),
                     insurance_id=claim_data.get('insurance_id'),
                     date_of_service=datetime.strptime(claim_data.get('date_of_service', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d'),
-                    date_submitted=datetime.now(),
+                    date_submitted=utcnow(),
                     notes=claim_data.get('notes', ''),
                     priority=claim_data.get('priority', 'medium')
                 )
@@ -148,10 +151,12 @@ def get_payor_claim_status(request, claim_id):
                 from .mongo_models import Claim as MongoClaim
                 mongo_claim = MongoClaim.objects(payor_claim_id=claim_id).first()
                 if mongo_claim:
+                    previous_status = mongo_claim.status
                     mongo_claim.status = result.get('status', mongo_claim.status)
                     mongo_claim.amount_approved = result.get('approved_amount', mongo_claim.amount_approved)
                     mongo_claim.payor_response = result.get('claim', {})
                     mongo_claim.save()
+                    status_history.record(mongo_claim, previous_status, mongo_claim.status, notes='Payor status check')
                     logger.info(f"Updated claim status in MongoDB: {claim_id}")
             except Exception as e:
                 logger.error(f"Error updating claim in MongoDB: {e}")
@@ -205,7 +210,7 @@ def payor_webhook_receiver(request):
         # Parse webhook data
         webhook_data = json.loads(raw_body)
         
-        logger.info(f"Received webhook: {webhook_data.get('event_type')} for claim {webhook_data.get('claim_id')}")
+        logger.info("Received webhook: %s for claim %s", webhook_data.get('event_type'), webhook_data.get('claim_id'))
         
         # Process webhook
         result = provider_payor_api.process_webhook_notification(webhook_data)
@@ -220,6 +225,7 @@ def payor_webhook_receiver(request):
                 from .mongo_models import Claim as MongoClaim
                 mongo_claim = MongoClaim.objects(payor_claim_id=claim_id).first()
                 if mongo_claim:
+                    previous_status = mongo_claim.status
                     mongo_claim.status = new_status
                     mongo_claim.payor_response = webhook_data
                     
@@ -233,6 +239,8 @@ def payor_webhook_receiver(request):
                         mongo_claim.notes = f"{mongo_claim.notes}\nRejection: {processed_data.get('message', '')}"
                     
                     mongo_claim.save()
+                    status_history.record(mongo_claim, previous_status, new_status,
+                                          notes=f"Payor webhook: {webhook_data.get('event_type')}")
                     logger.info(f"Updated claim in MongoDB: {claim_id} -> {new_status}")
                 else:
                     logger.warning(f"Claim not found in MongoDB: {claim_id}")
@@ -366,12 +374,14 @@ def sync_all_claims_status(request):
                 if result['success']:
                     new_status = result.get('status')
                     if new_status != claim.status:
+                        previous_status = claim.status
                         claim.status = new_status
                         claim.amount_approved = result.get('approved_amount', claim.amount_approved)
                         claim.payor_response = result.get('claim', {})
                         claim.save()
+                        status_history.record(claim, previous_status, new_status, notes='Payor status sync')
                         updated_count += 1
-                        logger.info(f"Updated claim {claim.claim_number}: {claim.status} -> {new_status}")
+                        logger.info(f"Updated claim {claim.claim_number}: {previous_status} -> {new_status}")
                         
             except Exception as e:
                 logger.error(f"Error syncing claim {claim.claim_number}: {e}")
@@ -394,3 +404,51 @@ def sync_all_claims_status(request):
             'success': False,
             'error': f'Internal server error: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def validate_codes(request):
+    """
+    Batch-validate ICD-10 diagnosis and CPT procedure codes
+    POST /api/provider/validate-codes/
+    
+    Request body:
+    {
+        "diagnosis_codes": ["E11.9", "I10", ...],
+        "procedure_codes": ["99213", ...]
+    }
+    """
+    try:
+        diagnosis_codes = request.data.get('diagnosis_codes', []) or []
+        procedure_codes = request.data.get('procedure_codes', []) or []
+        
+        if not isinstance(diagnosis_codes, list) or not isinstance(procedure_codes, list):
+            return Response({
+                'success': False,
+                'error': 'diagnosis_codes and procedure_codes must be lists'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        diagnosis_result = code_index.validate_batch(diagnosis_codes, 'icd10')
+        procedure_result = code_index.validate_batch(procedure_codes, 'cpt')
+        
+        # An empty index can only check formats; say so instead of reporting codes as valid
+        warnings = [
+            f'{label} code set is not loaded, codes were only format-checked (see manage.py load_code_sets)'
+            for label, result in (('ICD-10', diagnosis_result), ('CPT', procedure_result))
+            if result['checked'] and not result['code_set_loaded']
+        ]
+        
+        return Response({
+            'success': True,
+            'diagnosis_codes': diagnosis_result,
+            'procedure_codes': procedure_result,
+            'warnings': warnings
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Error in validate_codes: {e}", exc_info=True)
+        return Response({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
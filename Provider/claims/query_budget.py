@@ -0,0 +1,220 @@
+"""
+MongoDB Query Budgets
+Development/test instrumentation that attributes every MongoDB command to the
+request (or ``track_queries`` block) that issued it, flags repeated query
+shapes (N+1 patterns) and enforces per-endpoint query budgets.
+
+Enabled with MONGO_QUERY_TRACKING; budgets come from MONGO_QUERY_BUDGETS and
+are enforced (raise) with MONGO_QUERY_BUDGET_STRICT, otherwise logged.
+"""
+
+import contextvars
+import json
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Cursor maintenance and handshakes are not separate queries
+IGNORED_COMMANDS = frozenset({
+    'getMore', 'killCursors', 'endSessions', 'hello', 'isMaster', 'ismaster', 'ping',
+    'saslStart', 'saslContinue', 'buildInfo', 'getLastError',
+})
+
+_current_trace: contextvars.ContextVar[Optional['QueryTrace']] = contextvars.ContextVar(
+    'mongo_query_trace', default=None
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """An endpoint ran more MongoDB queries than its budget allows"""
+
+
+def _shape(value) -> Any:
+    """Replace literal values with '?' so queries differing only in values match"""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [_shape(item) for item in value]
+        # Lists of scalars ($in values, inserted documents) collapse to one entry
+        return shapes[:1] if all(shape == '?' for shape in shapes) else shapes
+    return None if value is None else '?'
+
+
+def query_shape(command_name: str, command: Dict[str, Any]) -> str:
+    """
+    Normalized description of a command: name, collection and filter structure
+
+    Args:
+        command_name: Command name (find, update, aggregate, ...)
+        command: Command document
+
+    Returns:
+        Shape string, e.g. ``find claims {"provider_id": "?"}``
+    """
+    collection = command.get(command_name)
+    if command_name == 'find':
+        detail = _shape({'filter': command.get('filter', {}), 'sort': command.get('sort')})
+    elif command_name in ('update', 'delete'):
+        statements = command.get('updates') or command.get('deletes') or [{}]
+        detail = _shape({'q': statements[0].get('q', {})})
+    elif command_name == 'findAndModify':
+        detail = _shape({'query': command.get('query', {})})
+    elif command_name == 'aggregate':
+        detail = {'stages': [next(iter(stage), '') for stage in command.get('pipeline', [])]}
+    elif command_name in ('count', 'distinct'):
+        detail = _shape({'query': command.get('query', {})})
+    else:
+        detail = {}
+    shaped = json.dumps(detail, sort_keys=True, default=str)
+    return f'{command_name} {collection} {shaped}'
+
+
+class QueryTrace:
+    """MongoDB queries issued within one request or tracking block (nested blocks count toward the enclosing one)"""
+
+    def __init__(self, label: str = '', parent: Optional['QueryTrace'] = None):
+        self.label = label
+        self.parent = parent
+        self.queries: List[Dict[str, Any]] = []
+
+    def add(self, command_name: str, shape: str, duration_ms: float):
+        self.queries.append({'command': command_name, 'shape': shape, 'duration_ms': round(duration_ms, 3)})
+        if self.parent is not None:
+            self.parent.add(command_name, shape, duration_ms)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    def repeated(self, threshold: int = 2) -> Dict[str, int]:
+        """Shapes issued at least ``threshold`` times"""
+        counts = Counter(query['shape'] for query in self.queries)
+        return {shape: count for shape, count in counts.items() if count >= threshold}
+
+    def report(self) -> str:
+        """Human-readable list of the queries and repeated shapes"""
+        lines = [f"{self.count} MongoDB queries{f' for {self.label}' if self.label else ''}:"]
+        for n, query in enumerate(self.queries, 1):
+            lines.append(f"  {n}. {query['shape']} ({query['duration_ms']} ms)")
+        for shape, count in self.repeated().items():
+            lines.append(f"  repeated x{count}: {shape}")
+        return '\n'.join(lines)
+
+
+class QueryTraceListener(monitoring.CommandListener):
+    """Command listener adding each query to the active trace (no-op without one)"""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        trace = _current_trace.get()
+        if trace is None or event.command_name in IGNORED_COMMANDS:
+            return
+        # The command document is only available on the started event
+        self._pending[(event.request_id, event.connection_id)] = (trace, query_shape(event.command_name, event.command))
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        pending = self._pending.pop((event.request_id, event.connection_id), None)
+        if pending is not None:
+            trace, shape = pending
+            trace.add(event.command_name, shape, event.duration_micros / 1000)
+
+
+# Global instance
+query_trace_listener = QueryTraceListener()
+
+
+@contextmanager
+def track_queries(label: str = ''):
+    """
+    Record the MongoDB queries issued inside the block
+
+    Args:
+        label: Name used in reports
+
+    Yields:
+        QueryTrace collecting the queries
+    """
+    trace = QueryTrace(label, parent=_current_trace.get())
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def budget_for(budgets: Dict[str, int], method: str, view_name: str) -> Optional[int]:
+    """Budget for ``"<METHOD> <view_name>"``, falling back to ``"<view_name>"``"""
+    budget = budgets.get(f'{method} {view_name}')
+    return budgets.get(view_name) if budget is None else budget
+
+
+class QueryBudgetMiddleware:
+    """
+    Attribute MongoDB queries to the request and check them against the
+    endpoint's budget
+
+    Adds an ``X-Mongo-Queries`` header, logs repeated query shapes and, over
+    budget, logs the query list or (MONGO_QUERY_BUDGET_STRICT) raises
+    QueryBudgetExceeded so the test client fails the test.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from django.conf import settings
+
+        if not getattr(settings, 'MONGO_QUERY_TRACKING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.budgets = getattr(settings, 'MONGO_QUERY_BUDGETS', {})
+        self.strict = getattr(settings, 'MONGO_QUERY_BUDGET_STRICT', False)
+        self.repeat_threshold = getattr(settings, 'MONGO_REPEATED_QUERY_THRESHOLD', 3)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with track_queries(request.path) as trace:
+            response = self.get_response(request)
+        return self._check(request, response, trace)
+
+    async def __acall__(self, request):
+        with track_queries(request.path) as trace:
+            response = await self.get_response(request)
+        return self._check(request, response, trace)
+
+    def _check(self, request, response, trace: QueryTrace):
+        response['X-Mongo-Queries'] = str(trace.count)
+
+        repeated = trace.repeated(self.repeat_threshold)
+        if repeated:
+            logger.warning(
+                "🔁 Repeated MongoDB query shapes on %s %s", request.method, request.path,
+                extra={'repeated_queries': repeated}
+            )
+
+        match = getattr(request, 'resolver_match', None)
+        budget = budget_for(self.budgets, request.method, match.view_name) if match else None
+        if budget is not None and trace.count > budget:
+            message = f"{request.method} {match.view_name} ran {trace.count} MongoDB queries (budget {budget})"
+            if self.strict:
+                raise QueryBudgetExceeded(f"{message}\n{trace.report()}")
+            logger.warning(f"📈 {message}", extra={'queries': [query['shape'] for query in trace.queries]})
+        return response
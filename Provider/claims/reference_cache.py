@@ -0,0 +1,294 @@
+"""
+Two-Tier Reference Data Cache
+In-process LRU (L1) in front of a shared Django cache backend (L2, the
+``shared`` alias: file-based by default, memcached when configured) for hot
+reference data: users, insurance mapping rule sets and the payor policy list.
+
+Keys are versioned per namespace, so one write invalidates a namespace in
+every process, and concurrent misses for the same key are collapsed into a
+single load (per-key lock in the process, ``add``-based lock across processes).
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+logger = logging.getLogger(__name__)
+
+# Returned by get() on a miss (None is a cacheable value)
+MISSING = object()
+
+LOCK_STRIPES = 64
+
+
+class TwoTierCache:
+    """
+    L1 LRU + TTL per process, L2 shared cache with longer TTL
+
+    The namespace version lives in L2 and is re-read at most every
+    ``version_check_interval`` seconds; ``bump()`` sets a new version, after
+    which entries written under the old one are never returned again (L1
+    entries are tagged with the version, L2 keys include it).
+    """
+
+    def __init__(self, namespace: str, alias: str = 'shared', local_size: int = 10000,
+                 local_ttl: float = 30, shared_ttl: float = 300, version_check_interval: float = 2,
+                 lock_timeout: float = 10, lock_wait: float = 2):
+        self.namespace = namespace
+        self.alias = alias
+        self.local_size = local_size
+        self.local_ttl = local_ttl
+        self.shared_ttl = shared_ttl
+        self.version_check_interval = version_check_interval
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._version = None
+        self._version_checked_at = 0.0
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.lock_waits = 0
+        self.shared_errors = 0
+
+    @property
+    def shared(self):
+        try:
+            return caches[self.alias]
+        except InvalidCacheBackendError:
+            return caches['default']
+
+    def _shared_call(self, method: str, *args, **kwargs):
+        """Call the shared backend; failures degrade to L1-only caching"""
+        try:
+            return getattr(self.shared, method)(*args, **kwargs)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"⚠️ Shared cache {method} failed for {self.namespace}: {e}")
+            return None
+
+    @property
+    def version_key(self) -> str:
+        return f'{self.namespace}:version'
+
+    def version(self) -> int:
+        """Current namespace version (from L2, re-checked every version_check_interval)"""
+        now = time.monotonic()
+        if self._version is not None and now - self._version_checked_at < self.version_check_interval:
+            return self._version
+        version = self._shared_call('get', self.version_key)
+        if version is None:
+            # The key was never set or the backend evicted it (the file backend
+            # culls keys when full). Reusing an older version could bring back
+            # entries written before later bumps, so start a new one.
+            version = time.time_ns()
+            if self._shared_call('add', self.version_key, version, None) is False:
+                # Another process started one first
+                version = self._shared_call('get', self.version_key) or version
+        self._version = version
+        self._version_checked_at = now
+        return version
+
+    def bump(self) -> int:
+        """Invalidate the whole namespace in every process"""
+        # A time-based value instead of incr: file-based incr is not atomic, and
+        # two concurrent bumps must still produce a version nobody has cached
+        version = time.time_ns()
+        self._shared_call('set', self.version_key, version, None)
+        with self._lock:
+            self._version = version
+            self._version_checked_at = time.monotonic()
+            self._entries.clear()
+        return version
+
+    def _shared_key(self, key: str) -> str:
+        return f'{self.namespace}:{key}'
+
+    def get(self, key: str) -> Any:
+        """
+        Cached value for a key, or MISSING
+
+        Args:
+            key: Key within the namespace
+        """
+        value = self._lookup(key)
+        if value is MISSING:
+            self.misses += 1
+        return value
+
+    def _lookup(self, key: str) -> Any:
+        version = self.version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, expires_at, value = entry
+                if entry_version == version and expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.l1_hits += 1
+                    return value
+                del self._entries[key]
+
+        wrapped = self._shared_call('get', self._shared_key(key), version=version)
+        if wrapped is None:
+            return MISSING
+        self.l2_hits += 1
+        self._set_local(key, version, wrapped[0])
+        return wrapped[0]
+
+    def _set_local(self, key: str, version: int, value: Any):
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.local_ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.local_size:
+                self._entries.popitem(last=False)
+
+    def set(self, key: str, value: Any):
+        version = self.version()
+        # Wrapped so a cached None is distinguishable from a miss
+        self._shared_call('set', self._shared_key(key), (value,), self.shared_ttl, version=version)
+        self._set_local(key, version, value)
+
+    def delete(self, key: str):
+        self._shared_call('delete', self._shared_key(key), version=self.version())
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_or_set(self, key: str, loader: Callable[[], Any], cache_none: bool = True) -> Any:
+        """
+        Cached value, loading it once on a miss
+
+        Concurrent misses in this process wait for the first loader; other
+        processes wait (up to lock_wait) for the value to appear in L2.
+
+        Args:
+            key: Key within the namespace
+            loader: Called without arguments to produce the value
+            cache_none: Whether a None result is cached (negative caching)
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        with self._load_locks[hash(key) % LOCK_STRIPES]:
+            # Another thread may have loaded it while this one waited
+            value = self._lookup(key)
+            if value is not MISSING:
+                return value
+
+            version = self.version()
+            lock_key = self._shared_key(f'{key}:lock')
+            if self._shared_call('add', lock_key, 1, self.lock_timeout, version=version) is False:
+                # Another process is loading this key
+                self.lock_waits += 1
+                deadline = time.monotonic() + self.lock_wait
+                while time.monotonic() < deadline:
+                    time.sleep(0.02)
+                    wrapped = self._shared_call('get', self._shared_key(key), version=version)
+                    if wrapped is not None:
+                        self._set_local(key, version, wrapped[0])
+                        return wrapped[0]
+                lock_key = None
+
+            try:
+                self.loads += 1
+                value = loader()
+                if value is not None or cache_none:
+                    self.set(key, value)
+                return value
+            finally:
+                if lock_key:
+                    self._shared_call('delete', lock_key, version=version)
+
+    def clear_local(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for monitoring"""
+        with self._lock:
+            lookups = self.l1_hits + self.l2_hits + self.misses
+            return {
+                'namespace': self.namespace,
+                'local_size': len(self._entries),
+                'local_max_size': self.local_size,
+                'l1_hits': self.l1_hits,
+                'l2_hits': self.l2_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.l1_hits + self.l2_hits) / lookups, 4) if lookups else 0,
+                'loads': self.loads,
+                'lock_waits': self.lock_waits,
+                'shared_errors': self.shared_errors,
+                'version': self._version,
+            }
+
+
+def _cache_options(name: str) -> Dict[str, Any]:
+    return {
+        'local_size': getattr(settings, 'REFERENCE_CACHE_LOCAL_SIZE', 10000),
+        'local_ttl': getattr(settings, 'REFERENCE_CACHE_LOCAL_TTL', 30),
+        'shared_ttl': getattr(settings, 'REFERENCE_CACHE_TTL', {}).get(name, 300),
+        'version_check_interval': getattr(settings, 'REFERENCE_CACHE_VERSION_CHECK_SECONDS', 2),
+    }
+
+
+# Global instances
+user_cache = TwoTierCache('users', **_cache_options('users'))
+mapping_cache = TwoTierCache('insurance_mappings', **_cache_options('insurance_mappings'))
+policy_cache = TwoTierCache('insurance_policies', **_cache_options('insurance_policies'))
+
+REFERENCE_CACHES = (user_cache, mapping_cache, policy_cache)
+
+
+# User fields never cached (the shared tier is pickled to disk)
+USER_SECRET_FIELDS = ('password', 'reset_token', 'reset_token_expires')
+USER_CACHE_PROJECTION = {field: 0 for field in USER_SECRET_FIELDS}
+
+
+def _user_son(**query) -> Optional[Dict[str, Any]]:
+    from .mongo_models import User
+    return User._get_collection().find_one(query, USER_CACHE_PROJECTION)
+
+
+def get_active_user(username: Optional[str]):
+    """
+    Active user by username through the user cache
+
+    Args:
+        username: Username
+
+    Returns:
+        User document (a fresh instance without credential fields) or None
+    """
+    from .mongo_models import User
+    if not username:
+        return None
+    son = user_cache.get_or_set(f'username:{username}', lambda: _user_son(username=username, is_active=True))
+    return User._from_son(son) if son else None
+
+
+def get_user_by_id(user_id):
+    """
+    User by ObjectId through the user cache
+
+    Args:
+        user_id: ObjectId (or its string form)
+
+    Returns:
+        User document (a fresh instance without credential fields) or None
+    """
+    from bson import ObjectId
+    from .mongo_models import User
+    user_id = ObjectId(user_id)
+    son = user_cache.get_or_set(f'id:{user_id}', lambda: _user_son(_id=user_id))
+    return User._from_son(son) if son else None
@@ -0,0 +1,223 @@
+"""
+Claim List Response Cache
+Encoded claim list responses cached per provider (and the query parameters
+the list views read), validated
+against a per-provider version counter that every claim write bumps, so an
+unchanged list is served as stored bytes after a single version lookup
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Counter bumped by every claim write, read by unauthenticated (all claims) lists
+ALL_CLAIMS = '*'
+# Counter bumped by bulk changes (imports, generated data) that touch every provider
+EPOCH_ID = 'claims:epoch'
+
+
+def version_id(provider_id) -> str:
+    """registry_versions document ID for a provider's claim list"""
+    return f'claims:{provider_id or ALL_CLAIMS}'
+
+
+class ClaimListCache:
+    """
+    Thread-safe LRU of encoded claim list responses
+
+    Each entry remembers the list version it was built from. A provider's
+    version is the sum of its counter and the epoch counter, both only ever
+    increase, so any write makes every older entry for that provider stale.
+    The TTL only bounds staleness after writes that bypass the counters.
+
+    The cache is bounded by the total size of the stored bodies
+    (``max_bytes``); least recently used entries are evicted first. Only the
+    query parameters in ``key_params`` are part of the key, so parameters
+    the list views ignore (cache busters) do not create entries.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2 ** 20, ttl: float = 300, key_params: Iterable[str] = ()):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.key_params = frozenset(key_params)
+        self._entries: 'OrderedDict[Tuple, Tuple[int, float, bytes, str]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.bumps = 0
+
+    def make_key(self, provider_id, params) -> Tuple:
+        """
+        Build a cache key from the provider and the query parameters in key_params
+
+        Args:
+            provider_id: Provider ObjectId (None for the unfiltered list)
+            params: Request query parameters (QueryDict)
+
+        Returns:
+            Hashable key independent of parameter order
+        """
+        used = sorted((key, tuple(values)) for key, values in params.lists() if key in self.key_params)
+        return (str(provider_id or ALL_CLAIMS), tuple(used))
+
+    @staticmethod
+    def _version_query(provider_id) -> Dict[str, Any]:
+        return {'_id': {'$in': [version_id(provider_id), EPOCH_ID]}}
+
+    def read_version(self, provider_id) -> int:
+        """Current list version for a provider (one query)"""
+        from .mongo_models import RegistryVersion
+        docs = RegistryVersion._get_collection().find(self._version_query(provider_id), {'version': 1})
+        return sum(doc.get('version', 0) for doc in docs)
+
+    async def aread_version(self, db, provider_id) -> int:
+        """Async variant of read_version on an async database handle"""
+        from .mongo_models import RegistryVersion
+        cursor = db[RegistryVersion._get_collection_name()].find(self._version_query(provider_id), {'version': 1})
+        return sum(doc.get('version', 0) for doc in await cursor.to_list(None))
+
+    def _bump_requests(self, provider_ids: Iterable) -> List[UpdateOne]:
+        ids = {version_id(None)} | {version_id(provider_id) for provider_id in provider_ids if provider_id}
+        return [UpdateOne({'_id': name}, {'$inc': {'version': 1}}, upsert=True) for name in sorted(ids)]
+
+    def bump(self, *provider_ids):
+        """
+        Invalidate the cached lists of the given providers (and the unfiltered list)
+
+        Args:
+            provider_ids: ObjectIds of the providers whose claims changed
+        """
+        from .mongo_models import RegistryVersion
+        try:
+            RegistryVersion._get_collection().bulk_write(self._bump_requests(provider_ids), ordered=False)
+            self.bumps += 1
+        except Exception as e:
+            # The write itself succeeded; entries expire after the TTL
+            logger.warning(f"⚠️ Could not bump claim list version: {e}")
+
+    async def abump(self, db, *provider_ids):
+        """Async variant of bump on an async database handle"""
+        from .mongo_models import RegistryVersion
+        try:
+            await db[RegistryVersion._get_collection_name()].bulk_write(self._bump_requests(provider_ids), ordered=False)
+            self.bumps += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Could not bump claim list version: {e}")
+
+    def bump_all(self):
+        """Invalidate every provider's cached lists (after bulk imports)"""
+        from .mongo_models import RegistryVersion
+        RegistryVersion._get_collection().update_one({'_id': EPOCH_ID}, {'$inc': {'version': 1}}, upsert=True)
+        self.bumps += 1
+
+    def get(self, key: Tuple, version: int) -> Optional[Tuple[bytes, str]]:
+        """
+        Cached (body, etag) for a key if it was built from ``version``
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry_version, expires_at, body, etag = entry
+            if entry_version != version or expires_at <= now:
+                self._pop(key)
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body, etag
+
+    def set(self, key: Tuple, version: int, body: bytes) -> str:
+        """
+        Store an encoded response built from ``version``
+
+        Returns:
+            ETag for the response
+        """
+        etag = f'"{version}-{hashlib.sha256(body).hexdigest()[:16]}"'
+        if len(body) > self.max_bytes:
+            # Larger than the whole cache: serve it uncached
+            return etag
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (version, expires_at, body, etag)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+        return etag
+
+    def _pop(self, key: Tuple):
+        """Remove an entry (caller holds the lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'version_bumps': self.bumps,
+            }
+
+
+def cached_json_response(request, body: bytes, etag: str, hit: bool) -> HttpResponse:
+    """
+    Response for encoded JSON bytes (304 when the client already has them)
+
+    Args:
+        request: Incoming request (If-None-Match is honoured)
+        body: Encoded JSON
+        etag: Entity tag of the body
+        hit: Whether the body came from the cache (X-Cache header)
+    """
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    # Lists are per provider (Authorization header) and must be revalidated
+    response['Cache-Control'] = 'private, no-cache'
+    response['Vary'] = 'Authorization'
+    return response
+
+
+# Global instance (the claim list views take no query parameters)
+claim_list_cache = ClaimListCache(
+    max_bytes=getattr(settings, 'CLAIM_LIST_CACHE_MAX_BYTES', 64 * 2 ** 20),
+    ttl=getattr(settings, 'CLAIM_LIST_CACHE_TTL', 300),
+)
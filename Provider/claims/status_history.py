@@ -0,0 +1,176 @@
+"""
+Claim Status History Recorder
+Buffers claim status transitions in memory and writes them to the
+claim_status_history collection in batches from a background thread
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from django.conf import settings
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class StatusHistoryRecorder:
+    """
+    Batched writer for ClaimStatusHistory entries
+
+    ``record`` only appends to an in-memory buffer; a daemon thread flushes
+    the buffer with a single ``insert_many`` every ``flush_interval`` seconds,
+    or sooner once ``batch_size`` entries are waiting. Readers call ``flush``
+    first so a timeline always includes the transitions of this process.
+
+    ``insert_many`` assigns each entry its ``_id``, so a retried entry that
+    already reached the database fails with a duplicate key error and is
+    counted as written instead of being requeued again.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 1.0, max_buffer: int = 10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: 'deque[Dict[str, Any]]' = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def _ensure_worker(self):
+        """Start the flush thread (again after a fork, threads do not survive it)"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='status-history-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def record(self, claim, previous_status: Optional[str], new_status: Optional[str],
+               changed_by=None, notes: Optional[str] = None, changed_at: Optional[datetime] = None) -> bool:
+        """
+        Queue a status transition for a claim
+
+        Args:
+            claim: Mongo Claim document
+            previous_status: Status before the change (None for new claims)
+            new_status: Status after the change
+            changed_by: Mongo User who made the change (None for payor/system)
+            notes: Free-text context (webhook reason, sync source...)
+            changed_at: Time of the change (defaults to now)
+
+        Returns:
+            bool indicating whether an entry was queued
+        """
+        if not new_status or previous_status == new_status or claim is None or not claim.id:
+            return False
+
+        entry = {
+            'claim_id': claim.id,
+            'provider_id': claim.provider_id,
+            'previous_status': previous_status,
+            'new_status': new_status,
+            'changed_at': changed_at or datetime.now(),
+        }
+        if changed_by is not None:
+            entry['changed_by_id'] = changed_by.id
+            entry['changed_by_name'] = f"{changed_by.first_name} {changed_by.last_name}".strip() or changed_by.username
+        if notes:
+            entry['notes'] = notes
+
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                # MongoDB has been unreachable for a while; the deque drops the oldest entry
+                self.dropped += 1
+            self._buffer.append(entry)
+            self.recorded += 1
+            full = len(self._buffer) >= self.batch_size
+
+        self._ensure_worker()
+        if full:
+            self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """
+        Write all buffered entries
+
+        Returns:
+            Number of entries written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return 0
+
+            from .mongo_models import ClaimStatusHistory
+            try:
+                ClaimStatusHistory._get_collection().insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Duplicate keys are entries an earlier, partly failed flush already wrote
+                failed_indexes = {
+                    error['index'] for error in e.details.get('writeErrors', []) if error.get('code') != 11000
+                }
+                written = len(batch) - len(failed_indexes)
+                self.written += written
+                if failed_indexes:
+                    self.failed_flushes += 1
+                    logger.warning(f"Status history flush partly failed, {len(failed_indexes)} entries requeued: "
+                                   f"{e.details.get('writeErrors', [])[:1]}")
+                    self._requeue([entry for index, entry in enumerate(batch) if index in failed_indexes])
+                return written
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.warning(f"Status history flush failed, {len(batch)} entries requeued: {e}")
+                self._requeue(batch)
+                return 0
+
+            self.written += len(batch)
+            return len(batch)
+
+    def _requeue(self, entries: List[Dict[str, Any]]):
+        """Put unwritten entries back in front of newer ones (oldest are dropped first)"""
+        with self._lock:
+            combined = entries + list(self._buffer)
+            self.dropped += max(0, len(combined) - self.max_buffer)
+            self._buffer = deque(combined, maxlen=self.max_buffer)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'buffered': len(self._buffer),
+                'recorded': self.recorded,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed_flushes': self.failed_flushes,
+            }
+
+
+# Global instance
+status_history = StatusHistoryRecorder(
+    batch_size=getattr(settings, 'STATUS_HISTORY_BATCH_SIZE', 100),
+    flush_interval=getattr(settings, 'STATUS_HISTORY_FLUSH_INTERVAL', 1.0),
+)
+
+# Write whatever is still buffered when the process exits
+atexit.register(status_history.flush)
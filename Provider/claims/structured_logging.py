@@ -0,0 +1,125 @@
+"""
+Structured Logging
+JSON log formatter, a non-blocking queue handler that formats and writes
+records on a background thread, and a sampled, level-gated payload logger
+for debug dumps on hot paths
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Any, Optional
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line with the message and any ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.datetime.fromtimestamp(record.created, tz=datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    Logging handler that only puts records on an in-process queue
+
+    A QueueListener thread formats the record and writes it to stderr, so
+    request threads never wait on message formatting or the stream. Records
+    are queued unformatted (the queue is in-process, nothing is pickled),
+    which keeps ``logger.info("... %s", value)`` formatting off the request
+    path. When the queue is full the record is dropped and counted rather
+    than blocking the caller.
+    """
+
+    def __init__(self, queue_size: int = 10000, json_format: bool = True, level=logging.NOTSET):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.setLevel(level)
+        self.dropped = 0
+
+        self.target = logging.StreamHandler(sys.stderr)
+        self.target.setFormatter(
+            JSONFormatter() if json_format
+            else logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+        )
+        self.listener = None
+        self._start_listener()
+
+        if hasattr(os, 'register_at_fork'):
+            # The listener thread does not survive a fork
+            os.register_at_fork(after_in_child=self._start_listener)
+        atexit.register(self.stop)
+
+    def _start_listener(self):
+        self.listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens in the listener thread; only tracebacks are
+        # rendered here because the frames may change once the caller returns
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Flush queued records (called at exit)"""
+        if self.listener is not None:
+            try:
+                self.listener.stop()
+            except Exception:
+                pass
+            self.listener = None
+
+
+def log_payload(logger: logging.Logger, message: str, payload: Any,
+                sample_rate: Optional[float] = None, level: int = logging.DEBUG, **fields):
+    """
+    Log a full request/response payload, gated by level and sampled
+
+    Nothing is formatted or serialized unless the level is enabled and the
+    call is sampled; the JSON formatter serializes the payload on the
+    listener thread.
+
+    Args:
+        logger: Logger to write to
+        message: Log message
+        payload: Payload to attach as the ``payload`` field
+        sample_rate: Fraction of calls to log (defaults to LOG_PAYLOAD_SAMPLE_RATE)
+        level: Log level (DEBUG by default)
+        **fields: Extra structured fields
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if sample_rate is None:
+        from django.conf import settings
+        sample_rate = getattr(settings, 'LOG_PAYLOAD_SAMPLE_RATE', 0.01)
+    if sample_rate < 1 and random.random() >= sample_rate:
+        return
+    logger.log(level, message, extra={'payload': payload, **fields})
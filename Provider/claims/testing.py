@@ -0,0 +1,34 @@
+"""
+Test Helpers
+Assertions on the number and shape of MongoDB queries a block of code runs
+
+    from claims.testing import assert_max_mongo_queries
+
+    with assert_max_mongo_queries(10):
+        client.post('/api/mongo/claims/', payload, content_type='application/json')
+"""
+
+from contextlib import contextmanager
+
+from .query_budget import track_queries, QueryBudgetExceeded
+
+
+@contextmanager
+def assert_max_mongo_queries(limit: int, allow_repeats: bool = True, label: str = ''):
+    """
+    Fail if the block runs more than ``limit`` MongoDB queries
+
+    Args:
+        limit: Maximum number of queries (cursor getMore calls are not counted)
+        allow_repeats: When False, also fail if any query shape runs more than once
+        label: Name used in the failure message
+
+    Yields:
+        QueryTrace with the recorded queries
+    """
+    with track_queries(label) as trace:
+        yield trace
+    if trace.count > limit:
+        raise QueryBudgetExceeded(f"Expected at most {limit} MongoDB queries\n{trace.report()}")
+    if not allow_repeats and trace.repeated():
+        raise QueryBudgetExceeded(f"Repeated MongoDB query shapes (possible N+1)\n{trace.report()}")
@@ -1,3 +1,852 @@
-from django.test import TestCase
+"""
+MongoDB query budget tests
 
-# Create your tests here.
+Every endpoint in settings.MONGO_QUERY_BUDGETS is requested with query
+tracking in strict mode, so a change that adds queries to an endpoint fails
+here with the list of queries it ran. The budgets count a cold user cache.
+
+The endpoint tests need a real MongoDB: set MONGO_TEST_URI (for example
+mongodb://localhost:27017) and they run against a throwaway test_<name>
+database; without it they are skipped. mongomock cannot stand in, it does
+not emit the command monitoring events the budgets are counted from.
+"""
+
+import base64
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock, skipUnless
+
+import mongoengine
+from asgiref.sync import async_to_sync
+from bson import Decimal128, ObjectId
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import QueryDict
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from mongoengine import connection as mongo_connection
+from pymongo import ReturnDocument
+
+from .analytics import ClaimAnalyticsService
+from .async_views import async_get_payor_claim_status
+from .code_sets import CodeSetIndex
+from .document_storage import RangeNotSatisfiable, document_storage, parse_byte_range
+from .insurance_registry import InsuranceMappingRegistry, MappingRuleSet
+from .mongo_models import User, Claim, ClaimCounter, ClaimDocument, ClaimStatusHistory, RegistryVersion
+from .payor_integration import PayorIntegrationService, payor_service
+from .policy_rules import PolicyRuleEngine
+from .query_budget import query_trace_listener, budget_for
+from .reference_cache import MISSING, REFERENCE_CACHES, TwoTierCache, user_cache
+from .response_cache import ClaimListCache, cached_json_response, claim_list_cache
+from .status_history import status_history
+from .testing import assert_max_mongo_queries
+from .validation_cache import ValidationResultCache, VERSION_KEY, validation_cache
+
+MONGO_TEST_URI = os.environ.get('MONGO_TEST_URI')
+
+# Budget keys exercised by MongoQueryBudgetTests (kept in step with the settings)
+BUDGETED_ENDPOINTS = {
+    'GET claims:mongo-claims-list',
+    'POST claims:mongo-claims-list',
+    'GET claims:mongo-claim-detail',
+    'PUT claims:mongo-claim-detail',
+    'PATCH claims:mongo-claim-detail',
+    'claims:mongo-claims-search',
+    'claims:mongo-claim-history',
+    'claims:mongo-claim-documents',
+    'claims:mongo-claim-document-download',
+    'claims:mongo-dashboard-stats',
+}
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-shared'},
+}
+
+
+class QueryBudgetSettingsTests(SimpleTestCase):
+    """Budget configuration checks that do not need MongoDB"""
+
+    def test_every_budget_has_an_endpoint_test(self):
+        self.assertEqual(set(settings.MONGO_QUERY_BUDGETS), BUDGETED_ENDPOINTS)
+
+    def test_method_budget_falls_back_to_view_budget(self):
+        budgets = {'GET claims:view': 1, 'claims:view': 5}
+        self.assertEqual(budget_for(budgets, 'GET', 'claims:view'), 1)
+        self.assertEqual(budget_for(budgets, 'POST', 'claims:view'), 5)
+        self.assertIsNone(budget_for(budgets, 'GET', 'claims:other'))
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ValidationResultCacheTests(SimpleTestCase):
+    """Validation result keying, expiry and invalidation"""
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.cache = ValidationResultCache(max_size=2, ttl=60, amount_bucket=50, version_check_interval=0)
+        patcher = mock.patch.object(self.cache, '_collection')
+        self.collection = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.collection.return_value.find_one.return_value = {'version': 1}
+        self.collection.return_value.find_one_and_update.return_value = {'version': 2}
+
+    def key(self, **claim):
+        return self.cache.make_key(claim.pop('insurance_id', 'INS001'), {
+            'diagnosis_code': 'J06.9', 'procedure_code': '99213', 'amount_requested': 120, **claim
+        })
+
+    def test_amounts_share_a_key_within_a_bucket(self):
+        self.assertEqual(self.key(amount_requested=101), self.key(amount_requested='150.00'))
+        self.assertNotEqual(self.key(amount_requested=150), self.key(amount_requested=150.01))
+
+    def test_key_normalizes_codes_and_tracks_secondary_inputs(self):
+        self.assertEqual(self.key(insurance_id=' ins001 ', diagnosis_code='j06.9'), self.key())
+        self.assertNotEqual(self.key(patient_age=30), self.key(patient_age=70))
+        self.assertNotEqual(self.key(prior_authorization=True), self.key())
+
+    def test_results_are_copied_and_evicted_lru(self):
+        result = {'is_valid': True, 'coverage_details': {'covered': 1}}
+        self.cache.set(self.key(), result)
+        self.cache.get(self.key())['coverage_details']['covered'] = 0
+        self.assertEqual(self.cache.get(self.key()), result)
+
+        self.cache.set(self.key(patient_age=1), result)
+        self.cache.set(self.key(patient_age=2), result)
+        self.assertIsNone(self.cache.get(self.key()))
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_invalidate_by_insurance_and_policy(self):
+        self.cache.set(self.key(), {'is_valid': True}, 'POL-001')
+        self.cache.set(self.key(insurance_id='INS002'), {'is_valid': True}, 'POL-002')
+        self.assertEqual(self.cache.invalidate(insurance_id='ins001'), 1)
+        self.assertEqual(self.cache.invalidate(policy_number='POL-002'), 1)
+        self.assertEqual(self.cache.stats()['size'], 0)
+        self.assertEqual(caches['shared'].get(VERSION_KEY), 2)
+
+    def test_version_is_read_from_the_shared_cache(self):
+        caches['shared'].set(VERSION_KEY, 1)
+        self.cache.set(self.key(), {'is_valid': True})
+        self.assertIsNotNone(self.cache.get(self.key()))
+        caches['shared'].set(VERSION_KEY, 2)
+        self.assertIsNone(self.cache.get(self.key()))
+        self.collection.return_value.find_one.assert_not_called()
+
+    def test_missing_shared_version_is_loaded_in_the_background(self):
+        with mock.patch('claims.validation_cache.threading.Thread') as thread:
+            self.cache.get(self.key())
+        thread.return_value.start.assert_called_once_with()
+        self.cache._load_version()
+        self.assertEqual(caches['shared'].get(VERSION_KEY), 1)
+        self.assertEqual(self.cache.stats()['version'], 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TwoTierCacheTests(SimpleTestCase):
+    """Shared-tier versions invalidate every process's local tier"""
+
+    def setUp(self):
+        caches['shared'].clear()
+        # Two instances of one namespace stand in for two worker processes
+        self.worker_a = TwoTierCache('tests', local_ttl=60, version_check_interval=0)
+        self.worker_b = TwoTierCache('tests', local_ttl=60, version_check_interval=0)
+
+    def test_values_are_shared_through_the_second_tier(self):
+        self.worker_a.set('key', 'value')
+        self.assertEqual(self.worker_b.get('key'), 'value')
+        self.assertEqual(self.worker_b.stats()['l2_hits'], 1)
+        self.assertIs(self.worker_b.get('other'), MISSING)
+
+    def test_bump_invalidates_other_local_tiers(self):
+        self.worker_a.set('key', 'old')
+        self.assertEqual(self.worker_b.get('key'), 'old')
+        self.worker_a.bump()
+        self.assertIs(self.worker_b.get('key'), MISSING)
+
+    def test_negative_entries_are_dropped_by_a_bump(self):
+        loader = mock.Mock(return_value=None)
+        self.assertIsNone(self.worker_b.get_or_set('username:new', loader))
+        self.assertIsNone(self.worker_b.get_or_set('username:new', loader))
+        self.assertEqual(loader.call_count, 1)
+
+        self.worker_a.bump()
+        loader.return_value = {'username': 'new'}
+        self.assertEqual(self.worker_b.get_or_set('username:new', loader), {'username': 'new'})
+
+    def test_missing_version_starts_a_new_one(self):
+        version = self.worker_a.version()
+        caches['shared'].delete(self.worker_a.version_key)
+        self.worker_b.clear_local()
+        self.assertNotEqual(self.worker_b.version(), version)
+
+    def test_user_save_bumps_the_user_namespace(self):
+        with mock.patch('mongoengine.Document.save'), mock.patch.object(user_cache, 'bump') as bump:
+            User(username='renamed', email='renamed@example.com', password='x').save()
+        bump.assert_called_once_with()
+
+
+class PolicyRuleEngineTests(SimpleTestCase):
+    """Claims are checked against the compiled policy catalog"""
+
+    POLICIES = [
+        {
+            'policy_number': 'POL-BASIC',
+            'policy_name': 'Basic',
+            'max_failed_conditions': 0,
+            'coverage_conditions': {
+                'diagnosis_codes': {'covered_codes': ['J06.9', 'I10'], 'excluded_codes': ['C78.9']},
+                'amount_limits': {'max_amount': 1000},
+                'age_restrictions': {'min_age': 18, 'max_age': 65},
+                'prior_authorization': {'required': True},
+            },
+        },
+        {
+            'policy_number': 'POL-OPEN',
+            'policy_name': 'Open',
+            'coverage_conditions': {'diagnosis_codes': {'covered_codes': ['C78.9']}},
+        },
+        {'policy_number': 'POL-CLOSED', 'policy_name': 'Closed', 'is_active': False},
+    ]
+
+    def setUp(self):
+        self.engine = PolicyRuleEngine(self.POLICIES)
+        self.claim = {'diagnosis_code': ' j06.9 ', 'amount_requested': '250.00',
+                      'patient_age': 40, 'prior_authorization': True}
+
+    def test_claim_within_the_policy_is_valid(self):
+        result = self.engine.evaluate('POL-BASIC', self.claim)
+        self.assertTrue(result['is_valid'])
+        self.assertIsNone(result['error'])
+        self.assertEqual(result['coverage_details']['failed_conditions'], [])
+        self.assertTrue(result['coverage_details']['validated_locally'])
+
+    def test_excluded_diagnosis_is_rejected(self):
+        result = self.engine.evaluate('POL-BASIC', {**self.claim, 'diagnosis_code': 'C78.9'})
+        self.assertFalse(result['is_valid'])
+        self.assertEqual(result['coverage_details']['excluded_codes'], ['C78.9'])
+        # Exclusions are per policy: the same code is covered elsewhere
+        self.assertTrue(self.engine.evaluate('POL-OPEN', {'diagnosis_code': 'C78.9'})['is_valid'])
+
+    def test_limits_are_failed_conditions(self):
+        cases = {
+            'amount_limit': {'amount_requested': '1000.01'},
+            'age_restriction': {'patient_age': 70},
+            'prior_authorization': {'prior_authorization': False},
+            'diagnosis_code': {'diagnosis_code': 'Z00.00'},
+        }
+        for condition, change in cases.items():
+            with self.subTest(condition):
+                result = self.engine.evaluate('POL-BASIC', {**self.claim, **change})
+                self.assertFalse(result['is_valid'])
+                self.assertEqual(result['coverage_details']['failed_conditions'], [condition])
+
+    def test_inactive_and_unknown_policies(self):
+        result = self.engine.evaluate('POL-CLOSED', {})
+        self.assertFalse(result['is_valid'])
+        self.assertIn('not active', result['error'])
+        self.assertIsNone(self.engine.evaluate('POL-MISSING', self.claim))
+        self.assertTrue(self.engine.has_age_restriction('POL-BASIC'))
+        self.assertFalse(self.engine.has_age_restriction('POL-OPEN'))
+
+    def test_reload_reports_changed_policies(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'policies.json')
+        with open(path, 'w') as f:
+            json.dump(self.POLICIES, f)
+        engine = PolicyRuleEngine.from_file(path)
+        self.assertEqual(engine.reload(), set())
+
+        policies = [dict(self.POLICIES[1], policy_name='Open Plus'), self.POLICIES[2]]
+        with open(path, 'w') as f:
+            json.dump(policies, f)
+        self.assertEqual(engine.reload(), {'POL-BASIC', 'POL-OPEN'})
+        self.assertFalse(engine.has_policy('POL-BASIC'))
+
+
+class CodeSetIndexTests(SimpleTestCase):
+    """ICD-10-CM / CPT format and existence checks"""
+
+    def setUp(self):
+        self.index = CodeSetIndex(icd10_codes=['E119', 'E11641', 'S72001A', 'J069'], cpt_codes=['99213'])
+
+    def test_icd10_formats(self):
+        for code in ('J06.9', 'I10', 'E11.641', 'S72.001A', 'C4A.0', ' e11.9 '):
+            self.assertTrue(self.index.is_valid_icd10_format(code), code)
+        for code in ('J6.9', '106.9', 'E11.', 'E11.12345', 'E11-9'):
+            self.assertFalse(self.index.is_valid_icd10_format(code), code)
+
+    def test_batch_checks_format_then_existence(self):
+        result = self.index.validate_batch(['S72.001A', 'e11.641 ', 'Z99.89', 'BAD'], 'icd10')
+        self.assertEqual(result['valid'], ['S72.001A', 'e11.641 '])
+        self.assertEqual(result['unknown'], ['Z99.89'])
+        self.assertEqual(result['invalid_format'], ['BAD'])
+        self.assertTrue(result['code_set_loaded'])
+
+    def test_cpt_batch(self):
+        result = self.index.validate_batch(['99213', '99214', '9921'], 'cpt')
+        self.assertEqual((result['valid'], result['unknown'], result['invalid_format']), (['99213'], ['99214'], ['9921']))
+
+    def test_without_code_set_codes_are_unverified(self):
+        result = CodeSetIndex().validate_batch(['S72.001A', 'X'], 'icd10')
+        self.assertEqual(result['unverified'], ['S72.001A'])
+        self.assertEqual(result['valid'], [])
+        self.assertIsNone(CodeSetIndex().exists('S72.001A'))
+
+    def test_exists(self):
+        self.assertTrue(self.index.exists('s72.001a'))
+        self.assertFalse(self.index.exists('E11.9', 'cpt'))
+
+
+class ClaimAnalyticsTests(SimpleTestCase):
+    """Summary and live rows are merged with exact amounts"""
+
+    def test_summary_and_live_amounts_are_summed_as_decimals(self):
+        day = datetime(2026, 1, 5)
+        row = {'_id': {'period': day, 'status': 'approved'}, 'count': 1,
+               'amount_requested': Decimal128('0.10'), 'amount_approved': Decimal128('0.20')}
+        summaries, claims = mock.MagicMock(), mock.MagicMock()
+        summaries.aggregate.return_value = [row] * 3
+        claims.aggregate.return_value = [row]
+        service = ClaimAnalyticsService()
+        with mock.patch.object(service, 'summarized_through', return_value=day + timedelta(days=1)), \
+                mock.patch('claims.analytics.ClaimDailySummary._get_collection', return_value=summaries), \
+                mock.patch('claims.analytics.Claim._get_collection', return_value=claims):
+            series = service.timeseries('day', day, day + timedelta(days=2))
+
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]['total'], {'count': 4, 'amount_requested': 0.4, 'amount_approved': 0.8})
+        self.assertEqual(series[0]['by_status']['approved']['amount_requested'], 0.4)
+
+
+class InsuranceMappingRegistryTests(SimpleTestCase):
+    """Rule precedence and publishing in the insurance mapping registry"""
+
+    DEFAULTS = {'INS001': {'payor_name': 'Built-in', 'policy_number': 'POL-001', 'is_active': True}}
+    RULES = [
+        {'match_type': 'prefix', 'value': 'BC', 'payor_name': 'Short prefix'},
+        {'match_type': 'prefix', 'value': 'BC-7', 'payor_name': 'Long prefix'},
+        {'match_type': 'pattern', 'value': r'BC-\d+', 'payor_name': 'Pattern', 'priority': 1},
+        {'match_type': 'pattern', 'value': r'HI\d+', 'payor_name': 'Late pattern', 'priority': 50},
+        {'match_type': 'pattern', 'value': r'HI1\d+', 'payor_name': 'Early pattern', 'priority': 10},
+        {'match_type': 'exact', 'value': 'bc-789', 'payor_name': 'Exact'},
+        {'match_type': 'prefix', 'value': 'OFF', 'payor_name': 'Inactive', 'is_active': False},
+    ]
+
+    def setUp(self):
+        self.rules = MappingRuleSet(self.DEFAULTS, self.RULES, version=3)
+
+    def test_exact_before_prefix_before_pattern(self):
+        self.assertEqual(self.rules.resolve('BC-789')['payor_name'], 'Exact')
+        self.assertEqual(self.rules.resolve('BC-700')['payor_name'], 'Long prefix')
+        self.assertEqual(self.rules.resolve('BCX')['payor_name'], 'Short prefix')
+
+    def test_patterns_in_priority_order(self):
+        self.assertEqual(self.rules.resolve('HI12345')['payor_name'], 'Early pattern')
+        self.assertEqual(self.rules.resolve('HI2345')['payor_name'], 'Late pattern')
+
+    def test_defaults_and_misses(self):
+        self.assertEqual(self.rules.resolve('INS001')['payor_name'], 'Built-in')
+        self.assertIsNone(self.rules.resolve('OFF-1'))
+        self.assertIsNone(self.rules.resolve('UNKNOWN'))
+        self.assertIn('UNKNOWN', self.rules.resolved)
+
+    def test_refresh_publishes_a_new_rule_set(self):
+        registry = InsuranceMappingRegistry(defaults=self.DEFAULTS, refresh_interval=0)
+        with mock.patch.object(registry, '_read_version', return_value=3), \
+                mock.patch.object(registry, '_read_rules', return_value=self.RULES):
+            self.assertTrue(registry.refresh(force=True))
+        self.assertEqual(registry.version, 3)
+        with mock.patch.object(registry, '_ensure_fresh'):
+            self.assertEqual(registry.resolve(' bc-789 ')['payor_name'], 'Exact')
+
+    def test_lookup_does_not_wait_for_the_first_load(self):
+        registry = InsuranceMappingRegistry(defaults=self.DEFAULTS)
+        with mock.patch.object(registry, 'refresh') as refresh, \
+                mock.patch('claims.insurance_registry.threading.Thread') as thread:
+            self.assertEqual(registry.resolve('INS001')['payor_name'], 'Built-in')
+        refresh.assert_not_called()
+        thread.return_value.start.assert_called_once_with()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PayorConfigurationTests(SimpleTestCase):
+    """Payor routing follows update_payor_configuration"""
+
+    def setUp(self):
+        # Built-in mappings only: no MongoDB rule refresh
+        patcher = mock.patch.object(InsuranceMappingRegistry, '_ensure_fresh')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(validation_cache, '_bump_version')
+        self.bump_version = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = PayorIntegrationService()
+
+    def test_update_invalidates_validations_in_every_process(self):
+        self.service.update_payor_configuration('http://new-payor:9000', 'admin@payor.com', 'secret')
+        self.bump_version.assert_called_once_with()
+
+    def test_mapping_changes_invalidate_validations_in_every_process(self):
+        registry = self.service.insurance_registry
+        with mock.patch.object(registry, '_read_version', return_value=1), \
+                mock.patch.object(registry, '_read_rules', return_value=[]):
+            registry.refresh(force=True)
+            self.service.resolve_insurance('INS001')
+            # The first rule set a process loads is not a change
+            self.bump_version.assert_not_called()
+            registry._read_version.return_value = 2
+            registry.refresh(force=True)
+            self.service.resolve_insurance('INS001')
+        self.bump_version.assert_called_once_with()
+
+    def test_builtin_mappings_follow_updated_payor_url(self):
+        self.service.update_payor_configuration('http://new-payor:9000', 'admin@payor.com', 'secret')
+        mapping = self.service.resolve_insurance('INS001')
+        self.assertEqual(mapping['payor_url'], 'http://new-payor:9000')
+        self.assertEqual(mapping['payor_name'], 'BlueCross BlueShield')
+
+    def test_claims_are_submitted_to_updated_payor_url(self):
+        self.service.update_payor_configuration('http://new-payor:9000', 'admin@payor.com', 'secret')
+        response = mock.Mock(status_code=201)
+        response.json.return_value = {'id': 'PAY-1'}
+        with mock.patch('claims.payor_integration.payor_pools') as pools:
+            pools.for_mapping.return_value.post.return_value = response
+            result = self.service.submit_claim_to_payor({'insurance_id': 'INS001', 'amount_requested': 100})
+        self.assertTrue(result['success'])
+        self.assertEqual(pools.for_mapping.return_value.post.call_args[0][0], 'http://new-payor:9000/api/claims/')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PolicyValidationAdminTests(TestCase):
+    """Validation cache metrics and catalog reloads need a staff user"""
+
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.create_user(username='staff', password='secret', is_staff=True)
+        get_user_model().objects.create_user(username='clerk', password='secret')
+
+    def basic_auth(self, username):
+        credentials = base64.b64encode(f'{username}:secret'.encode()).decode()
+        return {'HTTP_AUTHORIZATION': f'Basic {credentials}'}
+
+    def test_anonymous_and_non_staff_users_are_refused(self):
+        url = reverse('claims:payor-validate')
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+        self.assertIn(self.client.delete(url).status_code, (401, 403))
+        self.assertEqual(self.client.get(url, **self.basic_auth('clerk')).status_code, 403)
+
+    def test_staff_can_read_metrics_and_reload(self):
+        url = reverse('claims:payor-validate')
+        self.assertEqual(self.client.get(url, **self.basic_auth('staff')).status_code, 200)
+        with mock.patch.object(payor_service, 'reload_policy_catalog', return_value=[]) as reload_catalog:
+            self.assertEqual(self.client.delete(url, **self.basic_auth('staff')).status_code, 200)
+        reload_catalog.assert_called_once_with()
+
+    def test_validation_stays_open(self):
+        with mock.patch.object(payor_service, 'validate_insurance_policy', return_value={'is_valid': True}):
+            response = self.client.post(reverse('claims:payor-validate'), {'insurance_id': 'INS001'},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+
+class ClaimUpdateTests(SimpleTestCase):
+    """PUT/PATCH return the post-image and record the replaced status"""
+
+    def setUp(self):
+        self.claim_id = ObjectId()
+        self.provider = User(id=ObjectId(), username='provider', role='provider')
+        self.collection = mock.MagicMock()
+        patches = [
+            mock.patch.object(Claim, '_get_collection', return_value=self.collection),
+            mock.patch('claims.mongo_views.get_request_provider', return_value=self.provider),
+            mock.patch.object(claim_list_cache, 'bump'),
+            mock.patch.object(status_history, 'record'),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def patch(self, data):
+        return self.client.patch(reverse('claims:mongo-claim-detail', kwargs={'claim_id': str(self.claim_id)}),
+                                 data=data, content_type='application/json')
+
+    def stored(self, **fields):
+        return {'_id': self.claim_id, 'provider_id': self.provider.id, 'claim_number': 'CLM-1',
+                'status': 'pending', 'date_updated': datetime(2026, 1, 1), **fields}
+
+    def test_status_change_records_the_replaced_status(self):
+        self.collection.find_one.return_value = {'status': 'pending', 'provider_id': self.provider.id}
+        self.collection.find_one_and_update.return_value = self.stored(status='approved', notes='server side')
+        response = self.patch({'status': 'approved'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['notes'], 'server side')
+        query, update = self.collection.find_one_and_update.call_args[0]
+        self.assertEqual(query['status'], 'pending')
+        self.assertEqual(self.collection.find_one_and_update.call_args[1]['return_document'], ReturnDocument.AFTER)
+        self.assertEqual(status_history.record.call_args[0][1:3], ('pending', 'approved'))
+
+    def test_status_change_retries_when_the_status_moved(self):
+        self.collection.find_one.side_effect = [
+            {'status': 'pending', 'provider_id': self.provider.id},
+            {'status': 'under_review', 'provider_id': self.provider.id},
+        ]
+        self.collection.find_one_and_update.side_effect = [None, self.stored(status='approved')]
+        self.assertEqual(self.patch({'status': 'approved'}).status_code, 200)
+        self.assertEqual(status_history.record.call_args[0][1:3], ('under_review', 'approved'))
+
+    def test_other_providers_claims_are_refused(self):
+        self.collection.find_one.return_value = {'status': 'pending', 'provider_id': ObjectId()}
+        self.assertEqual(self.patch({'status': 'approved'}).status_code, 403)
+        self.collection.find_one_and_update.assert_not_called()
+
+    def test_update_without_status_is_a_single_write(self):
+        self.collection.find_one_and_update.return_value = self.stored(notes='updated')
+        self.assertEqual(self.patch({'notes': 'updated'}).status_code, 200)
+        self.collection.find_one.assert_not_called()
+        self.assertEqual(status_history.record.call_args[0][1:3], ('pending', 'pending'))
+
+
+class AsyncPayorStatusTests(SimpleTestCase):
+    """Payor-reported statuses are checked before they are written"""
+
+    def check_status(self, payor_status):
+        result = {'success': True, 'claim_id': 'PAY-1', 'status': payor_status, 'claim': {'id': 'PAY-1'}}
+        db = mock.MagicMock()
+        collection = db.__getitem__.return_value
+        collection.find_one_and_update = mock.AsyncMock(return_value=None)
+        with mock.patch('claims.async_views.provider_payor_api.get_claim_status_async',
+                        mock.AsyncMock(return_value=result)), \
+                mock.patch('claims.async_views.get_async_db', return_value=db):
+            request = RequestFactory().get('/api/provider/claim-status/PAY-1/')
+            response = async_to_sync(async_get_payor_claim_status)(request, 'PAY-1')
+        self.assertEqual(response.status_code, 200)
+        return collection.find_one_and_update
+
+    def test_known_status_is_written(self):
+        update = self.check_status('approved')
+        update.assert_awaited_once()
+        self.assertEqual(update.call_args[0][1]['$set']['status'], 'approved')
+
+    def test_unknown_status_is_rejected(self):
+        self.check_status('paid_in_full').assert_not_called()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PayorPoolRoutingTests(SimpleTestCase):
+    """Status checks go to the mapped payor and are reported per payor"""
+
+    def setUp(self):
+        patcher = mock.patch.object(InsuranceMappingRegistry, '_ensure_fresh')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = PayorIntegrationService()
+        self.service.insurance_registry._rules = MappingRuleSet(self.service.insurance_mappings, [
+            {'match_type': 'exact', 'value': 'AET-1', 'payor_name': 'Aetna Direct',
+             'payor_url': 'http://aetna.example'},
+        ], version=1)
+        # Already seen by this service: no cross-process invalidation
+        self.service._mappings_version = 1
+
+    def test_status_check_uses_the_mapped_payor_url(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'status': 'approved'}
+        with mock.patch('claims.payor_integration.payor_pools') as pools:
+            pools.for_mapping.return_value.get.return_value = response
+            result = self.service.get_claim_status_from_payor('PAY-1', 'Aetna Direct', 'AET-1')
+        self.assertTrue(result['success'])
+        self.assertEqual(pools.for_mapping.return_value.get.call_args[0][0], 'http://aetna.example/api/claims/PAY-1/')
+
+    def test_pool_metrics_are_labelled_by_payor_and_url(self):
+        from .http import PayorPoolRegistry
+        from .metrics import _payor_pool_metrics_text
+        pools = PayorPoolRegistry({})
+        pools.for_payor('Aetna "Direct"', 'http://aetna.example')
+        with mock.patch('claims.http.payor_pools', pools):
+            text = _payor_pool_metrics_text()
+        self.assertIn('provider_payor_pool_active_requests{payor="Aetna \\"Direct\\"",url="http://aetna.example"} 0', text)
+
+
+class ClaimListCacheTests(SimpleTestCase):
+    """Encoded claim lists are bounded by size and validated by version"""
+
+    def setUp(self):
+        self.cache = ClaimListCache(max_bytes=10, ttl=60, key_params=('status',))
+
+    def test_entries_are_evicted_least_recently_used_first(self):
+        self.cache.set('a', 1, b'aaaa')
+        self.cache.set('b', 1, b'bbbb')
+        self.assertIsNotNone(self.cache.get('a', 1))
+        self.cache.set('c', 1, b'cccc')
+
+        self.assertIsNone(self.cache.get('b', 1))
+        self.assertEqual(self.cache.get('a', 1)[0], b'aaaa')
+        stats = self.cache.stats()
+        self.assertEqual((stats['size'], stats['bytes'], stats['evictions']), (2, 8, 1))
+
+    def test_bodies_larger_than_the_cache_are_not_stored(self):
+        etag = self.cache.set('big', 1, b'x' * 11)
+        self.assertTrue(etag.startswith('"1-'))
+        self.assertIsNone(self.cache.get('big', 1))
+        self.assertEqual(self.cache.stats()['bytes'], 0)
+
+    def test_older_versions_are_stale(self):
+        etag = self.cache.set('a', 1, b'body')
+        self.assertEqual(self.cache.get('a', 1), (b'body', etag))
+        self.assertIsNone(self.cache.get('a', 2))
+        self.assertEqual(self.cache.stats()['stale'], 1)
+        self.assertIsNone(self.cache.get('a', 1))
+
+    def test_key_ignores_unused_parameters(self):
+        provider_id = ObjectId()
+        key = self.cache.make_key(provider_id, QueryDict('status=pending&_=123'))
+        self.assertEqual(key, self.cache.make_key(provider_id, QueryDict('status=pending')))
+        self.assertNotEqual(key, self.cache.make_key(provider_id, QueryDict('status=approved')))
+        self.assertEqual(self.cache.make_key(None, QueryDict())[0], '*')
+
+    def test_cached_response_honours_if_none_match(self):
+        factory = RequestFactory()
+        etag = self.cache.set('a', 1, b'[]')
+
+        response = cached_json_response(factory.get('/'), b'[]', etag, hit=False)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response['ETag'], response['X-Cache']), (etag, 'MISS'))
+        self.assertEqual(response['Vary'], 'Authorization')
+
+        response = cached_json_response(factory.get('/', HTTP_IF_NONE_MATCH=etag), b'[]', etag, hit=True)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+
+class ByteRangeTests(SimpleTestCase):
+    """Range headers are parsed into inclusive byte positions"""
+
+    def test_parse_byte_range(self):
+        cases = {
+            None: None,
+            'bytes=0-9': (0, 9),
+            'bytes=90-': (90, 99),
+            'bytes=50-500': (50, 99),
+            'bytes=-10': (90, 99),
+            'bytes=-500': (0, 99),
+            'items=0-9': None,
+            'bytes=0-9,20-29': None,
+            'bytes=a-b': None,
+            'bytes=9-0': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header):
+                self.assertEqual(parse_byte_range(header, 100), expected)
+
+    def test_unsatisfiable_ranges(self):
+        for header in ('bytes=100-', 'bytes=200-300', 'bytes=-0'):
+            with self.subTest(header), self.assertRaises(RangeNotSatisfiable):
+                parse_byte_range(header, 100)
+
+
+@override_settings(CLAIM_DOCUMENT_ACCEL_REDIRECT='')
+class ClaimDocumentDownloadTests(SimpleTestCase):
+    """Document downloads honour Range, If-Range and If-None-Match"""
+
+    CONTENT = b'0123456789' * 10
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with open(os.path.join(root, 'document.pdf'), 'wb') as f:
+            f.write(self.CONTENT)
+        self.document = ClaimDocument(claim_id=ObjectId(), filename='record.pdf', file_path='document.pdf',
+                                      content_type='application/pdf', content_hash='abc123')
+        self.etag = '"abc123"'
+        for patcher in (
+            mock.patch.object(document_storage, 'root', root),
+            mock.patch('claims.mongo_views.get_request_provider', return_value=None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('claims.mongo_views.ClaimDocument')
+        documents = patcher.start()
+        self.addCleanup(patcher.stop)
+        documents.objects.return_value.first.return_value = self.document
+        self.url = reverse('claims:mongo-claim-document-download',
+                           kwargs={'claim_id': str(ObjectId()), 'document_id': str(ObjectId())})
+
+    def download(self, **headers):
+        return self.client.get(self.url, **headers)
+
+    def test_full_download(self):
+        response = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+
+    def test_range_is_partial_content(self):
+        response = self.download(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT[10:20])
+
+    def test_unsatisfiable_range(self):
+        response = self.download(HTTP_RANGE='bytes=100-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */100')
+
+    def test_if_range_mismatch_serves_the_whole_file(self):
+        response = self.download(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"other"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENT)
+
+        response = self.download(HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE=self.etag)
+        self.assertEqual(response.status_code, 206)
+        response.close()
+
+    def test_if_none_match_is_not_modified(self):
+        for value in (self.etag, 'W/' + self.etag, '*'):
+            with self.subTest(value):
+                response = self.download(HTTP_IF_NONE_MATCH=value)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], self.etag)
+
+
+@skipUnless(MONGO_TEST_URI, 'Set MONGO_TEST_URI to a test mongod to run the MongoDB query budget tests')
+@override_settings(MONGO_QUERY_TRACKING=True, MONGO_QUERY_BUDGET_STRICT=True, CACHES=TEST_CACHES)
+class MongoQueryBudgetTests(TestCase):
+    """Each budgeted endpoint stays within its MongoDB query budget"""
+
+    DOCUMENTS = (User, Claim, ClaimCounter, ClaimDocument, ClaimStatusHistory, RegistryVersion)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._registered = mongo_connection._connection_settings.get('default')
+        mongoengine.disconnect('default')
+        mongoengine.connect(
+            db=f'test_{settings.MONGO_DB_NAME}', host=MONGO_TEST_URI, alias='default',
+            uuidRepresentation='pythonLegacy', event_listeners=[query_trace_listener],
+        )
+        # Create the indexes up front so they are not counted against the first request
+        for document in cls.DOCUMENTS:
+            document._get_collection()
+
+        cls._storage_root = tempfile.mkdtemp()
+        cls._storage_patch = mock.patch.multiple(
+            document_storage, root=cls._storage_root, tmp_dir=os.path.join(cls._storage_root, 'tmp')
+        )
+        cls._storage_patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._storage_patch.stop()
+        shutil.rmtree(cls._storage_root, ignore_errors=True)
+        status_history.flush()
+        mongo_connection.get_connection('default').drop_database(f'test_{settings.MONGO_DB_NAME}')
+        mongoengine.disconnect('default')
+        if cls._registered is not None:
+            mongo_connection._connection_settings['default'] = cls._registered
+        super().tearDownClass()
+
+    def setUp(self):
+        for document in self.DOCUMENTS:
+            document._get_collection().delete_many({})
+
+        self.provider = User(
+            username='budget_provider', email='provider@example.com', password=make_password('secret'),
+            first_name='Budget', last_name='Provider', role='provider'
+        ).save()
+        self.patient = User(
+            username='budget_patient', email='patient@example.com', password=make_password('secret'),
+            first_name='Pat', last_name='Smith', role='patient', insurance_id='INS001'
+        ).save()
+        self.claims = []
+        for _ in range(3):
+            claim = Claim(
+                patient_id=self.patient.id, patient_name='Pat Smith', provider_id=self.provider.id,
+                provider_name='Budget Provider', insurance_id='INS001', diagnosis_code='J06.9',
+                diagnosis_description='Acute upper respiratory infection', procedure_code='99213',
+                procedure_description='Routine checkup', amount_requested='150.00',
+            )
+            claim.save()
+            self.claims.append(claim)
+        status_history.record(self.claims[0], None, 'pending', notes='created')
+        status_history.flush()
+
+        # Cold caches: every request pays for its user lookup
+        claim_list_cache.clear()
+        for cache in REFERENCE_CACHES:
+            cache.clear_local()
+        caches['shared'].clear()
+
+        credentials = base64.b64encode(b'budget_provider:secret').decode()
+        self.auth = {'HTTP_AUTHORIZATION': f'Basic {credentials}'}
+
+    def request(self, method, url_name, kwargs=None, **extra):
+        """Send a request and check it against the endpoint's budget"""
+        view_name = f'claims:{url_name}'
+        budget = budget_for(settings.MONGO_QUERY_BUDGETS, method, view_name)
+        self.assertIsNotNone(budget, f'No query budget for {method} {view_name}')
+        with assert_max_mongo_queries(budget, label=f'{method} {view_name}'):
+            response = getattr(self.client, method.lower())(reverse(view_name, kwargs=kwargs), **self.auth, **extra)
+        self.assertLess(response.status_code, 400, getattr(response, 'content', b'')[:500])
+        return response
+
+    def test_claim_list(self):
+        response = self.request('GET', 'mongo-claims-list')
+        self.assertEqual(response.json()['count'], 3)
+
+    def test_claim_create(self):
+        payor_result = {
+            'success': True, 'payor_claim_id': 'PAY-1', 'payor_name': 'BlueCross BlueShield',
+            'payor_response': {'id': 'PAY-1'},
+        }
+        with mock.patch.object(payor_service, 'submit_claim_to_payor', return_value=payor_result):
+            response = self.request('POST', 'mongo-claims-list', data={
+                'insurance_id': 'INS001', 'patient_id': str(self.patient.id), 'patient_name': 'Pat Smith',
+                'diagnosis_code': 'J06.9', 'diagnosis_description': 'Acute upper respiratory infection',
+                'procedure_code': '99213', 'procedure_description': 'Routine checkup',
+                'amount_requested': '120.00', 'date_of_service': datetime.now().date().isoformat(),
+            }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['payor_claim_id'], 'PAY-1')
+
+    def test_claim_detail(self):
+        self.request('GET', 'mongo-claim-detail', kwargs={'claim_id': str(self.claims[0].id)})
+
+    def test_claim_update(self):
+        kwargs = {'claim_id': str(self.claims[0].id)}
+        self.request('PATCH', 'mongo-claim-detail', kwargs=kwargs,
+                     data={'status': 'under_review'}, content_type='application/json')
+        self.request('PUT', 'mongo-claim-detail', kwargs=kwargs,
+                     data={'notes': 'updated'}, content_type='application/json')
+
+    def test_claim_search(self):
+        self.request('GET', 'mongo-claims-search', data={'q': 'respiratory'})
+
+    def test_claim_history(self):
+        status_history.record(self.claims[0], 'pending', 'under_review', notes='buffered')
+        response = self.request('GET', 'mongo-claim-history', kwargs={'claim_id': str(self.claims[0].id)})
+        self.assertEqual(response.json()['current_status'], 'pending')
+
+    def test_claim_documents(self):
+        kwargs = {'claim_id': str(self.claims[0].id)}
+        upload = SimpleUploadedFile('record.pdf', b'%PDF-1.4 budget test', content_type='application/pdf')
+        response = self.request('POST', 'mongo-claim-documents', kwargs=kwargs,
+                                data={'file': upload, 'document_type': 'medical_record'})
+        document_id = response.json()['id']
+
+        response = self.request('GET', 'mongo-claim-documents', kwargs=kwargs)
+        self.assertEqual(response.json()['count'], 1)
+
+        response = self.request('GET', 'mongo-claim-document-download',
+                                kwargs={**kwargs, 'document_id': document_id})
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 budget test')
+
+    def test_dashboard_stats(self):
+        response = self.request('GET', 'mongo-dashboard-stats')
+        self.assertEqual(response.json()['total_claims'], 3)
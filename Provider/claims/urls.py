@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     ProviderMeView,
@@ -9,12 +10,19 @@ from .views import (
 )
 from .mongo_views import (
     MongoClaimListView,
+    MongoClaimSearchView,
     MongoClaimDetailView,
+    MongoClaimHistoryView,
+    MongoClaimDocumentListView,
+    MongoClaimDocumentDownloadView,
+    MongoStatusHistoryView,
     MongoUserListView,
     MongoAuthView,
     MongoRegisterView,
     mongo_register_user,
     MongoDashboardStatsView,
+    MongoClaimAnalyticsView,
+    MongoPoolStatsView,
     MongoUserProfileView,
     MongoPasswordResetView
 )
@@ -29,12 +37,14 @@ from .provider_payor_views import (
     payor_webhook_receiver,
     test_payor_connection,
     update_payor_configuration,
-    sync_all_claims_status
+    sync_all_claims_status,
+    validate_codes
 )
 from .webhook_views import (
     payor_claim_approved,
     payor_claim_denied,
     payor_claim_under_review,
+    payor_webhook_batch,
     PayorWebhookView,
     webhook_health_check,
     webhook_test_endpoint
@@ -46,6 +56,27 @@ from .jwt_auth import (
 
 app_name = 'claims'
 
+# Read-heavy claim endpoints can be served by native async views under ASGI
+if getattr(settings, 'ASYNC_CLAIM_VIEWS', False):
+    from .async_views import (
+        AsyncClaimListView,
+        AsyncClaimDetailView,
+        AsyncDashboardStatsView,
+        AsyncPayorIntegrationView,
+        async_get_payor_claim_status
+    )
+    claim_list_view = AsyncClaimListView.as_view()
+    claim_detail_view = AsyncClaimDetailView.as_view()
+    dashboard_stats_view = AsyncDashboardStatsView.as_view()
+    payor_integration_view = AsyncPayorIntegrationView.as_view()
+    payor_claim_status_view = async_get_payor_claim_status
+else:
+    claim_list_view = MongoClaimListView.as_view()
+    claim_detail_view = MongoClaimDetailView.as_view()
+    dashboard_stats_view = MongoDashboardStatsView.as_view()
+    payor_integration_view = PayorIntegrationView.as_view()
+    payor_claim_status_view = get_payor_claim_status
+
 urlpatterns = [
     # JWT Authentication endpoints (MongoDB-based)
     path('auth/token/', mongo_token_obtain, name='jwt-token-obtain'),
@@ -64,30 +95,39 @@ urlpatterns = [
     path('mongo/register/', MongoRegisterView.as_view(), name='mongo-register'),
     path('mongo/register-test/', mongo_register_user, name='mongo-register-test'),
     path('mongo/password-reset/', MongoPasswordResetView.as_view(), name='mongo-password-reset'),
-    path('mongo/claims/', MongoClaimListView.as_view(), name='mongo-claims-list'),
-    path('mongo/claims/<str:claim_id>/', MongoClaimDetailView.as_view(), name='mongo-claim-detail'),
+    path('mongo/claims/', claim_list_view, name='mongo-claims-list'),
+    path('mongo/claims/search/', MongoClaimSearchView.as_view(), name='mongo-claims-search'),
+    path('mongo/claims/<str:claim_id>/', claim_detail_view, name='mongo-claim-detail'),
+    path('mongo/claims/<str:claim_id>/history/', MongoClaimHistoryView.as_view(), name='mongo-claim-history'),
+    path('mongo/claims/<str:claim_id>/documents/', MongoClaimDocumentListView.as_view(), name='mongo-claim-documents'),
+    path('mongo/claims/<str:claim_id>/documents/<str:document_id>/download/', MongoClaimDocumentDownloadView.as_view(), name='mongo-claim-document-download'),
+    path('mongo/history/', MongoStatusHistoryView.as_view(), name='mongo-status-history'),
     path('mongo/users/', MongoUserListView.as_view(), name='mongo-users-list'),
-    path('mongo/dashboard/stats/', MongoDashboardStatsView.as_view(), name='mongo-dashboard-stats'),
+    path('mongo/dashboard/stats/', dashboard_stats_view, name='mongo-dashboard-stats'),
+    path('mongo/analytics/timeseries/', MongoClaimAnalyticsView.as_view(), name='mongo-analytics-timeseries'),
+    path('mongo/pool-stats/', MongoPoolStatsView.as_view(), name='mongo-pool-stats'),
     path('mongo/profile/', MongoUserProfileView.as_view(), name='mongo-user-profile'),
     
     # Payor Integration endpoints (legacy)
-    path('payor/integration/', PayorIntegrationView.as_view(), name='payor-integration'),
+    path('payor/integration/', payor_integration_view, name='payor-integration'),
     path('payor/sync/', ClaimSyncView.as_view(), name='payor-sync-all'),
     path('payor/sync/<str:claim_id>/', ClaimSyncView.as_view(), name='payor-sync-claim'),
     path('payor/validate/', PolicyValidationView.as_view(), name='payor-validate'),
     
     # Provider-Payor Integration endpoints (new - as per PROVIDER_INTEGRATION_GUIDE.md)
     path('provider/submit-claim/', submit_claim_to_payor, name='provider-submit-claim'),
-    path('provider/claim-status/<str:claim_id>/', get_payor_claim_status, name='provider-claim-status'),
+    path('provider/claim-status/<str:claim_id>/', payor_claim_status_view, name='provider-claim-status'),
     path('provider/webhook/payor-claims/', payor_webhook_receiver, name='provider-webhook'),
     path('provider/test-connection/', test_payor_connection, name='provider-test-connection'),
     path('provider/update-config/', update_payor_configuration, name='provider-update-config'),
     path('provider/sync-claims/', sync_all_claims_status, name='provider-sync-claims'),
+    path('provider/validate-codes/', validate_codes, name='provider-validate-codes'),
     
     # Webhook endpoints for receiving payor notifications
     path('webhooks/payor/claim-approved/', payor_claim_approved, name='webhook-claim-approved'),
     path('webhooks/payor/claim-denied/', payor_claim_denied, name='webhook-claim-denied'),
     path('webhooks/payor/claim-under-review/', payor_claim_under_review, name='webhook-claim-under-review'),
+    path('webhooks/payor/batch/', payor_webhook_batch, name='webhook-payor-batch'),
     path('webhooks/payor/', PayorWebhookView.as_view(), name='webhook-payor-generic'),
     path('webhooks/health/', webhook_health_check, name='webhook-health'),
     path('webhooks/test/', webhook_test_endpoint, name='webhook-test'),
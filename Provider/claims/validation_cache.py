@@ -0,0 +1,247 @@
+"""
+Policy Validation Result Cache
+Bounded LRU + TTL cache for insurance policy validation results so repeat
+validations are answered in-process. Invalidations bump a version counter in
+registry_versions and copy it to the shared cache, where every process
+re-reads it periodically without querying MongoDB on the request path.
+"""
+
+import copy
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+logger = logging.getLogger(__name__)
+
+# registry_versions document bumped by every invalidation
+VERSION_ID = 'validation'
+# Shared cache key holding a copy of that version
+VERSION_KEY = 'validation_cache:version'
+
+
+class ValidationResultCache:
+    """
+    Thread-safe LRU cache with per-entry expiry
+
+    Keys start with ``(insurance_id, diagnosis_code, procedure_code, amount_bucket)``
+    followed by the other inputs the policy rules look at (age, prior auth...).
+    Amounts are rounded *up* to the bucket size, so as long as policy amount
+    limits are multiples of the bucket size every amount in a bucket lands on
+    the same side of the limit and shares one cached result.
+
+    Results are copied on the way in and out, so callers may modify them.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300, amount_bucket: float = 1.0,
+                 version_check_interval: float = 2):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.amount_bucket = amount_bucket
+        self.version_check_interval = version_check_interval
+        self._version = None
+        self._version_checked_at = 0.0
+        self._version_thread: Optional[threading.Thread] = None
+        self._entries: 'OrderedDict[Tuple, Tuple[float, Dict[str, Any], Optional[str]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def make_key(self, insurance_id: str, claim_data: Dict[str, Any]) -> Tuple:
+        """Build a normalized cache key for a validation request"""
+        try:
+            amount = float(claim_data.get('amount_requested', claim_data.get('amount')) or 0)
+        except (TypeError, ValueError):
+            amount = 0.0
+        bucket = math.ceil(amount / self.amount_bucket) if self.amount_bucket else amount
+
+        # Secondary inputs that also influence the policy decision
+        extra_codes = tuple(
+            str(item.get('code') if isinstance(item, dict) else item).strip().upper()
+            for item in claim_data.get('diagnosis_codes', []) or []
+        )
+        treatment = str(claim_data.get('treatment_type') or claim_data.get('procedure_description') or '')
+
+        return (
+            str(insurance_id or '').strip().upper(),
+            str(claim_data.get('diagnosis_code') or '').strip().upper(),
+            str(claim_data.get('procedure_code') or '').strip().upper(),
+            bucket,
+            claim_data.get('patient_age'),
+            bool(claim_data.get('prior_authorization')),
+            extra_codes,
+            ' '.join(treatment.lower().split()),
+            claim_data.get('provider_id'),
+        )
+
+    @staticmethod
+    def _collection():
+        from .mongo_models import RegistryVersion
+        return RegistryVersion._get_collection()
+
+    @staticmethod
+    def _shared():
+        try:
+            return caches['shared']
+        except InvalidCacheBackendError:
+            return caches['default']
+
+    def _check_version(self):
+        """Drop every entry when another process invalidated (checked every version_check_interval)"""
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+        try:
+            version = self._shared().get(VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read validation cache version: {e}")
+            return
+        if version is None:
+            # Not in the shared cache yet (or evicted): copy it from MongoDB in the background
+            self._start_version_load()
+            return
+        self._apply_version(version)
+
+    def _apply_version(self, version: int):
+        with self._lock:
+            if self._version is not None and version != self._version:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+            self._version = version
+
+    def _start_version_load(self):
+        with self._lock:
+            if self._version_thread is not None and self._version_thread.is_alive():
+                return
+            self._version_thread = threading.Thread(
+                target=self._load_version, name='validation-cache-version', daemon=True
+            )
+            self._version_thread.start()
+
+    def _load_version(self):
+        try:
+            doc = self._collection().find_one({'_id': VERSION_ID}, {'version': 1})
+            version = (doc or {}).get('version', 0)
+            # add, not set: a concurrent bump may already have stored a newer version
+            self._shared().add(VERSION_KEY, version, None)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load validation cache version: {e}")
+            return
+        self._apply_version(version)
+
+    def _bump_version(self):
+        try:
+            doc = self._collection().find_one_and_update(
+                {'_id': VERSION_ID}, {'$inc': {'version': 1}}, upsert=True, return_document=True
+            )
+            version = (doc or {}).get('version')
+            self._shared().set(VERSION_KEY, version, None)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not bump validation cache version: {e}")
+            return
+        # This process is already invalidated locally
+        with self._lock:
+            self._version = version
+            self._version_checked_at = time.monotonic()
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        self._check_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, result, _ = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def set(self, key: Tuple, result: Dict[str, Any], policy_number: Optional[str] = None):
+        expires_at = time.monotonic() + self.ttl
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = (expires_at, result, policy_number)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, insurance_id: Optional[str] = None, policy_number: Optional[str] = None) -> int:
+        """
+        Drop cached results for an insurance ID and/or a catalog policy
+
+        Matching entries are removed here at once; other processes drop
+        their whole cache at their next version check.
+
+        Args:
+            insurance_id: Insurance ID whose results should be dropped
+            policy_number: Policy number whose results should be dropped
+
+        Returns:
+            Number of entries removed
+        """
+        insurance_id = str(insurance_id).strip().upper() if insurance_id else None
+        with self._lock:
+            stale = [
+                key for key, (_, _, entry_policy) in self._entries.items()
+                if (insurance_id and key[0] == insurance_id)
+                or (policy_number and entry_policy == policy_number)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        self._bump_version()
+        return len(stale)
+
+    def clear(self):
+        """Drop every entry in this process"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def invalidate_all(self):
+        """Drop every entry here and in every other process"""
+        self.clear()
+        self._bump_version()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'version': self._version,
+            }
+
+
+# Global instance
+validation_cache = ValidationResultCache(
+    max_size=getattr(settings, 'POLICY_VALIDATION_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'POLICY_VALIDATION_CACHE_TTL', 300),
+    amount_bucket=getattr(settings, 'POLICY_VALIDATION_AMOUNT_BUCKET', 1.0),
+    version_check_interval=getattr(settings, 'POLICY_VALIDATION_VERSION_CHECK_SECONDS', 2),
+)
@@ -5,8 +5,10 @@ from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from django.db import models
+from decimal import Decimal
 from .models import Claim, ClaimDocument, ClaimStatusHistory
 from .serializers import ClaimSerializer, ClaimCreateSerializer, UserSerializer
+from accounts.search import search_patients
 
 User = get_user_model()
 
@@ -148,16 +150,21 @@ class ProviderStatsView(APIView):
         if request.user.role != "provider":
             return Response({"error": "Forbidden"}, status=status.HTTP_403_FORBIDDEN)
         
-        claims = Claim.objects.filter(provider=request.user)
+        # Counts and exact Decimal sums computed by the database in one query
+        totals = Claim.objects.filter(provider=request.user).aggregate(
+            total_claims=models.Count('id'),
+            pending_claims=models.Count('id', filter=models.Q(status='pending')),
+            approved_claims=models.Count('id', filter=models.Q(status='approved')),
+            rejected_claims=models.Count('id', filter=models.Q(status='rejected')),
+            under_review_claims=models.Count('id', filter=models.Q(status='under_review')),
+            total_revenue=models.Sum('amount_approved', filter=models.Q(status='approved'), default=Decimal('0')),
+            total_requested=models.Sum('amount_requested', default=Decimal('0')),
+        )
         
         stats = {
-            "total_claims": claims.count(),
-            "pending_claims": claims.filter(status='pending').count(),
-            "approved_claims": claims.filter(status='approved').count(),
-            "rejected_claims": claims.filter(status='rejected').count(),
-            "under_review_claims": claims.filter(status='under_review').count(),
-            "total_revenue": float(sum(claim.amount_approved or 0 for claim in claims.filter(status='approved'))),
-            "total_requested": float(sum(claim.amount_requested for claim in claims)),
+            **totals,
+            "total_revenue": float(totals['total_revenue']),
+            "total_requested": float(totals['total_requested']),
         }
         
         return Response(stats)
@@ -176,15 +183,7 @@ class PatientSearchView(APIView):
             return Response({"error": "Query parameter 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
         
         # Search patients by insurance_id, username, first_name, last_name, or email
-        patients = User.objects.filter(
-            role='patient'
-        ).filter(
-            models.Q(insurance_id__icontains=query) |
-            models.Q(username__icontains=query) |
-            models.Q(first_name__icontains=query) |
-            models.Q(last_name__icontains=query) |
-            models.Q(email__icontains=query)
-        )[:10]  # Limit to 10 results
+        patients = search_patients(query, limit=10)
         
         serializer = UserSerializer(patients, many=True)
         return Response(serializer.data)
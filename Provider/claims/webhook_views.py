@@ -4,7 +4,7 @@ Provider Webhook Views for receiving payor notifications
 import json
 import logging
 from datetime import datetime
-from django.http import JsonResponse
+from django.http import HttpRequest, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
@@ -12,7 +12,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from .mongo_models import Claim, User
+from .mongo_models import Claim, User, to_money
+from .status_history import status_history
+from .structured_logging import log_payload
 import hashlib
 import hmac
 
@@ -30,7 +32,7 @@ def payor_claim_approved(request):
         data = json.loads(request.body.decode('utf-8'))
         
         # Log the incoming webhook
-        logger.info(f"Received claim approval webhook: {data}")
+        log_payload(logger, "Received claim approval webhook", data)
         
         # Extract claim information
         claim_id = data.get('claim_id')
@@ -70,7 +72,7 @@ def payor_claim_approved(request):
                 patient_name = data.get('patient_name')
                 claim = Claim.objects(
                     patient_name=patient_name,
-                    amount_requested=float(approved_amount),
+                    amount_requested=to_money(approved_amount),
                     status__in=['pending', 'submitted', 'under_review']
                 ).first()
                 
@@ -80,8 +82,8 @@ def payor_claim_approved(request):
                 
                 # Update claim status
                 claim.status = 'approved'
-                claim.approved_amount = float(approved_amount) if approved_amount else claim.amount_requested
-                claim.patient_responsibility = float(patient_responsibility)
+                claim.approved_amount = to_money(approved_amount) if approved_amount else claim.amount_requested
+                claim.patient_responsibility = to_money(patient_responsibility) or to_money(0)
                 claim.approval_date = datetime.now()
                 claim.payor_response = data
                 claim.notes = f"{claim.notes}\n[PAYOR APPROVED] {notes}" if claim.notes else f"[PAYOR APPROVED] {notes}"
@@ -91,12 +93,11 @@ def payor_claim_approved(request):
                     claim.payor_claim_id = payor_reference
                 
                 claim.save()
+                status_history.record(claim, original_status, claim.status, notes=f"Payor approval webhook ({reason_code})")
                 
-                logger.info(f"✅ Claim approval webhook processed successfully")
-                logger.info(f"   Claim ID: {claim_id}")
-                logger.info(f"   MongoDB ID: {str(claim.id)}")
-                logger.info(f"   Status: {original_status} → approved")
-                logger.info(f"   Amount: ${claim.approved_amount}")
+                logger.info("✅ Claim approval webhook processed: %s → approved", original_status, extra={
+                    'claim_id': claim_id, 'mongo_id': str(claim.id), 'approved_amount': claim.approved_amount
+                })
                 
                 return JsonResponse({
                     'success': True,
@@ -107,22 +108,22 @@ def payor_claim_approved(request):
                         'claim_number': claim.claim_number,
                         'status': claim.status,
                         'original_status': original_status,
-                        'approved_amount': claim.approved_amount,
-                        'patient_responsibility': claim.patient_responsibility,
+                        'approved_amount': float(claim.approved_amount) if claim.approved_amount is not None else None,
+                        'patient_responsibility': float(claim.patient_responsibility) if claim.patient_responsibility is not None else None,
                         'approval_date': claim.approval_date.isoformat() if claim.approval_date else None
                     }
                 })
             else:
-                logger.warning(f"❌ Claim not found for webhook")
-                logger.warning(f"   Searched for claim_id: {claim_id}")
-                logger.warning(f"   Searched for payor_reference: {payor_reference}")
-                logger.warning(f"   Patient name: {data.get('patient_name')}")
+                logger.warning("❌ Claim not found for approval webhook", extra={
+                    'claim_id': claim_id, 'payor_reference': payor_reference, 'patient_name': data.get('patient_name')
+                })
                 
-                # List recent claims for debugging
-                recent_claims = Claim.objects().order_by('-date_submitted').limit(5)
-                logger.warning(f"   Recent claims in database:")
-                for rc in recent_claims:
-                    logger.warning(f"     - {rc.claim_number} | {rc.claim_id} | {rc.patient_name} | {rc.status}")
+                # List recent claims for debugging (an extra query, so only at DEBUG)
+                if logger.isEnabledFor(logging.DEBUG):
+                    recent_claims = Claim.objects().order_by('-date_submitted').limit(5)
+                    logger.debug("Recent claims in database", extra={'recent_claims': [
+                        f"{rc.claim_number} | {rc.claim_id} | {rc.patient_name} | {rc.status}" for rc in recent_claims
+                    ]})
                 
                 return JsonResponse({
                     'success': False,
@@ -136,21 +137,21 @@ def payor_claim_approved(request):
                 }, status=404)
                 
         except Exception as e:
-            logger.error(f"Database error updating claim {claim_id}: {str(e)}")
+            logger.error("Database error updating claim %s: %s", claim_id, e)
             return JsonResponse({
                 'success': False,
                 'error': f'Database error: {str(e)}'
             }, status=500)
             
     except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in webhook payload: {str(e)}")
+        logger.error("Invalid JSON in webhook payload: %s", e)
         return JsonResponse({
             'success': False,
             'error': 'Invalid JSON payload'
         }, status=400)
         
     except Exception as e:
-        logger.error(f"Unexpected error in claim approval webhook: {str(e)}")
+        logger.error("Unexpected error in claim approval webhook: %s", e)
         return JsonResponse({
             'success': False,
             'error': f'Internal server error: {str(e)}'
@@ -169,7 +170,7 @@ def payor_claim_denied(request):
         data = json.loads(request.body.decode('utf-8'))
         
         # Log the incoming webhook
-        logger.info(f"Received claim denial webhook: {data}")
+        log_payload(logger, "Received claim denial webhook", data)
         
         # Extract claim information
         claim_id = data.get('claim_id')
@@ -221,12 +222,11 @@ def payor_claim_denied(request):
                     claim.payor_claim_id = payor_reference
                 
                 claim.save()
+                status_history.record(claim, original_status, claim.status, notes=f"Payor denial webhook: {denial_reason}")
                 
-                logger.info(f"✅ Claim denial webhook processed successfully")
-                logger.info(f"   Claim ID: {claim_id}")
-                logger.info(f"   MongoDB ID: {str(claim.id)}")
-                logger.info(f"   Status: {original_status} → denied")
-                logger.info(f"   Reason: {denial_reason}")
+                logger.info("✅ Claim denial webhook processed: %s → denied", original_status, extra={
+                    'claim_id': claim_id, 'mongo_id': str(claim.id), 'denial_reason': denial_reason
+                })
                 
                 return JsonResponse({
                     'success': True,
@@ -242,9 +242,9 @@ def payor_claim_denied(request):
                     }
                 })
             else:
-                logger.warning(f"❌ Claim not found for denial webhook")
-                logger.warning(f"   Searched for claim_id: {claim_id}")
-                logger.warning(f"   Searched for payor_reference: {payor_reference}")
+                logger.warning("❌ Claim not found for denial webhook", extra={
+                    'claim_id': claim_id, 'payor_reference': payor_reference
+                })
                 
                 return JsonResponse({
                     'success': False,
@@ -253,21 +253,21 @@ def payor_claim_denied(request):
                 }, status=404)
                 
         except Exception as e:
-            logger.error(f"Database error updating claim {claim_id}: {str(e)}")
+            logger.error("Database error updating claim %s: %s", claim_id, e)
             return JsonResponse({
                 'success': False,
                 'error': f'Database error: {str(e)}'
             }, status=500)
             
     except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in webhook payload: {str(e)}")
+        logger.error("Invalid JSON in webhook payload: %s", e)
         return JsonResponse({
             'success': False,
             'error': 'Invalid JSON payload'
         }, status=400)
         
     except Exception as e:
-        logger.error(f"Unexpected error in claim denial webhook: {str(e)}")
+        logger.error("Unexpected error in claim denial webhook: %s", e)
         return JsonResponse({
             'success': False,
             'error': f'Internal server error: {str(e)}'
@@ -286,7 +286,7 @@ def payor_claim_under_review(request):
         data = json.loads(request.body.decode('utf-8'))
         
         # Log the incoming webhook
-        logger.info(f"Received claim under review webhook: {data}")
+        log_payload(logger, "Received claim under review webhook", data)
         
         # Extract claim information
         claim_id = data.get('claim_id')
@@ -331,11 +331,11 @@ def payor_claim_under_review(request):
                     claim.payor_claim_id = payor_reference
                 
                 claim.save()
+                status_history.record(claim, original_status, claim.status, notes=f"Payor review webhook: {review_reason}")
                 
-                logger.info(f"✅ Claim under review webhook processed successfully")
-                logger.info(f"   Claim ID: {claim_id}")
-                logger.info(f"   Status: {original_status} → under_review")
-                logger.info(f"   Review reason: {review_reason}")
+                logger.info("✅ Claim under review webhook processed: %s → under_review", original_status, extra={
+                    'claim_id': claim_id, 'mongo_id': str(claim.id), 'review_reason': review_reason
+                })
                 
                 return JsonResponse({
                     'success': True,
@@ -351,8 +351,7 @@ def payor_claim_under_review(request):
                     }
                 })
             else:
-                logger.warning(f"❌ Claim not found for under review webhook")
-                logger.warning(f"   Searched for claim_id: {claim_id}")
+                logger.warning("❌ Claim not found for under review webhook", extra={'claim_id': claim_id})
                 
                 return JsonResponse({
                     'success': False,
@@ -361,27 +360,100 @@ def payor_claim_under_review(request):
                 }, status=404)
                 
         except Exception as e:
-            logger.error(f"Database error updating claim {claim_id}: {str(e)}")
+            logger.error("Database error updating claim %s: %s", claim_id, e)
             return JsonResponse({
                 'success': False,
                 'error': f'Database error: {str(e)}'
             }, status=500)
             
     except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in webhook payload: {str(e)}")
+        logger.error("Invalid JSON in webhook payload: %s", e)
         return JsonResponse({
             'success': False,
             'error': 'Invalid JSON payload'
         }, status=400)
         
     except Exception as e:
-        logger.error(f"Unexpected error in claim under review webhook: {str(e)}")
+        logger.error("Unexpected error in claim under review webhook: %s", e)
         return JsonResponse({
             'success': False,
             'error': f'Internal server error: {str(e)}'
         }, status=500)
 
 
+BATCH_EVENT_HANDLERS = {
+    'claim_approved': payor_claim_approved,
+    'claim_denied': payor_claim_denied,
+    'claim_under_review': payor_claim_under_review,
+}
+
+
+def _event_request(request, event):
+    """Single-event request for one entry of a batch (same headers, event as body)"""
+    event_request = HttpRequest()
+    event_request.method = 'POST'
+    event_request.META = request.META
+    event_request.path = request.path
+    event_request._body = json.dumps(event).encode('utf-8')
+    return event_request
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def payor_webhook_batch(request):
+    """
+    Webhook endpoint for coalesced payor notifications
+    POST /api/webhooks/payor/batch/
+    
+    Body: {"events": [<claim_approved | claim_denied | claim_under_review payload>, ...]}
+    Each event is processed by its single-event handler; the response carries
+    one result per event, in order, so the payor only retries the failed ones.
+    """
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+    except json.JSONDecodeError as e:
+        logger.error("Invalid JSON in batch webhook payload: %s", e)
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid JSON payload'
+        }, status=400)
+    
+    events = data.get('events') if isinstance(data, dict) else None
+    if not isinstance(events, list):
+        return JsonResponse({
+            'success': False,
+            'error': 'events list is required'
+        }, status=400)
+    
+    results = []
+    for event in events:
+        event_type = event.get('event_type') if isinstance(event, dict) else None
+        handler = BATCH_EVENT_HANDLERS.get(event_type)
+        if handler is None:
+            results.append({'claim_id': event.get('claim_id') if isinstance(event, dict) else None,
+                            'status': 400, 'error': f'Unsupported event type: {event_type}'})
+            continue
+        
+        response = handler(_event_request(request, event))
+        result = {'claim_id': event.get('claim_id'), 'event_type': event_type, 'status': response.status_code}
+        if response.status_code >= 400:
+            try:
+                result['error'] = json.loads(response.content).get('error', '')
+            except ValueError:
+                result['error'] = response.content.decode('utf-8', 'replace')[:200]
+        results.append(result)
+    
+    processed = sum(1 for result in results if result['status'] < 400)
+    logger.info("✅ Batch webhook processed: %d/%d events", processed, len(results))
+    
+    return JsonResponse({
+        'success': processed == len(results),
+        'processed': processed,
+        'failed': len(results) - processed,
+        'results': results
+    })
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def webhook_health_check(request):
@@ -407,7 +479,7 @@ def webhook_test_endpoint(request):
     try:
         data = json.loads(request.body.decode('utf-8')) if request.body else {}
         
-        logger.info(f"Received test webhook: {data}")
+        log_payload(logger, "Received test webhook", data)
         
         return JsonResponse({
             'success': True,
@@ -417,7 +489,7 @@ def webhook_test_endpoint(request):
         })
         
     except Exception as e:
-        logger.error(f"Test webhook error: {str(e)}")
+        logger.error("Test webhook error: %s", e)
         return JsonResponse({
             'success': False,
             'error': f'Test webhook failed: {str(e)}'
@@ -438,7 +510,7 @@ class PayorWebhookView(APIView):
             event_type = data.get('event_type', 'unknown')
             claim_id = data.get('claim_id')
             
-            logger.info(f"Received generic payor webhook - Event: {event_type}, Claim: {claim_id}")
+            logger.info("Received generic payor webhook - Event: %s, Claim: %s", event_type, claim_id)
             
             # Route to appropriate handler based on event type
             if event_type == 'claim_approved':
@@ -448,7 +520,7 @@ class PayorWebhookView(APIView):
             elif event_type == 'claim_under_review':
                 return self._handle_under_review(data)
             else:
-                logger.warning(f"Unknown webhook event type: {event_type}")
+                logger.warning("Unknown webhook event type: %s", event_type)
                 return Response({
                     'success': True,
                     'message': f'Webhook received but event type {event_type} not handled',
@@ -456,7 +528,7 @@ class PayorWebhookView(APIView):
                 }, status=status.HTTP_200_OK)
                 
         except Exception as e:
-            logger.error(f"Generic webhook error: {str(e)}")
+            logger.error("Generic webhook error: %s", e)
             return Response({
                 'success': False,
                 'error': f'Webhook processing failed: {str(e)}'
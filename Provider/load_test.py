@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Load test harness for the Provider API
+
+Drives a weighted mix of claim create, list, dashboard, payor webhook and
+payor sync requests at a fixed concurrency against a local server and
+reports throughput and p50/p95/p99 latency per scenario. Results are written
+as JSON so runs can be compared (--compare).
+
+Intended setup (everything local, nothing over ngrok):
+    mongod                                   # MONGO_HOST=mongodb://localhost:27017
+    python payor_simulator.py                # or any local payor stand-in
+    PAYOR_BASE_URL=http://127.0.0.1:8002/api python manage.py runserver 8001
+    python load_test.py --concurrency 16 --duration 60
+
+Usage:
+    python load_test.py [--base-url URL] [--concurrency N] [--duration S]
+                        [--mix create=2,list=4,dashboard=2,webhook=1,sync=1]
+                        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from requests.auth import HTTPBasicAuth
+
+DEFAULT_BASE_URL = "http://127.0.0.1:8001"
+DEFAULT_MIX = "create=2,list=4,dashboard=2,webhook=1,sync=1"
+PERCENTILES = (50, 95, 99)
+
+# Insurance IDs with a built-in payor mapping (POL-001-BASIC / POL-002-PREMIUM);
+# unmapped IDs are never sent to the payor, so create would not measure it
+INSURANCE_IDS = ("INS001", "INS002", "HI12345", "BC-789-456")
+# Diagnoses, treatments (procedure descriptions) and amounts covered by both
+# policies, so claims pass the policy catalog instead of being denied outright
+DIAGNOSES = [
+    ("J06.9", "Acute upper respiratory infection"),
+    ("I10", "Essential hypertension"),
+    ("M25.50", "Pain in unspecified joint"),
+    ("K59.00", "Constipation, unspecified"),
+]
+PROCEDURES = [
+    ("99213", "Routine checkup"),
+    ("80053", "Diagnostic test"),
+    ("99396", "Preventive care"),
+]
+MAX_AMOUNT = 4500
+WEBHOOKS = ("claim-approved", "claim-denied", "claim-under-review")
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def parse_server_timing(header):
+    """{'db': ms, 'payor': ms, ...} from a Server-Timing header"""
+    timings = {}
+    for metric in (header or '').split(','):
+        parts = [part.strip() for part in metric.split(';')]
+        name = parts[0]
+        for part in parts[1:]:
+            if part.startswith('dur='):
+                try:
+                    timings[name] = float(part[4:])
+                except ValueError:
+                    pass
+    return timings
+
+
+class Results:
+    """Thread-safe latency and status collection per scenario"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.server_timing = defaultdict(lambda: defaultdict(float))
+        self.mongo_queries = defaultdict(int)
+
+    def record(self, scenario, latency_ms, status_code, response=None):
+        with self.lock:
+            self.latencies[scenario].append(latency_ms)
+            self.statuses[scenario][str(status_code)] += 1
+            if status_code is None or status_code >= 400:
+                self.errors[scenario] += 1
+            if response is not None:
+                for name, duration in parse_server_timing(response.headers.get('Server-Timing')).items():
+                    self.server_timing[scenario][name] += duration
+                queries = response.headers.get('X-Mongo-Queries')
+                if queries and queries.isdigit():
+                    self.mongo_queries[scenario] += int(queries)
+
+    def summary(self, elapsed):
+        scenarios = {}
+        all_latencies = []
+        for scenario, latencies in sorted(self.latencies.items()):
+            values = sorted(latencies)
+            all_latencies.extend(values)
+            count = len(values)
+            scenarios[scenario] = {
+                'requests': count,
+                'errors': self.errors[scenario],
+                'error_rate': round(self.errors[scenario] / count, 4) if count else 0,
+                'throughput_rps': round(count / elapsed, 2) if elapsed else 0,
+                'mean_ms': round(sum(values) / count, 2) if count else None,
+                **{f'p{pct}_ms': round(percentile(values, pct), 2) for pct in PERCENTILES},
+                'max_ms': round(values[-1], 2),
+                'status_codes': dict(self.statuses[scenario]),
+                # Server-side breakdown from the Server-Timing header (mean per request)
+                'server_timing_ms': {
+                    name: round(total / count, 2) for name, total in self.server_timing[scenario].items()
+                },
+                'mongo_queries_per_request': round(self.mongo_queries[scenario] / count, 2) if count else None,
+            }
+
+        all_latencies.sort()
+        total = len(all_latencies)
+        errors = sum(self.errors.values())
+        return {
+            'requests': total,
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+            **{f'p{pct}_ms': round(percentile(all_latencies, pct), 2) if total else None for pct in PERCENTILES},
+            'max_ms': round(all_latencies[-1], 2) if total else None,
+        }, scenarios
+
+
+class LoadTest:
+    """Closed-loop workers issuing weighted random requests until the deadline"""
+
+    def __init__(self, base_url, auth, mix, timeout=30, seed=None):
+        self.base_url = base_url.rstrip('/')
+        self.auth = auth
+        self.mix = mix
+        self.timeout = timeout
+        self.seed = seed if seed is not None else int(time.time())
+        self.results = Results()
+        # Claims created during the run, used as webhook targets; the ones the
+        # payor accepted (with a payor claim id) are the sync targets
+        self.claims = []
+        self.submitted_claims = []
+        self.claims_lock = threading.Lock()
+        self.scenarios = {
+            'create': self.create_claim,
+            'list': self.list_claims,
+            'dashboard': self.dashboard,
+            'webhook': self.webhook,
+            'sync': self.sync_claim,
+        }
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def timed(self, scenario, session, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = session.request(method, self.url(path), timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            self.results.record(scenario, (time.perf_counter() - started) * 1000, None)
+            return None
+        self.results.record(scenario, (time.perf_counter() - started) * 1000, response.status_code, response)
+        return response
+
+    def random_claim(self, rng, submitted=False):
+        with self.claims_lock:
+            claims = self.submitted_claims if submitted else self.claims
+            return rng.choice(claims) if claims else None
+
+    # Scenarios
+
+    def create_claim(self, session, rng):
+        diagnosis_code, diagnosis = rng.choice(DIAGNOSES)
+        procedure_code, procedure = rng.choice(PROCEDURES)
+        payload = {
+            'patient_name': f"Load Test Patient {rng.randint(1, 500)}",
+            'insurance_id': rng.choice(INSURANCE_IDS),
+            'diagnosis_code': diagnosis_code,
+            'diagnosis_description': diagnosis,
+            'procedure_code': procedure_code,
+            'procedure_description': procedure,
+            'amount_requested': round(rng.uniform(50, MAX_AMOUNT), 2),
+            'date_of_service': datetime.now().date().isoformat(),
+            'priority': rng.choice(['low', 'medium', 'high']),
+            'notes': 'load test',
+        }
+        response = self.timed('create', session, 'POST', '/api/mongo/claims/', json=payload)
+        if response is not None and response.status_code == 201:
+            claim = response.json()
+            entry = {'id': claim.get('id'), 'claim_number': claim.get('claim_number')}
+            with self.claims_lock:
+                self.claims.append(entry)
+                if claim.get('payor_claim_id'):
+                    self.submitted_claims.append(entry)
+
+    def list_claims(self, session, rng):
+        self.timed('list', session, 'GET', '/api/mongo/claims/')
+
+    def dashboard(self, session, rng):
+        self.timed('dashboard', session, 'GET', '/api/mongo/dashboard/stats/')
+
+    def webhook(self, session, rng):
+        claim = self.random_claim(rng)
+        if claim is None:
+            return self.create_claim(session, rng)
+        event = rng.choice(WEBHOOKS)
+        payload = {
+            'claim_id': claim['claim_number'],
+            'payor_reference': f"PAY-{rng.randint(100000, 999999)}",
+            'approved_amount': round(rng.uniform(10, 1000), 2),
+            'denial_reason': 'Load test denial',
+            'reason_code': 'LOADTEST',
+            'notes': 'load test webhook',
+        }
+        self.timed('webhook', session, 'POST', f'/api/webhooks/payor/{event}/', json=payload)
+
+    def sync_claim(self, session, rng):
+        claim = self.random_claim(rng, submitted=True)
+        if claim is None:
+            return self.create_claim(session, rng)
+        self.timed('sync', session, 'POST', f"/api/payor/sync/{claim['id']}/")
+
+    # Runner
+
+    def worker(self, worker_id, deadline, weights):
+        rng = random.Random(self.seed + worker_id)
+        names = list(weights)
+        session = requests.Session()
+        session.auth = self.auth
+        while time.monotonic() < deadline:
+            scenario = rng.choices(names, weights=[weights[name] for name in names])[0]
+            self.scenarios[scenario](session, rng)
+        session.close()
+
+    def run(self, concurrency, duration, warmup=0):
+        if warmup:
+            print(f"🔥 Warming up for {warmup}s...")
+            warmup_test = LoadTest(self.base_url, self.auth, self.mix, self.timeout, self.seed)
+            warmup_test.claims, warmup_test.claims_lock = self.claims, self.claims_lock
+            warmup_test.submitted_claims = self.submitted_claims
+            warmup_test._run(concurrency, warmup)
+        print(f"🚀 Running {duration}s at concurrency {concurrency} (mix: {format_mix(self.mix)})")
+        return self._run(concurrency, duration)
+
+    def _run(self, concurrency, duration):
+        deadline = time.monotonic() + duration
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(self.worker, n, deadline, self.mix) for n in range(concurrency)]
+            for future in futures:
+                future.result()
+        return time.perf_counter() - started
+
+
+def parse_mix(spec):
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in ('create', 'list', 'dashboard', 'webhook', 'sync'):
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def format_mix(mix):
+    return ','.join(f"{name}={weight:g}" for name, weight in mix.items())
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+def preflight(base_url, auth):
+    """Check the server is up and collect environment details for the report"""
+    environment = {}
+    try:
+        response = requests.get(f"{base_url}/api/health/", timeout=5)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"❌ Provider server not reachable at {base_url}: {e}")
+        sys.exit(1)
+    try:
+        environment['mongo_pool'] = requests.get(f"{base_url}/api/mongo/pool-stats/", timeout=5).json().get('settings')
+    except (requests.RequestException, ValueError):
+        pass
+    try:
+        connection = requests.get(f"{base_url}/api/payor/integration/", auth=auth, timeout=10).json()
+        environment['payor_base_url'] = connection.get('payor_config', {}).get('base_url')
+        environment['payor_connection'] = connection.get('connection_status', {}).get('success')
+    except (requests.RequestException, ValueError):
+        pass
+    if environment.get('payor_base_url') and 'ngrok' in environment['payor_base_url']:
+        print("⚠️ The server is configured with an ngrok payor; point PAYOR_BASE_URL at a local stand-in for reproducible numbers")
+    return environment
+
+
+def print_report(totals, scenarios):
+    print()
+    print(f"{'scenario':<12}{'requests':>10}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, stats in scenarios.items():
+        print(f"{name:<12}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput_rps']:>9}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+    print(f"{'total':<12}{totals['requests']:>10}{totals['errors']:>8}{totals['throughput_rps']:>9}"
+          f"{totals['p50_ms']!s:>10}{totals['p95_ms']!s:>10}{totals['p99_ms']!s:>10}{totals['max_ms']!s:>10}")
+
+
+def compare(current, baseline_path):
+    """Print throughput and latency changes against a previous result file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print()
+    print(f"📊 Compared with {baseline_path} ({baseline['meta'].get('git_commit')} → {current['meta'].get('git_commit')})")
+    rows = [('total', baseline['totals'], current['totals'])]
+    rows += [(name, baseline['scenarios'][name], stats)
+             for name, stats in current['scenarios'].items() if name in baseline['scenarios']]
+    for name, before, after in rows:
+        changes = []
+        for key in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            if before.get(key) and after.get(key) is not None:
+                delta = (after[key] - before[key]) / before[key] * 100
+                changes.append(f"{key} {before[key]} → {after[key]} ({delta:+.1f}%)")
+        print(f"  {name:<10} " + ', '.join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Provider API")
+    parser.add_argument('--base-url', default=os.environ.get('PROVIDER_BASE_URL', DEFAULT_BASE_URL))
+    parser.add_argument('--username', default=os.environ.get('LOAD_TEST_USERNAME', 'provider1'))
+    parser.add_argument('--password', default=os.environ.get('LOAD_TEST_PASSWORD', 'password123'))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30, help="Measured run length in seconds")
+    parser.add_argument('--warmup', type=float, default=5, help="Unmeasured warm-up in seconds")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=None, help="Random seed for a reproducible request sequence")
+    parser.add_argument('--output', default=None, help="Result file (default load_test_results/<timestamp>.json)")
+    parser.add_argument('--compare', default=None, help="Previous result file to compare against")
+    args = parser.parse_args()
+
+    auth = HTTPBasicAuth(args.username, args.password)
+    environment = preflight(args.base_url, auth)
+
+    test = LoadTest(args.base_url, auth, args.mix, timeout=args.timeout, seed=args.seed)
+    started_at = datetime.now()
+    elapsed = test.run(args.concurrency, args.duration, warmup=args.warmup)
+    totals, scenarios = test.results.summary(elapsed)
+
+    result = {
+        'meta': {
+            'started_at': started_at.isoformat(),
+            'elapsed_s': round(elapsed, 2),
+            'base_url': args.base_url,
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'warmup_s': args.warmup,
+            'mix': args.mix,
+            'seed': test.seed,
+            'git_commit': git_commit(),
+            'environment': environment,
+        },
+        'totals': totals,
+        'scenarios': scenarios,
+    }
+
+    print_report(totals, scenarios)
+
+    output = args.output or os.path.join('load_test_results', f"{started_at:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,640 @@
+#!/usr/bin/env python3
+"""
+Local Payor Simulator
+Stand-in for the payor system so integration, benchmarking and resilience work
+can run offline. Implements the endpoints PayorIntegrationService and
+ProviderPayorAPI call, decides claims with the policy catalog
+(hcms_payor_db.insurance_policies.json via claims.policy_rules), and calls the
+provider's webhook endpoints back once a claim has been reviewed.
+
+Latency, error rate and timeouts are injected per request, globally or per route:
+
+    python payor_simulator.py --port 8002 --latency lognormal:80,0.6 --error-rate 0.02
+    python payor_simulator.py --config simulator.json --seed 7
+
+    # Point the provider at it
+    PAYOR_BASE_URL=http://127.0.0.1:8002/api python manage.py runserver 8001
+
+Latency specs (milliseconds): ``fixed:50``, ``uniform:20,120``, ``normal:80,20``,
+``lognormal:<median>,<sigma>``. The config file is JSON with the same keys as
+the command line options plus a ``routes`` object of per-route overrides:
+
+    {"latency": "lognormal:80,0.5", "error_rate": 0.01,
+     "routes": {"claims_create": {"latency": "uniform:200,800", "timeout_rate": 0.05}}}
+
+Routes: health, policies, validate, claims_create, claims_status.
+Counters are served at GET /api/simulator/stats/.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import math
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from urllib import error as urlerror, request as urlrequest
+
+from decouple import config as config_env
+
+# Add project directory to Python path
+project_dir = Path(__file__).parent
+sys.path.insert(0, str(project_dir))
+
+# claims.policy_rules reads INSURANCE_POLICY_CATALOG from the Django settings on import
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'provider.settings')
+
+from claims.policy_rules import PolicyRuleEngine  # noqa: E402
+
+DEFAULT_CATALOG = project_dir / 'hcms_payor_db.insurance_policies.json'
+
+# Insurance IDs the provider's built-in mappings send, resolved the same way
+# (development assumptions, see PayorIntegrationService.insurance_mappings)
+INSURANCE_POLICIES = {
+    'INS001': 'POL-001-BASIC',
+    'INS002': 'POL-002-PREMIUM',
+    'INS003': 'POL-003-SENIOR',
+    'HI12345': 'POL-002-PREMIUM',
+    'BC-789-456': 'POL-001-BASIC',
+}
+
+# Claims from the provider don't carry its ID; network checks assume the configured provider
+DEFAULT_PROVIDER_ID = config_env('PROVIDER_ID', default='PROV-001')
+
+ROUTES = ('health', 'policies', 'validate', 'claims_create', 'claims_status')
+
+LEGACY_WEBHOOKS = {
+    'approved': 'webhooks/payor/claim-approved/',
+    'rejected': 'webhooks/payor/claim-denied/',
+    'under_review': 'webhooks/payor/claim-under-review/',
+}
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class LatencyModel:
+    """Samples a response delay (seconds) from a ``kind:params`` spec in milliseconds"""
+
+    KINDS = ('none', 'fixed', 'uniform', 'normal', 'lognormal')
+
+    def __init__(self, spec: str = 'none'):
+        self.spec = spec or 'none'
+        kind, _, params = self.spec.partition(':')
+        self.kind = kind.strip().lower()
+        if self.kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}' (expected one of {', '.join(self.KINDS)})")
+        try:
+            self.params = [float(value) for value in params.split(',') if value.strip()]
+        except ValueError:
+            raise ValueError(f"Invalid latency parameters in '{spec}'")
+        required = {'none': 0, 'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}[self.kind]
+        if len(self.params) < required:
+            raise ValueError(f"Latency '{self.kind}' needs {required} parameter(s), got '{spec}'")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == 'none':
+            return 0.0
+        if self.kind == 'fixed':
+            ms = self.params[0]
+        elif self.kind == 'uniform':
+            ms = rng.uniform(self.params[0], self.params[1])
+        elif self.kind == 'normal':
+            ms = rng.gauss(self.params[0], self.params[1])
+        else:
+            # Median and sigma of the underlying normal: long right tail like real upstreams
+            ms = rng.lognormvariate(math.log(max(self.params[0], 0.001)), self.params[1])
+        return max(ms, 0.0) / 1000
+
+
+class FaultProfile:
+    """Latency, error and timeout behaviour for one route"""
+
+    def __init__(self, latency: str = 'none', error_rate: float = 0.0, error_statuses=(500, 503),
+                 timeout_rate: float = 0.0, timeout_seconds: float = 35.0):
+        self.latency = LatencyModel(latency)
+        self.error_rate = float(error_rate)
+        self.error_statuses = tuple(int(status) for status in error_statuses)
+        self.timeout_rate = float(timeout_rate)
+        self.timeout_seconds = float(timeout_seconds)
+
+    def override(self, settings: Dict[str, Any]) -> 'FaultProfile':
+        return FaultProfile(
+            latency=settings.get('latency', self.latency.spec),
+            error_rate=settings.get('error_rate', self.error_rate),
+            error_statuses=settings.get('error_statuses', self.error_statuses),
+            timeout_rate=settings.get('timeout_rate', self.timeout_rate),
+            timeout_seconds=settings.get('timeout_seconds', self.timeout_seconds),
+        )
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'latency': self.latency.spec,
+            'error_rate': self.error_rate,
+            'error_statuses': list(self.error_statuses),
+            'timeout_rate': self.timeout_rate,
+            'timeout_seconds': self.timeout_seconds,
+        }
+
+
+class WebhookDispatcher:
+    """Background thread that sends claim decisions back to the provider"""
+
+    def __init__(self, provider_url: str, secret: str, mode: str, timeout: float = 10.0):
+        self.provider_url = provider_url.rstrip('/')
+        if not self.provider_url.endswith('/api'):
+            self.provider_url += '/api'
+        self.secret = secret
+        self.mode = mode
+        self.timeout = timeout
+        self.sent = 0
+        self.failed = 0
+        self._queue: 'queue.Queue[Dict[str, Any]]' = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='webhook-dispatcher', daemon=True)
+        self._thread.start()
+
+    def schedule(self, claim: Dict[str, Any]):
+        if self.mode != 'off':
+            self._queue.put(dict(claim))
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            claim = self._queue.get()
+            if self.mode in ('signed', 'both'):
+                self._send_signed(claim)
+            if self.mode in ('legacy', 'both'):
+                self._send_legacy(claim)
+
+    def _post(self, url: str, body: bytes, headers: Dict[str, str]) -> bool:
+        req = urlrequest.Request(url, data=body, method='POST',
+                                 headers={'Content-Type': 'application/json', **headers})
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as response:
+                ok = 200 <= response.status < 300
+        except (urlerror.URLError, OSError) as e:
+            print(f"❌ Webhook to {url} failed: {e}", file=sys.stderr)
+            ok = False
+        if ok:
+            self.sent += 1
+        else:
+            self.failed += 1
+        return ok
+
+    def _send_signed(self, claim: Dict[str, Any]):
+        """Integration-guide webhook with an HMAC-SHA256 X-Webhook-Signature"""
+        payload = {
+            'event_type': 'claim_status_changed',
+            'timestamp': now_iso(),
+            'claim_id': claim['claim_id'],
+            'previous_status': claim['previous_status'],
+            'new_status': claim['status'],
+            'message': claim['message'],
+            'patient_name': claim['patient_name'],
+            'insurance_id': claim['insurance_id'],
+            'amount': claim['amount'],
+            'coverage_validated': claim['coverage_validated'],
+            'auto_approved': claim['auto_approved'],
+            'payment_details': {
+                'approved_amount': claim['expected_payment'],
+                'patient_responsibility': claim['patient_responsibility'],
+            },
+            'processed_by': 'payor-simulator',
+            'processed_date': claim['processed_date'],
+        }
+        body = json.dumps(payload).encode()
+        signature = hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+        self._post(f"{self.provider_url}/provider/webhook/payor-claims/", body,
+                   {'X-Webhook-Signature': f'sha256={signature}'})
+
+    def _send_legacy(self, claim: Dict[str, Any]):
+        """Per-outcome webhooks (claim-approved / claim-denied / claim-under-review)"""
+        endpoint = LEGACY_WEBHOOKS.get(claim['status'])
+        if endpoint is None:
+            return
+        payload = {
+            'claim_id': claim.get('provider_claim_id') or claim['claim_id'],
+            'payor_reference': claim['claim_id'],
+            'patient_name': claim['patient_name'],
+            'approved_amount': claim['expected_payment'],
+            'patient_responsibility': claim['patient_responsibility'],
+            'denial_reason': claim['rejection_reason'],
+            'reason_code': claim['reason_code'],
+            'notes': claim['message'],
+            'event_type': f"claim_{claim['status']}",
+            'timestamp': now_iso(),
+        }
+        self._post(f"{self.provider_url}/{endpoint}", json.dumps(payload).encode(), {})
+
+
+class PayorSimulator:
+    """In-memory payor: claims store, policy decisions, fault injection and counters"""
+
+    def __init__(self, catalog_path, default_profile: FaultProfile, route_profiles: Dict[str, FaultProfile],
+                 dispatcher: WebhookDispatcher, review_delay: float = 5.0, approval_rate: float = 0.85,
+                 auto_approve_limit: float = 1000.0, coinsurance: float = 0.2,
+                 default_policy: str = 'POL-001-BASIC', seed: Optional[int] = None):
+        self.engine = PolicyRuleEngine.from_file(catalog_path)
+        self.policies = PolicyRuleEngine._read_catalog(catalog_path)
+        self.default_profile = default_profile
+        self.route_profiles = route_profiles
+        self.dispatcher = dispatcher
+        self.review_delay = review_delay
+        self.approval_rate = approval_rate
+        self.auto_approve_limit = auto_approve_limit
+        self.coinsurance = coinsurance
+        self.default_policy = default_policy
+        self.claims: Dict[str, Dict[str, Any]] = {}
+        self.started = time.time()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {route: {'requests': 0, 'errors_injected': 0, 'timeouts_injected': 0} for route in ROUTES}
+
+    def profile(self, route: str) -> FaultProfile:
+        return self.route_profiles.get(route, self.default_profile)
+
+    def random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def plan(self, route: str) -> Tuple[float, Optional[int], bool]:
+        """
+        Decide how the next request on a route misbehaves
+
+        Returns:
+            (delay seconds, injected error status or None, hang past client timeout)
+        """
+        profile = self.profile(route)
+        with self._lock:
+            counters = self.stats[route]
+            counters['requests'] += 1
+            delay = profile.latency.sample(self._rng)
+            if self._rng.random() < profile.timeout_rate:
+                counters['timeouts_injected'] += 1
+                return profile.timeout_seconds, None, True
+            if self._rng.random() < profile.error_rate:
+                counters['errors_injected'] += 1
+                return delay, self._rng.choice(profile.error_statuses), False
+        return delay, None, False
+
+    def resolve_policy(self, data: Dict[str, Any]) -> str:
+        """Policy for a claim: explicit policy_number, a policy-number insurance ID, or the known mappings"""
+        for candidate in (data.get('policy_number'), data.get('insurance_id')):
+            if self.engine.has_policy(candidate):
+                return candidate
+        return INSURANCE_POLICIES.get(str(data.get('insurance_id') or '').upper(), self.default_policy)
+
+    def validate(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return self.engine.evaluate(self.resolve_policy(data), data, provider_id=data.get('provider_id') or DEFAULT_PROVIDER_ID)
+
+    def create_claim(self, data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        missing = [field for field in ('patient_name', 'insurance_id') if not data.get(field)]
+        try:
+            amount = Decimal(str(data.get('amount_requested', data.get('amount', ''))))
+        except InvalidOperation:
+            amount = None
+        if amount is None or amount <= 0:
+            missing.append('amount')
+        if missing:
+            return 400, {
+                'error': f"Missing or invalid fields: {', '.join(missing)}",
+                'error_code': 'VALIDATION_ERROR',
+                'suggestions': ['Send patient_name, insurance_id and a positive amount'],
+            }
+
+        started = time.perf_counter()
+        policy_number = self.resolve_policy(data)
+        validation = self.engine.evaluate(policy_number, data, provider_id=data.get('provider_id') or DEFAULT_PROVIDER_ID)
+        if validation is None:
+            return 404, {
+                'error': f"Insurance policy {policy_number} not found",
+                'error_code': 'POLICY_NOT_FOUND',
+                'suggestions': [f"Known insurance IDs: {', '.join(sorted(INSURANCE_POLICIES))}"],
+            }
+
+        claim_id = f"PAY-{uuid.uuid4().hex[:12].upper()}"
+        claim = {
+            'claim_id': claim_id,
+            'provider_claim_id': data.get('claim_number') or data.get('claim_id'),
+            'patient_name': data['patient_name'],
+            'insurance_id': data['insurance_id'],
+            'policy_number': policy_number,
+            'amount': str(amount),
+            'coverage_validated': validation['is_valid'],
+            'coverage_message': validation['coverage_details'].get('message'),
+            'submitted_date': now_iso(),
+            'processed_date': None,
+            'previous_status': None,
+            'expected_payment': None,
+            'patient_responsibility': None,
+            'rejection_reason': None,
+            'reason_code': None,
+        }
+
+        if not validation['is_valid']:
+            self._decide(claim, 'rejected', validation['error'])
+            claim['auto_approved'] = False
+        elif amount <= Decimal(str(self.auto_approve_limit)):
+            self._decide(claim, 'approved', 'Claim auto-approved')
+            claim['auto_approved'] = True
+        else:
+            claim.update(status='under_review', message='Claim is under manual review', auto_approved=False)
+
+        with self._lock:
+            self.claims[claim_id] = claim
+        # Every outcome is announced; manual reviews are decided later with a second webhook
+        self.dispatcher.schedule(claim)
+        if claim['status'] == 'under_review':
+            timer = threading.Timer(self.review_delay, self._review, args=(claim_id,))
+            timer.daemon = True
+            timer.start()
+
+        return 201, {
+            'status': 'success',
+            'message': claim['message'],
+            'id': claim_id,
+            'claim_id': claim_id,
+            'claim': {
+                'claim_id': claim_id,
+                'status': claim['status'],
+                'coverage_validated': claim['coverage_validated'],
+                'coverage_message': claim['coverage_message'],
+                'payment_details': {
+                    'approved_amount': claim['expected_payment'],
+                    'patient_responsibility': claim['patient_responsibility'],
+                },
+            },
+            'auto_approved': claim['auto_approved'],
+            'processing_time_ms': round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def _decide(self, claim: Dict[str, Any], status: str, message: str):
+        amount = Decimal(claim['amount'])
+        claim['previous_status'] = claim.get('status')
+        claim['status'] = status
+        claim['message'] = message
+        claim['processed_date'] = now_iso()
+        if status == 'approved':
+            responsibility = (amount * Decimal(str(self.coinsurance))).quantize(Decimal('0.01'))
+            claim['expected_payment'] = str(amount - responsibility)
+            claim['patient_responsibility'] = str(responsibility)
+        else:
+            claim['expected_payment'] = '0.00'
+            claim['patient_responsibility'] = str(amount)
+            claim['rejection_reason'] = message
+            claim['reason_code'] = 'POLICY_CONDITIONS' if claim['coverage_validated'] is False else 'MANUAL_REVIEW'
+
+    def _review(self, claim_id: str):
+        with self._lock:
+            claim = self.claims.get(claim_id)
+        if claim is None or claim['status'] != 'under_review':
+            return
+        if self.random() < self.approval_rate:
+            self._decide(claim, 'approved', 'Claim approved after review')
+        else:
+            self._decide(claim, 'rejected', 'Claim denied after review')
+        self.dispatcher.schedule(claim)
+
+    def claim_status(self, claim_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            claim = self.claims.get(claim_id)
+            if claim is None:
+                return None
+            claim = dict(claim)
+        return {
+            **claim,
+            # PayorIntegrationService.sync_claim_status field names
+            'id': claim['claim_id'],
+            'amount_approved': claim['expected_payment'],
+            'date_processed': claim['processed_date'],
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses: Dict[str, int] = {}
+            for claim in self.claims.values():
+                statuses[claim['status']] = statuses.get(claim['status'], 0) + 1
+            return {
+                'uptime_seconds': round(time.time() - self.started, 1),
+                'routes': {route: dict(counters) for route, counters in self.stats.items()},
+                'profiles': {route: self.profile(route).describe() for route in ROUTES},
+                'claims': {'total': len(self.claims), 'by_status': statuses},
+                'webhooks': {'sent': self.dispatcher.sent, 'failed': self.dispatcher.failed,
+                             'pending': self.dispatcher.pending(), 'mode': self.dispatcher.mode},
+            }
+
+
+CLAIM_STATUS_PATH = re.compile(r'^/api/claims/(?P<claim_id>[^/]+)/?$')
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """Routes requests to the simulator, applying the route's fault profile first"""
+
+    server_version = 'PayorSimulator/1.0'
+    protocol_version = 'HTTP/1.1'
+    simulator: PayorSimulator = None
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Any):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Optional[Dict[str, Any]]:
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            data = json.loads(raw or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _route(self, method: str) -> Tuple[Optional[str], Dict[str, str]]:
+        path = self.path.split('?', 1)[0]
+        if path.rstrip('/') in ('/api/health', '/health'):
+            return 'health', {}
+        if path.rstrip('/') == '/api/insurance-policies':
+            return ('policies' if method == 'GET' else None), {}
+        if path.rstrip('/') == '/api/insurance-policies/validate':
+            return ('validate' if method == 'POST' else None), {}
+        if path.rstrip('/') == '/api/claims':
+            return ('claims_create' if method == 'POST' else None), {}
+        match = CLAIM_STATUS_PATH.match(path)
+        if match and method == 'GET':
+            return 'claims_status', match.groupdict()
+        return None, {}
+
+    def _handle(self, method: str):
+        path = self.path.split('?', 1)[0]
+        if path.rstrip('/') == '/api/simulator/stats':
+            return self._send_json(200, self.simulator.snapshot())
+
+        route, params = self._route(method)
+        if route is None:
+            return self._send_json(404, {'error': f'No simulated endpoint for {method} {path}'})
+
+        # Body is read up front so injected faults still drain the request
+        data = self._read_json() if method == 'POST' else {}
+        delay, error_status, hang = self.simulator.plan(route)
+        if hang:
+            # Hold the connection past the client's timeout, then drop it
+            time.sleep(delay)
+            self.close_connection = True
+            return None
+        if delay:
+            time.sleep(delay)
+        if error_status is not None:
+            return self._send_json(error_status, {'error': 'Injected payor failure', 'error_code': 'SIMULATED_FAULT'})
+        if data is None:
+            return self._send_json(400, {'error': 'Request body must be a JSON object', 'error_code': 'INVALID_JSON'})
+
+        if route == 'health':
+            return self._send_json(200, {'status': 'healthy', 'service': 'payor-simulator',
+                                         'policies': len(self.simulator.policies), 'timestamp': now_iso()})
+        if route == 'policies':
+            return self._send_json(200, self.simulator.policies)
+        if route == 'validate':
+            result = self.simulator.validate(data)
+            if result is None:
+                return self._send_json(404, {'is_valid': False, 'error': 'Insurance policy not found',
+                                             'coverage_details': {}})
+            return self._send_json(200, result)
+        if route == 'claims_create':
+            status, payload = self.simulator.create_claim(data)
+            return self._send_json(status, payload)
+        claim = self.simulator.claim_status(params['claim_id'])
+        if claim is None:
+            return self._send_json(404, {'error': f"Claim {params['claim_id']} not found",
+                                         'error_code': 'CLAIM_NOT_FOUND'})
+        return self._send_json(200, claim)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+def load_config(path: Optional[str]) -> Dict[str, Any]:
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Local payor simulator with latency and fault injection')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8002)
+    parser.add_argument('--catalog', default=str(DEFAULT_CATALOG), help='Insurance policy catalog JSON')
+    parser.add_argument('--config', help='JSON file with defaults and per-route overrides')
+    parser.add_argument('--latency', help='Latency spec in ms, e.g. fixed:50, uniform:20,120, lognormal:80,0.6')
+    parser.add_argument('--error-rate', type=float, help='Fraction of requests answered with 500/503')
+    parser.add_argument('--timeout-rate', type=float, help='Fraction of requests held past the client timeout')
+    parser.add_argument('--timeout-seconds', type=float, help='How long timed-out requests hang (default 35)')
+    parser.add_argument('--route', action='append', default=[], metavar='ROUTE:KEY=VALUE',
+                        help='Per-route override, e.g. claims_create:latency=uniform:200,800 (repeatable)')
+    parser.add_argument('--provider-url', help='Provider base URL for webhooks (default http://127.0.0.1:8001)')
+    parser.add_argument('--webhook-mode', choices=('signed', 'legacy', 'both', 'off'),
+                        help='signed: /api/provider/webhook/payor-claims/, legacy: /api/webhooks/payor/claim-*/')
+    parser.add_argument('--webhook-secret', help='HMAC secret for signed webhooks (default PAYOR_WEBHOOK_SECRET)')
+    parser.add_argument('--review-delay', type=float, help='Seconds before manual reviews are decided (default 5)')
+    parser.add_argument('--approval-rate', type=float, help='Fraction of manual reviews approved (default 0.85)')
+    parser.add_argument('--auto-approve-limit', type=float, help='Valid claims up to this amount are auto-approved')
+    parser.add_argument('--seed', type=int, help='Random seed for repeatable runs')
+    parser.add_argument('--quiet', action='store_true', help='Do not log each request')
+    return parser.parse_args(argv)
+
+
+def build_simulator(args: argparse.Namespace) -> PayorSimulator:
+    config = load_config(args.config)
+
+    def option(name: str, default):
+        value = getattr(args, name)
+        return config.get(name, default) if value is None else value
+
+    default_profile = FaultProfile(
+        latency=option('latency', 'none'),
+        error_rate=option('error_rate', 0.0),
+        error_statuses=config.get('error_statuses', (500, 503)),
+        timeout_rate=option('timeout_rate', 0.0),
+        timeout_seconds=option('timeout_seconds', 35.0),
+    )
+
+    overrides: Dict[str, Dict[str, Any]] = {route: dict(values) for route, values in config.get('routes', {}).items()}
+    for item in args.route:
+        route, _, setting = item.partition(':')
+        key, _, value = setting.partition('=')
+        if not value:
+            raise SystemExit(f"Invalid --route '{item}', expected ROUTE:KEY=VALUE")
+        overrides.setdefault(route, {})[key.replace('-', '_')] = value if key == 'latency' else float(value)
+    unknown = set(overrides) - set(ROUTES)
+    if unknown:
+        raise SystemExit(f"Unknown route(s) {', '.join(sorted(unknown))}; expected {', '.join(ROUTES)}")
+
+    dispatcher = WebhookDispatcher(
+        provider_url=option('provider_url', 'http://127.0.0.1:8001'),
+        secret=option('webhook_secret', config_env('PAYOR_WEBHOOK_SECRET', default='default-webhook-secret-change-in-production')),
+        mode=option('webhook_mode', 'signed'),
+    )
+    return PayorSimulator(
+        catalog_path=args.catalog,
+        default_profile=default_profile,
+        route_profiles={route: default_profile.override(values) for route, values in overrides.items()},
+        dispatcher=dispatcher,
+        review_delay=option('review_delay', 5.0),
+        approval_rate=option('approval_rate', 0.85),
+        auto_approve_limit=option('auto_approve_limit', 1000.0),
+        seed=option('seed', None),
+    )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        simulator = build_simulator(args)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    if not simulator.policies:
+        raise SystemExit(f"❌ No policies loaded from {args.catalog}")
+
+    SimulatorHandler.simulator = simulator
+    SimulatorHandler.quiet = args.quiet
+    server = ThreadingHTTPServer((args.host, args.port), SimulatorHandler)
+    server.daemon_threads = True
+
+    print(f"🏥 Payor simulator on http://{args.host}:{args.port}/api ({len(simulator.policies)} policies)")
+    for route in ROUTES:
+        print(f"   {route:<14} {simulator.profile(route).describe()}")
+    print(f"🔔 Webhooks: {simulator.dispatcher.mode} -> {simulator.dispatcher.provider_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping payor simulator")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -17,10 +17,34 @@ PROVIDER_WEBHOOK_CONFIG = {
         'test': '/api/webhooks/test/'
     },
     
-    # Connection settings
+    # Per-provider base URLs (provider_id -> URL); others use BASE_URL
+    'PROVIDER_URLS': {},
+    
+    # Connection settings (each provider URL gets its own pool)
     'TIMEOUT': 30,
-    'RETRY_ATTEMPTS': 3,
-    'RETRY_DELAY': 5
+    'CONNECT_TIMEOUT': 5,
+    'MAX_CONNECTIONS_PER_PROVIDER': 10,
+    'MAX_CONCURRENCY_PER_PROVIDER': 10,
+    
+    # Durable delivery: notifications are queued in this SQLite file and
+    # retried with exponential backoff (RETRY_DELAY * RETRY_BACKOFF ** n,
+    # capped at RETRY_MAX_DELAY) until RETRY_ATTEMPTS is reached
+    'OUTBOX_PATH': 'webhook_outbox.sqlite3',
+    'RETRY_ATTEMPTS': 8,
+    'RETRY_DELAY': 5,
+    'RETRY_BACKOFF': 2,
+    'RETRY_MAX_DELAY': 900,
+    'MAX_IN_FLIGHT': 500,
+    'POLL_INTERVAL': 5,
+    
+    # Coalesce notifications for the same provider into one request
+    # (WINDOW seconds of delay before the first attempt)
+    'BATCHING': {
+        'ENABLED': False,
+        'ENDPOINT': '/api/webhooks/payor/batch/',
+        'MAX_SIZE': 50,
+        'WINDOW': 0.5,
+    }
 }
 
 # Logging configuration for webhook debugging
@@ -64,4 +88,4 @@ LOGGING = {
 
 # PROVIDER_WEBHOOK_URL=http://127.0.0.1:8000
 # PROVIDER_WEBHOOK_TIMEOUT=30
-# PROVIDER_WEBHOOK_RETRY_ATTEMPTS=3
\ No newline at end of file
+# PROVIDER_WEBHOOK_RETRY_ATTEMPTS=8
\ No newline at end of file
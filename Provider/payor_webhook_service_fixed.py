@@ -1,16 +1,433 @@
 """
 Payor Webhook Service (FIXED VERSION)
 Sends notifications to provider systems about claim decisions
+
+Notifications are written to a durable outbox (SQLite) and delivered by a
+background asyncio dispatcher, so adjudication never waits on a provider
+endpoint: each provider base URL gets its own pooled HTTP client and a
+concurrency limit, failed deliveries are rescheduled with exponential backoff
+(surviving restarts), and pending notifications for the same provider can be
+coalesced into batched deliveries.
 """
-import requests
+import asyncio
 import json
 import logging
+import random
+import sqlite3
+import threading
+import time
 from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import httpx
 from django.conf import settings
-import time
 
 logger = logging.getLogger(__name__)  # Fixed: __name__ instead of _name_
 
+DEFAULT_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'PayorSystem/1.0 WebhookBot',
+    'ngrok-skip-browser-warning': 'true'  # Skip ngrok browser warning
+}
+
+# Responses that will never succeed on retry (anything else is retried)
+PERMANENT_FAILURE_STATUSES = {400, 401, 403, 405, 410, 413, 422}
+
+# Rows of a claim are delivered one at a time, oldest first: a row is held back
+# while an older row for the same claim and provider is pending or in flight
+NO_OLDER_UNDELIVERED = (
+    "NOT EXISTS (SELECT 1 FROM webhook_outbox older WHERE older.base_url = webhook_outbox.base_url "
+    "AND older.claim_id = webhook_outbox.claim_id AND older.id < webhook_outbox.id "
+    "AND older.status IN ('pending', 'in_flight'))"
+)
+
+
+class WebhookOutbox:
+    """
+    Durable queue of pending notifications (one SQLite file, safe for
+    several worker processes)
+
+    A delivery is claimed with a lease; if the worker dies mid-delivery the
+    lease expires and the row becomes due again. Notifications for one claim
+    are leased strictly in order, so a provider never receives under_review
+    after the approval or denial that followed it (dead rows do not block).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS webhook_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                base_url TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                webhook_type TEXT NOT NULL,
+                claim_id TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                lease_until REAL,
+                last_error TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS webhook_outbox_due ON webhook_outbox (status, next_attempt_at)'
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS webhook_outbox_claim ON webhook_outbox (base_url, claim_id, id)'
+        )
+
+    def enqueue(self, base_url: str, endpoint: str, webhook_type: str, payload: Dict[str, Any],
+                delay: float = 0) -> int:
+        """
+        Store a notification for delivery
+
+        Args:
+            base_url: Provider system base URL
+            endpoint: Webhook path on the provider system
+            webhook_type: Notification type (for logging)
+            payload: JSON body
+            delay: Seconds before the first attempt (batching window)
+
+        Returns:
+            Outbox row ID
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO webhook_outbox (base_url, endpoint, webhook_type, claim_id, payload, next_attempt_at, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (base_url, endpoint, webhook_type, payload.get('claim_id'), json.dumps(payload), now + delay, now)
+            )
+            return cursor.lastrowid
+
+    def claim_due(self, limit: int, lease_seconds: float, horizon: float = 0) -> List[Dict[str, Any]]:
+        """
+        Lease up to ``limit`` due notifications (including expired leases)
+
+        Args:
+            limit: Maximum number of rows
+            lease_seconds: How long the rows stay reserved for this worker
+            horizon: Once a row is due, also take rows that become due within this many seconds
+
+        Returns:
+            Leased rows, oldest first (at most one per claim)
+        """
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                cutoff = now
+                if horizon and self._conn.execute(
+                    "SELECT 1 FROM webhook_outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                    f"AND {NO_OLDER_UNDELIVERED} LIMIT 1", (now,)
+                ).fetchone():
+                    cutoff = now + horizon
+                rows = self._conn.execute(
+                    "SELECT * FROM webhook_outbox WHERE ((status = 'pending' AND next_attempt_at <= ?) "
+                    f"OR (status = 'in_flight' AND lease_until <= ?)) AND {NO_OLDER_UNDELIVERED} "
+                    "ORDER BY next_attempt_at LIMIT ?",
+                    (cutoff, now, limit)
+                ).fetchall()
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE webhook_outbox SET status = 'in_flight', lease_until = ? WHERE id = ?",
+                        [(now + lease_seconds, row['id']) for row in rows]
+                    )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return [dict(row) for row in rows]
+
+    def delivered(self, row_ids: List[int]):
+        with self._lock:
+            self._conn.executemany('DELETE FROM webhook_outbox WHERE id = ?', [(row_id,) for row_id in row_ids])
+
+    def reschedule(self, row_id: int, attempts: int, next_attempt_at: float, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE webhook_outbox SET status = 'pending', attempts = ?, next_attempt_at = ?, "
+                "lease_until = NULL, last_error = ? WHERE id = ?",
+                (attempts, next_attempt_at, error[:500], row_id)
+            )
+
+    def dead(self, row_id: int, attempts: int, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE webhook_outbox SET status = 'dead', attempts = ?, lease_until = NULL, last_error = ? WHERE id = ?",
+                (attempts, error[:500], row_id)
+            )
+
+    def requeue_dead(self) -> int:
+        """Make every dead notification due again (after fixing the provider side)"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE webhook_outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'dead'",
+                (time.time(),)
+            )
+            return cursor.rowcount
+
+    def next_due_at(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(CASE WHEN status = 'pending' THEN next_attempt_at ELSE lease_until END) "
+                f"FROM webhook_outbox WHERE status IN ('pending', 'in_flight') AND {NO_OLDER_UNDELIVERED}"
+            ).fetchone()
+        return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM webhook_outbox GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
+
+
+class AsyncWebhookDispatcher:
+    """
+    Delivers outbox rows from a background event loop
+
+    One ``httpx.AsyncClient`` (keep-alive pool) and one semaphore per provider
+    base URL, so a slow provider only ties up its own connections. The loop is
+    started on the first enqueue and woken immediately by every enqueue.
+    """
+
+    def __init__(self, outbox: WebhookOutbox, config: Dict[str, Any]):
+        self.outbox = outbox
+        self.timeout = config.get('TIMEOUT', 30)
+        self.connect_timeout = config.get('CONNECT_TIMEOUT', 5)
+        self.max_attempts = config.get('RETRY_ATTEMPTS', 8)
+        self.retry_delay = config.get('RETRY_DELAY', 5)
+        self.retry_backoff = config.get('RETRY_BACKOFF', 2)
+        self.retry_max_delay = config.get('RETRY_MAX_DELAY', 900)
+        self.max_connections = config.get('MAX_CONNECTIONS_PER_PROVIDER', 10)
+        self.max_concurrency = config.get('MAX_CONCURRENCY_PER_PROVIDER', self.max_connections)
+        self.max_in_flight = config.get('MAX_IN_FLIGHT', 500)
+        self.poll_interval = config.get('POLL_INTERVAL', 5)
+        self.lease_seconds = config.get('LEASE_SECONDS', max(60, self.timeout * 4))
+
+        batching = config.get('BATCHING', {})
+        self.batching_enabled = batching.get('ENABLED', False)
+        self.batch_endpoint = batching.get('ENDPOINT', '/api/webhooks/payor/batch/')
+        self.batch_max_size = batching.get('MAX_SIZE', 50)
+        self.batch_window = batching.get('WINDOW', 0.5) if self.batching_enabled else 0
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._batch_unsupported = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._stopping = False
+        self._in_flight = 0
+        self.counters = {'delivered': 0, 'retried': 0, 'dead': 0, 'batches': 0, 'requests': 0}
+
+    def start(self):
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._ready.clear()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name='webhook-dispatcher', daemon=True)
+            self._thread.start()
+        self._ready.wait(5)
+
+    def notify(self):
+        """Wake the dispatcher (starting it if needed) to deliver due rows"""
+        self.start()
+        if self._loop and self._wakeup:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def stop(self, timeout: float = 10):
+        """Stop the loop after in-flight deliveries finish; pending rows stay in the outbox"""
+        if not self._thread or not self._thread.is_alive():
+            return
+        self._stopping = True
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+        self._thread.join(timeout)
+
+    def drain(self, timeout: float = 30) -> bool:
+        """Wait until nothing is due or in flight (for shutdown and tests)"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            next_due = self.outbox.next_due_at()
+            if self._in_flight == 0 and (next_due is None or next_due > time.time() + self.poll_interval):
+                return True
+            self.notify()
+            time.sleep(0.05)
+        return False
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        self._wakeup = asyncio.Event()
+        self._ready.set()
+        tasks = set()
+        while not self._stopping:
+            try:
+                # Once the oldest row's batching window closes, take everything
+                # queued during the next window with it
+                rows = self.outbox.claim_due(self.max_in_flight - self._in_flight, self.lease_seconds,
+                                             horizon=self.batch_window)
+            except Exception as e:
+                logger.error(f"❌ Webhook outbox read failed: {e}")
+                rows = []
+
+            for base_url, group in self._group_by_provider(rows).items():
+                self._in_flight += len(group)
+                task = asyncio.create_task(self._deliver_group(base_url, group))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if rows and self._in_flight < self.max_in_flight:
+                continue
+            await self._sleep_until_due()
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._semaphores.clear()
+
+    async def _sleep_until_due(self):
+        timeout = self.poll_interval
+        if self._in_flight < self.max_in_flight:
+            next_due = self.outbox.next_due_at()
+            if next_due is not None:
+                timeout = min(timeout, max(0.0, next_due - time.time()))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    @staticmethod
+    def _group_by_provider(rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(row['base_url'], []).append(row)
+        return groups
+
+    def _client(self, base_url: str) -> httpx.AsyncClient:
+        client = self._clients.get(base_url)
+        if client is None:
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                headers=DEFAULT_HEADERS,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+            self._clients[base_url] = client
+            self._semaphores[base_url] = asyncio.Semaphore(self.max_concurrency)
+        return client
+
+    async def _deliver_group(self, base_url: str, rows: List[Dict[str, Any]]):
+        try:
+            if self.batching_enabled and len(rows) > 1 and base_url not in self._batch_unsupported:
+                chunks = [rows[i:i + self.batch_max_size] for i in range(0, len(rows), self.batch_max_size)]
+                await asyncio.gather(*(self._deliver_batch(base_url, chunk) for chunk in chunks))
+            else:
+                await asyncio.gather(*(self._deliver_one(base_url, row) for row in rows))
+        except Exception as e:
+            logger.error(f"❌ Webhook delivery to {base_url} crashed: {e}")
+        finally:
+            self._in_flight -= len(rows)
+            self._wakeup.set()
+
+    async def _deliver_one(self, base_url: str, row: Dict[str, Any]):
+        client = self._client(base_url)
+        async with self._semaphores[base_url]:
+            try:
+                self.counters['requests'] += 1
+                response = await client.post(row['endpoint'], content=row['payload'])
+            except httpx.HTTPError as e:
+                self._record_outcome(row, None, f"Request failed: {e.__class__.__name__}: {e}")
+                return
+        self._record_outcome(row, response.status_code, f"HTTP {response.status_code}: {response.text[:200]}")
+
+    async def _deliver_batch(self, base_url: str, rows: List[Dict[str, Any]]):
+        client = self._client(base_url)
+        body = '{"events": [' + ', '.join(row['payload'] for row in rows) + ']}'
+        async with self._semaphores[base_url]:
+            try:
+                self.counters['requests'] += 1
+                response = await client.post(self.batch_endpoint, content=body)
+            except httpx.HTTPError as e:
+                for row in rows:
+                    self._record_outcome(row, None, f"Batch request failed: {e.__class__.__name__}: {e}")
+                return
+
+        if response.status_code in (404, 405):
+            # Provider has no batch endpoint: deliver individually from now on
+            logger.warning(f"⚠️ {base_url} does not accept batched webhooks, sending individually")
+            self._batch_unsupported.add(base_url)
+            await asyncio.gather(*(self._deliver_one(base_url, row) for row in rows))
+            return
+
+        self.counters['batches'] += 1
+        results = []
+        if response.status_code in (200, 201, 207):
+            try:
+                results = response.json().get('results', [])
+            except ValueError:
+                results = []
+        for index, row in enumerate(rows):
+            if index < len(results):
+                event_status = results[index].get('status', 500)
+                self._record_outcome(row, event_status, f"HTTP {event_status}: {results[index].get('error', '')}")
+            else:
+                self._record_outcome(row, response.status_code, f"Batch HTTP {response.status_code}")
+
+    def _record_outcome(self, row: Dict[str, Any], status_code: Optional[int], error: str):
+        attempts = row['attempts'] + 1
+        label = f"{row['webhook_type']} webhook for claim {row['claim_id']} to {row['base_url']}"
+        try:
+            if status_code in (200, 201):
+                self.outbox.delivered([row['id']])
+                self.counters['delivered'] += 1
+                logger.info(f"✅ {label} delivered (attempt {attempts})")
+            elif status_code in PERMANENT_FAILURE_STATUSES or attempts >= self.max_attempts:
+                self.outbox.dead(row['id'], attempts, error)
+                self.counters['dead'] += 1
+                logger.error(f"❌ {label} failed permanently after {attempts} attempt(s): {error}")
+            else:
+                delay = min(self.retry_max_delay, self.retry_delay * self.retry_backoff ** (attempts - 1))
+                delay *= random.uniform(0.8, 1.2)
+                self.outbox.reschedule(row['id'], attempts, time.time() + delay, error)
+                self.counters['retried'] += 1
+                logger.warning(f"⚠️ {label} failed (attempt {attempts}), retrying in {delay:.1f}s: {error}")
+        except Exception as e:
+            # The lease expires and the row is retried
+            logger.error(f"❌ Could not record outcome of {label}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'in_flight': self._in_flight,
+            'providers': sorted(self._clients),
+            'batching_enabled': self.batching_enabled,
+            'outbox': self.outbox.counts(),
+            **self.counters,
+        }
+
+
 class ProviderWebhookService:
     """Service to send webhook notifications to provider systems"""
     
@@ -21,6 +438,9 @@ class ProviderWebhookService:
         # Provider system base URL - THIS IS THE KEY FIX
         self.base_url = self.config.get('BASE_URL', 'http://127.0.0.1:8000')  # Default to provider port
         
+        # Per-provider base URLs (provider_id -> URL), BASE_URL for everyone else
+        self.provider_urls = self.config.get('PROVIDER_URLS', {})
+        
         # Webhook endpoints
         self.endpoints = self.config.get('ENDPOINTS', {
             'claim_approved': '/api/webhooks/payor/claim-approved/',
@@ -31,8 +451,9 @@ class ProviderWebhookService:
         })
         
         self.timeout = self.config.get('TIMEOUT', 30)
-        self.retry_attempts = self.config.get('RETRY_ATTEMPTS', 3)
-        self.retry_delay = self.config.get('RETRY_DELAY', 5)
+        
+        self.outbox = WebhookOutbox(self.config.get('OUTBOX_PATH', 'webhook_outbox.sqlite3'))
+        self.dispatcher = AsyncWebhookDispatcher(self.outbox, self.config)
         
         # Log configuration for debugging
         logger.info(f"Webhook service initialized with base_url: {self.base_url}")
@@ -59,7 +480,7 @@ class ProviderWebhookService:
         }
         
         endpoint = self.endpoints.get('claim_approved', '/api/webhooks/payor/claim-approved/')
-        return self._send_webhook(endpoint, payload, 'claim_approval')
+        return self._enqueue(endpoint, payload, 'claim_approval')
     
     def send_claim_denial(self, claim_data):
         """Send claim denial notification to provider"""
@@ -81,7 +502,7 @@ class ProviderWebhookService:
         }
         
         endpoint = self.endpoints.get('claim_denied', '/api/webhooks/payor/claim-denied/')
-        return self._send_webhook(endpoint, payload, 'claim_denial')
+        return self._enqueue(endpoint, payload, 'claim_denial')
     
     def send_claim_under_review(self, claim_data):
         """Send claim under review notification to provider"""
@@ -104,17 +525,17 @@ class ProviderWebhookService:
         }
         
         endpoint = self.endpoints.get('claim_under_review', '/api/webhooks/payor/claim-under-review/')
-        return self._send_webhook(endpoint, payload, 'claim_under_review')
+        return self._enqueue(endpoint, payload, 'claim_under_review')
     
     def test_provider_webhook(self):
-        """Test provider webhook connectivity"""
+        """Test provider webhook connectivity (sent immediately, not queued)"""
         payload = {
             "test": True,
             "message": "Webhook connectivity test from payor system",
             "timestamp": datetime.now().isoformat()
         }
         
-        endpoint = '/api/webhooks/test/'
+        endpoint = self.endpoints.get('test', '/api/webhooks/test/')
         return self._send_webhook(endpoint, payload, 'connectivity_test')
     
     def check_provider_health(self):
@@ -123,20 +544,16 @@ class ProviderWebhookService:
             health_endpoint = self.endpoints.get('health', '/api/webhooks/health/')
             url = f"{self.base_url}{health_endpoint}"
             
-            headers = {
-                'User-Agent': 'PayorSystem/1.0 WebhookBot',
-                'ngrok-skip-browser-warning': 'true'
-            }
-            
             logger.info(f"Checking provider health at: {url}")
-            response = requests.get(url, headers=headers, timeout=self.timeout)
+            response = httpx.get(url, headers=DEFAULT_HEADERS, timeout=self.timeout)
             
             if response.status_code == 200:
                 logger.info("Provider health check successful")
                 return {
                     'success': True,
                     'message': 'Provider webhook service is healthy',
-                    'response': response.json() if response.content else {}
+                    'response': response.json() if response.content else {},
+                    'delivery': self.dispatcher.stats()
                 }
             else:
                 logger.warning(f"Provider health check failed: {response.status_code}")
@@ -153,9 +570,24 @@ class ProviderWebhookService:
                 'message': f'Health check error: {str(e)}'
             }
     
-    def _send_webhook(self, endpoint, payload, webhook_type):
-        """Internal method to send webhook with retry logic"""
-        if not self.base_url or not endpoint:
+    def delivery_stats(self):
+        """Outbox and dispatcher counters"""
+        return self.dispatcher.stats()
+    
+    def retry_failed_webhooks(self):
+        """Requeue notifications that exhausted their retries"""
+        count = self.outbox.requeue_dead()
+        if count:
+            self.dispatcher.notify()
+        return {'success': True, 'requeued': count}
+    
+    def _provider_url(self, payload):
+        return self.provider_urls.get(payload.get('provider_id'), self.base_url)
+    
+    def _enqueue(self, endpoint, payload, webhook_type):
+        """Store the notification in the outbox and return without waiting for delivery"""
+        base_url = self._provider_url(payload)
+        if not base_url or not endpoint:
             logger.warning(f"Webhook configuration missing for {webhook_type}. Skipping notification.")
             return {
                 'success': False,
@@ -163,77 +595,54 @@ class ProviderWebhookService:
                 'skipped': True
             }
         
-        url = f"{self.base_url}{endpoint}"
-        headers = {
-            'Content-Type': 'application/json',
-            'User-Agent': 'PayorSystem/1.0 WebhookBot',
-            'ngrok-skip-browser-warning': 'true'  # Skip ngrok browser warning
-        }
+        try:
+            delivery_id = self.outbox.enqueue(base_url, endpoint, webhook_type, payload,
+                                              delay=self.dispatcher.batch_window)
+        except Exception as e:
+            logger.error(f"Could not queue {webhook_type} webhook for claim {payload.get('claim_id')}: {e}")
+            return {
+                'success': False,
+                'error': f'Could not queue webhook: {str(e)}'
+            }
         
-        # Enhanced logging for debugging
-        logger.info(f"Preparing {webhook_type} webhook")
-        logger.info(f"Target URL: {url}")
-        logger.info(f"Payload: {json.dumps(payload, indent=2)}")
+        self.dispatcher.notify()
+        logger.info(f"Queued {webhook_type} webhook for claim {payload.get('claim_id')} (delivery {delivery_id})")
+        return {
+            'success': True,
+            'queued': True,
+            'message': f'{webhook_type} webhook queued for delivery',
+            'delivery_id': delivery_id,
+            'url': f"{base_url}{endpoint}"
+        }
+    
+    def _send_webhook(self, endpoint, payload, webhook_type):
+        """Send a webhook synchronously, once (connectivity checks only)"""
+        url = f"{self.base_url}{endpoint}"
+        try:
+            response = httpx.post(url, json=payload, headers=DEFAULT_HEADERS, timeout=self.timeout)
+        except httpx.HTTPError as e:
+            logger.error(f"Webhook {webhook_type} request failed: {str(e)}")
+            return {
+                'success': False,
+                'error': f'Request failed: {str(e)}',
+                'url': url
+            }
         
-        for attempt in range(self.retry_attempts):
-            try:
-                logger.info(f"Sending {webhook_type} webhook to {url} (attempt {attempt + 1})")
-                
-                response = requests.post(
-                    url,
-                    json=payload,
-                    headers=headers,
-                    timeout=self.timeout
-                )
-                
-                logger.info(f"Response status: {response.status_code}")
-                logger.info(f"Response body: {response.text}")
-                
-                if response.status_code in [200, 201]:
-                    logger.info(f"Webhook {webhook_type} sent successfully")
-                    return {
-                        'success': True,
-                        'message': f'{webhook_type} webhook sent successfully',
-                        'response': response.json() if response.content else {},
-                        'attempt': attempt + 1,
-                        'url': url
-                    }
-                else:
-                    error_msg = f"HTTP {response.status_code}: {response.text}"
-                    logger.warning(f"Webhook {webhook_type} failed with status {response.status_code}: {response.text}")
-                    
-                    if attempt == self.retry_attempts - 1:
-                        logger.error(f"Webhook failed for provider {payload.get('provider_id', 'UNKNOWN')}: {response.status_code}")
-                        return {
-                            'success': False,
-                            'error': error_msg,
-                            'attempts': attempt + 1,
-                            'url': url
-                        }
-                
-            except requests.RequestException as e:
-                error_msg = f"Request failed: {str(e)}"
-                logger.error(f"Webhook {webhook_type} request failed (attempt {attempt + 1}): {str(e)}")
-                
-                if attempt == self.retry_attempts - 1:
-                    logger.error(f"Webhook failed for provider {payload.get('provider_id', 'UNKNOWN')}: Connection error")
-                    return {
-                        'success': False,
-                        'error': f'Request failed after {self.retry_attempts} attempts: {str(e)}',
-                        'attempts': attempt + 1,
-                        'url': url
-                    }
-            
-            # Wait before retry
-            if attempt < self.retry_attempts - 1:
-                logger.info(f"Retrying in {self.retry_delay} seconds...")
-                time.sleep(self.retry_delay)
+        if response.status_code in [200, 201]:
+            logger.info(f"Webhook {webhook_type} sent successfully")
+            return {
+                'success': True,
+                'message': f'{webhook_type} webhook sent successfully',
+                'response': response.json() if response.content else {},
+                'url': url
+            }
         
+        logger.warning(f"Webhook {webhook_type} failed with status {response.status_code}")
         return {
             'success': False,
-            'error': 'All retry attempts failed',
+            'error': f"HTTP {response.status_code}: {response.text[:500]}",
             'url': url
         }
 
 # Global service instance
-webhook_service = ProviderWebhookService()
\ No newline at end of file
+webhook_service = ProviderWebhookService()
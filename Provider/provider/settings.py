@@ -46,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'claims.metrics.MetricsMiddleware',
+    'claims.query_budget.QueryBudgetMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -91,30 +93,34 @@ DATABASES = {
     }
 }
 
+# Caches: 'shared' is the second tier of the reference data cache
+# (claims.reference_cache), visible to every worker process on the host.
+# File-based by default; point it at memcached with e.g.
+# SHARED_CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# SHARED_CACHE_LOCATION=127.0.0.1:11211
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': config('SHARED_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('SHARED_CACHE_LOCATION', default=str(BASE_DIR / 'shared_cache')),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': config('SHARED_CACHE_MAX_ENTRIES', default=20000, cast=int)},
+    },
+}
+
 # MongoDB connection using MongoEngine
-import mongoengine
-
-def connect_mongodb():
-    """Connect to MongoDB Atlas"""
-    if MONGO_USER and MONGO_PASSWORD and MONGO_HOST:
-        # MongoDB Atlas connection string
-        connection_string = f"mongodb+srv://{MONGO_USER}:{MONGO_PASSWORD}@{MONGO_HOST}/{MONGO_DB_NAME}?retryWrites=true&w=majority"
-        mongoengine.connect(
-            db=MONGO_DB_NAME,
-            host=connection_string,
-            alias='default'
-        )
-    else:
-        # Local MongoDB for development
-        mongoengine.connect(MONGO_DB_NAME)
-
-# Connect to MongoDB on startup
-try:
-    connect_mongodb()
-    print("[SUCCESS] Connected to MongoDB successfully!")
-except Exception as e:
-    print(f"[ERROR] MongoDB connection failed: {e}")
-    print("Using SQLite as fallback database")
+# The connection is registered in ClaimsConfig.ready() and only opened on
+# first use, so management commands and pre-fork servers do not connect
+MONGO_MAX_POOL_SIZE = config('MONGO_MAX_POOL_SIZE', default=50, cast=int)
+MONGO_MIN_POOL_SIZE = config('MONGO_MIN_POOL_SIZE', default=0, cast=int)
+MONGO_MAX_IDLE_TIME_MS = config('MONGO_MAX_IDLE_TIME_MS', default=300000, cast=int)
+MONGO_WAIT_QUEUE_TIMEOUT_MS = config('MONGO_WAIT_QUEUE_TIMEOUT_MS', default=2000, cast=int)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = config('MONGO_SERVER_SELECTION_TIMEOUT_MS', default=5000, cast=int)
+# Wire compression, in order of preference (zstd needs 'zstandard', snappy needs 'python-snappy')
+MONGO_COMPRESSORS = config('MONGO_COMPRESSORS', default='zlib')
+MONGO_APP_NAME = config('MONGO_APP_NAME', default='provider-api')
 
 
 # Password validation
@@ -158,6 +164,13 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Claim documents: content-addressed store (one file per SHA-256) and upload limit
+CLAIM_DOCUMENT_ROOT = config('CLAIM_DOCUMENT_ROOT', default=str(MEDIA_ROOT / 'claim_documents'))
+CLAIM_DOCUMENT_MAX_SIZE = config('CLAIM_DOCUMENT_MAX_SIZE', default=25 * 1024 * 1024, cast=int)
+# Internal nginx location mapped to CLAIM_DOCUMENT_ROOT (e.g. '/protected/claim-documents/');
+# when set, downloads are handed to nginx with X-Accel-Redirect
+CLAIM_DOCUMENT_ACCEL_REDIRECT = config('CLAIM_DOCUMENT_ACCEL_REDIRECT', default='')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -204,3 +217,127 @@ PAYOR_API_KEY = config('PAYOR_API_KEY', default=None)  # Optional API key for au
 PROVIDER_ID = config('PROVIDER_ID', default='PROV-001')
 PROVIDER_NAME = config('PROVIDER_NAME', default='City Medical Center')
 PAYOR_WEBHOOK_SECRET = config('PAYOR_WEBHOOK_SECRET', default='default-webhook-secret-change-in-production')
+
+# Local policy validation
+# Claims are validated against the compiled policy catalog instead of the payor endpoint.
+# Off by default: the built-in insurance ID -> policy mappings are unconfirmed
+# (see PayorIntegrationService.insurance_mappings), enable it once they are
+INSURANCE_POLICY_CATALOG = config('INSURANCE_POLICY_CATALOG', default=str(BASE_DIR / 'hcms_payor_db.insurance_policies.json'))
+LOCAL_POLICY_VALIDATION = config('LOCAL_POLICY_VALIDATION', default=False, cast=bool)
+
+# Policy validation result cache (LRU + TTL)
+POLICY_VALIDATION_CACHE_SIZE = config('POLICY_VALIDATION_CACHE_SIZE', default=10000, cast=int)
+POLICY_VALIDATION_CACHE_TTL = config('POLICY_VALIDATION_CACHE_TTL', default=300, cast=int)
+POLICY_VALIDATION_AMOUNT_BUCKET = config('POLICY_VALIDATION_AMOUNT_BUCKET', default=1.0, cast=float)
+# Seconds between checks for invalidations made by other processes
+POLICY_VALIDATION_VERSION_CHECK_SECONDS = config('POLICY_VALIDATION_VERSION_CHECK_SECONDS', default=2, cast=float)
+
+# ICD-10 / CPT code sets (one code per line, description optional)
+# Existence checks are skipped for code types whose file is missing
+ICD10_CODE_SET_FILE = config('ICD10_CODE_SET_FILE', default=str(BASE_DIR / 'data' / 'icd10cm_codes.txt'))
+CPT_CODE_SET_FILE = config('CPT_CODE_SET_FILE', default=str(BASE_DIR / 'data' / 'cpt_codes.txt'))
+
+# Claim list response cache: encoded lists per provider, invalidated by a
+# per-provider version counter in registry_versions that every claim write bumps
+# Total size of the cached response bodies (bytes), least recently used evicted first
+CLAIM_LIST_CACHE_MAX_BYTES = config('CLAIM_LIST_CACHE_MAX_BYTES', default=64 * 2 ** 20, cast=int)
+CLAIM_LIST_CACHE_TTL = config('CLAIM_LIST_CACHE_TTL', default=300, cast=int)
+
+# Reference data cache (in-process LRU in front of the 'shared' cache)
+REFERENCE_CACHE_LOCAL_SIZE = config('REFERENCE_CACHE_LOCAL_SIZE', default=10000, cast=int)
+REFERENCE_CACHE_LOCAL_TTL = config('REFERENCE_CACHE_LOCAL_TTL', default=30, cast=int)
+# How often each process checks the shared namespace versions for invalidations
+REFERENCE_CACHE_VERSION_CHECK_SECONDS = config('REFERENCE_CACHE_VERSION_CHECK_SECONDS', default=2, cast=float)
+# Shared-tier TTL per namespace (seconds)
+REFERENCE_CACHE_TTL = {
+    'users': config('USER_CACHE_TTL', default=300, cast=int),
+    'insurance_mappings': config('INSURANCE_MAPPING_CACHE_TTL', default=3600, cast=int),
+    'insurance_policies': config('INSURANCE_POLICY_CACHE_TTL', default=600, cast=int),
+}
+
+# Insurance mapping registry (rules in the insurance_mappings collection)
+# How often each process checks the registry version for changes
+INSURANCE_MAPPING_REFRESH_SECONDS = config('INSURANCE_MAPPING_REFRESH_SECONDS', default=30, cast=int)
+
+# Claim search: server-side time limit for a single search query
+CLAIM_SEARCH_MAX_TIME_MS = config('CLAIM_SEARCH_MAX_TIME_MS', default=2000, cast=int)
+
+# Claim status history: entries are buffered and written in batches
+STATUS_HISTORY_BATCH_SIZE = config('STATUS_HISTORY_BATCH_SIZE', default=100, cast=int)
+STATUS_HISTORY_FLUSH_INTERVAL = config('STATUS_HISTORY_FLUSH_INTERVAL', default=1.0, cast=float)
+
+# Claim analytics: recent days re-summarized on each rollup (statuses keep changing)
+ANALYTICS_RESTATE_DAYS = config('ANALYTICS_RESTATE_DAYS', default=7, cast=int)
+
+# Serve claim list/detail, dashboard and payor status with native async views
+# (AsyncMongoClient + httpx); run under ASGI, e.g. `uvicorn provider.asgi:application`
+ASYNC_CLAIM_VIEWS = config('ASYNC_CLAIM_VIEWS', default=False, cast=bool)
+
+# Outbound payor calls: every payor (payor_name of the insurance mapping) gets
+# its own connection pool, concurrency limit and timeouts, so one congested
+# payor cannot take capacity from the others.
+# 'default' applies to all payors; entries keyed by payor URL or host override
+# it, entries keyed by payor name (insurance mapping payor_name) override both,
+# e.g. 'Aetna Health': {'max_concurrency': 4, 'read_timeout': 60}.
+# max_concurrency is capped at max_connections.
+PAYOR_POOL_PROFILES = {
+    'default': {
+        'max_connections': config('PAYOR_POOL_MAX_CONNECTIONS', default=10, cast=int),
+        'max_concurrency': config('PAYOR_POOL_MAX_CONCURRENCY', default=10, cast=int),
+        'connect_timeout': config('PAYOR_CONNECT_TIMEOUT', default=5, cast=float),
+        'read_timeout': config('PAYOR_READ_TIMEOUT', default=30, cast=float),
+        # Seconds a call waits for a free slot before failing fast
+        'acquire_timeout': config('PAYOR_POOL_ACQUIRE_TIMEOUT', default=2, cast=float),
+    },
+}
+
+# MongoDB query budgets (development/test): every command is attributed to its
+# request, repeated query shapes are logged and endpoints over budget are logged,
+# or raise QueryBudgetExceeded in strict mode (set it in CI)
+MONGO_QUERY_TRACKING = config('MONGO_QUERY_TRACKING', default=DEBUG, cast=bool)
+MONGO_QUERY_BUDGET_STRICT = config('MONGO_QUERY_BUDGET_STRICT', default=False, cast=bool)
+MONGO_REPEATED_QUERY_THRESHOLD = config('MONGO_REPEATED_QUERY_THRESHOLD', default=3, cast=int)
+# Keyed by "<METHOD> <namespace:url_name>" or "<namespace:url_name>" (all methods).
+# Counted with a cold user cache and enforced by claims.tests in strict mode
+MONGO_QUERY_BUDGETS = {
+    'GET claims:mongo-claims-list': 3,
+    'POST claims:mongo-claims-list': 10,
+    'GET claims:mongo-claim-detail': 1,
+    'PUT claims:mongo-claim-detail': 4,
+    'PATCH claims:mongo-claim-detail': 4,
+    'claims:mongo-claims-search': 2,
+    'claims:mongo-claim-history': 4,
+    'claims:mongo-claim-documents': 4,
+    'claims:mongo-claim-document-download': 3,
+    'claims:mongo-dashboard-stats': 3,
+}
+
+# Logging: records are queued and written as JSON lines by a background thread
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+LOG_FORMAT = config('LOG_FORMAT', default='json')  # 'json' or 'text'
+LOG_QUEUE_SIZE = config('LOG_QUEUE_SIZE', default=10000, cast=int)
+# Fraction of DEBUG payload dumps (claim data, payor responses) that are logged
+LOG_PAYLOAD_SAMPLE_RATE = config('LOG_PAYLOAD_SAMPLE_RATE', default=0.01, cast=float)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'queue': {
+            '()': 'claims.structured_logging.AsyncQueueHandler',
+            'queue_size': LOG_QUEUE_SIZE,
+            'json_format': LOG_FORMAT == 'json',
+        },
+    },
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['queue'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
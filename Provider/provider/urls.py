@@ -16,11 +16,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from claims.metrics import render_prometheus
+
 def api_root(request):
     """Simple API root endpoint"""
     return JsonResponse({
@@ -33,6 +35,7 @@ def api_root(request):
             'token': '/api/token/',
             'token_refresh': '/api/token/refresh/',
             'health': '/api/health/',
+            'metrics': '/api/metrics',
             'provider': '/api/provider/',
             'claims': '/api/claims/',
             'mongo': '/api/mongo/',
@@ -50,6 +53,10 @@ def health_check(request):
         'version': '1.0.0'
     })
 
+def metrics(request):
+    """Request, MongoDB and payor HTTP metrics in Prometheus text format"""
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 def payor_callback(request):
     """Endpoint for payor system callbacks"""
     return JsonResponse({
@@ -80,6 +87,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', api_root, name='api-root'),
     path('api/health/', health_check, name='health-check'),
+    path('api/metrics', metrics, name='metrics'),
     path('api/payor/callback/', payor_callback, name='payor-callback'),
     
     # Payor system endpoints (for external integration)
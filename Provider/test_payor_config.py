@@ -32,14 +32,16 @@ print(f"   Payor Email: {payor_service.payor_email}")
 
 # Test 3: Check insurance mappings
 print("\n3. Insurance Mappings (should use dynamic URL):")
+# Built-in mappings carry no URL of their own and follow PAYOR_BASE_URL
 for ins_id, mapping in payor_service.insurance_mappings.items():
     print(f"   {ins_id}: {mapping['payor_name']}")
-    print(f"      URL: {mapping['payor_url']}")
+    print(f"      URL: {mapping.get('payor_url') or payor_service.payor_base_url}")
     print(f"      Active: {mapping['is_active']}")
 
 # Test 4: Verify all mappings use the same URL
 print("\n4. URL Consistency Check:")
-urls = set(mapping['payor_url'] for mapping in payor_service.insurance_mappings.values())
+urls = set(mapping.get('payor_url') or payor_service.payor_base_url
+           for mapping in payor_service.insurance_mappings.values())
 if len(urls) == 1:
     print(f"   ✅ All mappings use same URL: {list(urls)[0]}")
 else: